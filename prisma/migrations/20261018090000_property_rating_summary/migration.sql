@@ -0,0 +1,33 @@
+-- AlterTable
+ALTER TABLE "properties" ADD COLUMN     "review_count" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rating_sum" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rating_1" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rating_2" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rating_3" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rating_4" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "rating_5" INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill
+UPDATE "properties" AS p SET
+    "review_count" = s."review_count",
+    "rating_sum" = s."rating_sum",
+    "rating_1" = s."rating_1",
+    "rating_2" = s."rating_2",
+    "rating_3" = s."rating_3",
+    "rating_4" = s."rating_4",
+    "rating_5" = s."rating_5"
+FROM (
+    SELECT
+        "property_id",
+        COUNT(*) AS "review_count",
+        SUM("rating") AS "rating_sum",
+        COUNT(*) FILTER (WHERE "rating" = 1) AS "rating_1",
+        COUNT(*) FILTER (WHERE "rating" = 2) AS "rating_2",
+        COUNT(*) FILTER (WHERE "rating" = 3) AS "rating_3",
+        COUNT(*) FILTER (WHERE "rating" = 4) AS "rating_4",
+        COUNT(*) FILTER (WHERE "rating" = 5) AS "rating_5"
+    FROM "reviews"
+    WHERE "rating" BETWEEN 1 AND 5
+    GROUP BY "property_id"
+) AS s
+WHERE p."id" = s."property_id";
@@ -0,0 +1,19 @@
+-- CreateExtension
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- AlterTable
+ALTER TABLE "properties" ADD COLUMN "search_vector" tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', "name"), 'A') ||
+    setweight(to_tsvector('english', "city" || ' ' || "state"), 'B') ||
+    setweight(to_tsvector('english', "address"), 'C') ||
+    setweight(to_tsvector('english', "description"), 'D')
+) STORED;
+
+-- CreateIndex
+CREATE INDEX "properties_search_vector_idx" ON "properties" USING GIN ("search_vector");
+
+-- CreateIndex
+CREATE INDEX "properties_search_text_trgm_idx" ON "properties" USING GIN (("name" || ' ' || "address" || ' ' || "city" || ' ' || "state") gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "properties_name_trgm_idx" ON "properties" USING GIN ("name" gin_trgm_ops);
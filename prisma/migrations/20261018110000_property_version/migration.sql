@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "properties" ADD COLUMN     "version" INTEGER NOT NULL DEFAULT 0;
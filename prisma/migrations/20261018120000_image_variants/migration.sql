@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "images" ADD COLUMN     "variants" JSONB;
+
+-- CreateIndex
+CREATE INDEX "images_url_idx" ON "images"("url");
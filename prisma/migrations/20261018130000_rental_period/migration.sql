@@ -0,0 +1,11 @@
+-- CreateExtension
+CREATE EXTENSION IF NOT EXISTS "btree_gist";
+
+-- AlterTable
+ALTER TABLE "rentals" ADD COLUMN "period" tsrange GENERATED ALWAYS AS (
+    tsrange("start_date", "end_date", '[)')
+) STORED;
+
+-- CreateIndex
+CREATE INDEX "rentals_property_id_period_idx" ON "rentals" USING GIST ("property_id", "period")
+    WHERE "status" IN ('pending', 'approved');
@@ -0,0 +1,3 @@
+-- CreateIndex
+CREATE INDEX "rentals_active_dates_idx" ON "rentals" ("start_date", "end_date", "property_id")
+    WHERE "status" IN ('pending', 'approved');
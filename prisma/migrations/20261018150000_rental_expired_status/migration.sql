@@ -0,0 +1,2 @@
+-- AlterEnum
+ALTER TYPE "RentalStatus" ADD VALUE 'expired';
@@ -0,0 +1,14 @@
+-- CreateIndex
+CREATE INDEX "payments_created_at_id_idx" ON "payments"("created_at", "id");
+
+-- CreateIndex
+CREATE INDEX "payments_status_created_at_id_idx" ON "payments"("status", "created_at", "id");
+
+-- CreateIndex
+CREATE INDEX "payments_type_created_at_id_idx" ON "payments"("type", "created_at", "id");
+
+-- CreateIndex
+CREATE INDEX "payments_user_id_created_at_id_idx" ON "payments"("user_id", "created_at", "id");
+
+-- CreateIndex
+CREATE INDEX "rentals_property_id_idx" ON "rentals"("property_id");
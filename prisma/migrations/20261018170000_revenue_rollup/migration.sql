@@ -0,0 +1,23 @@
+-- CreateTable
+CREATE TABLE "revenue_rollup" (
+    "property_id" INTEGER NOT NULL,
+    "month" DATE NOT NULL,
+    "amount" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "payments" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "revenue_rollup_pkey" PRIMARY KEY ("property_id","month")
+);
+
+-- CreateIndex
+CREATE INDEX "revenue_rollup_month_idx" ON "revenue_rollup"("month");
+
+-- AddForeignKey
+ALTER TABLE "revenue_rollup" ADD CONSTRAINT "revenue_rollup_property_id_fkey" FOREIGN KEY ("property_id") REFERENCES "properties"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Backfill
+INSERT INTO "revenue_rollup" ("property_id", "month", "amount", "payments")
+SELECT r."property_id", date_trunc('month', pay."created_at")::date, SUM(pay."amount"), COUNT(*)
+FROM "payments" AS pay
+JOIN "rentals" AS r ON r."id" = pay."rental_id"
+WHERE pay."status" = 'paid'
+GROUP BY 1, 2;
@@ -0,0 +1,12 @@
+-- These indexes are created by raw SQL and can not be declared in
+-- schema.prisma, which only mentions them. Remove any DROP INDEX of them from
+-- generated migrations.
+
+-- CommentOnIndex
+COMMENT ON INDEX "properties_search_text_trgm_idx" IS 'unmanaged by Prisma: expression index, see the property_search migration';
+
+-- CommentOnIndex
+COMMENT ON INDEX "rentals_property_id_period_idx" IS 'unmanaged by Prisma: partial GiST index, see the rental_period migration';
+
+-- CommentOnIndex
+COMMENT ON INDEX "rentals_active_dates_idx" IS 'unmanaged by Prisma: partial index, see the rental_active_dates migration';
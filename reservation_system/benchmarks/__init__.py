@@ -0,0 +1,6 @@
+"""
+Benchmarks run against a real database.
+
+Each module is runnable with ``python -m reservation_system.benchmarks.<name>``
+and cleans up the rows it creates.
+"""
@@ -0,0 +1,136 @@
+"""
+Concurrent booking benchmark.
+
+Fires simultaneous bookings at a single property and reports throughput
+and double bookings, overlapping pending or approved rentals, which must
+be zero. With ``--overlap`` every booking asks for the same dates so
+exactly one may succeed, otherwise each asks for its own week.
+
+    python -m reservation_system.benchmarks.booking --bookings 300
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+DOUBLE_BOOKINGS_QUERY = """
+SELECT COUNT(*)::int AS "count"
+FROM "rentals" AS a
+JOIN "rentals" AS b ON b."property_id" = a."property_id" AND b."id" > a."id"
+WHERE a."property_id" = $1
+    AND a."status" IN ('pending', 'approved')
+    AND b."status" IN ('pending', 'approved')
+    AND a."period" && b."period"
+"""
+
+
+async def run(bookings: int, overlap: bool) -> dict:
+    """
+    Book a fresh property concurrently, then remove everything created.
+
+    :param bookings: number of simultaneous bookings.
+    :param overlap: book the same dates every time.
+    :return: benchmark results.
+    """
+    # the client connects on import and needs the running loop
+    from reservation_system.controllers import PropertiesController  # noqa: WPS433
+    from reservation_system.schemas.request import RentalCreate  # noqa: WPS433
+    from reservation_system.utils.prisma import prisma  # noqa: WPS433
+
+    while not prisma.is_connected():
+        await asyncio.sleep(0.01)
+
+    run_id = uuid.uuid4().hex[:8]
+    prop = await prisma.property.create(
+        data={
+            "name": f"Booking benchmark {run_id}",
+            "description": "Benchmark property",
+            "type": "studio",
+            "address": "1 Benchmark St",
+            "city": "Benchmark",
+            "state": "BM",
+            "zip": "00000",
+            "price": 1000,
+        },
+    )
+    await prisma.user.create_many(
+        data=[
+            {
+                "email": f"booking-{run_id}-{index}@benchmark.test",
+                "first_name": "Booking",
+                "last_name": str(index),
+                "password": "-",
+                "phone_number": "-",
+            }
+            for index in range(bookings)
+        ],
+    )
+    users = await prisma.user.find_many(
+        where={"email": {"startswith": f"booking-{run_id}-"}},
+    )
+
+    controller = PropertiesController()
+    start = datetime(2030, 1, 1)
+    outcomes = Counter()
+
+    async def book(index: int, user_id: int) -> None:  # noqa: WPS430
+        offset = timedelta(0 if overlap else 7 * index)
+        data = RentalCreate(
+            start_date=start + offset,
+            end_date=start + offset + timedelta(days=7),
+            payment_type="cash",
+            amount=1000,
+        )
+
+        try:
+            await controller.book_property(property_id=prop.id, user_id=user_id, data=data)
+        except HTTPException as exc:
+            outcomes[f"rejected {exc.status_code}"] += 1
+        except Exception as exc:
+            outcomes[type(exc).__name__] += 1
+        else:
+            outcomes["booked"] += 1
+
+    began = time.perf_counter()
+
+    try:
+        await asyncio.gather(*[book(index, user.id) for index, user in enumerate(users)])
+        elapsed = time.perf_counter() - began
+        rows = await prisma.query_raw(DOUBLE_BOOKINGS_QUERY, prop.id)
+
+    finally:
+        await prisma.property.delete(where={"id": prop.id})
+        await prisma.user.delete_many(where={"email": {"startswith": f"booking-{run_id}-"}})
+
+    return {
+        "bookings": bookings,
+        "overlap": overlap,
+        "seconds": round(elapsed, 3),
+        "bookings_per_second": round(bookings / elapsed, 1),
+        "outcomes": dict(outcomes),
+        "double_bookings": rows[0]["count"],
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print its results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bookings", type=int, default=300)
+    parser.add_argument("--overlap", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(bookings=args.bookings, overlap=args.overlap))
+
+    for key, value in results.items():
+        print(f"{key}: {value}")  # noqa: WPS421
+
+    if results["double_bookings"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
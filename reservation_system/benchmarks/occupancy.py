@@ -0,0 +1,140 @@
+"""
+Occupancy analytics benchmark.
+
+Times the vectorized occupancy report over synthetic rentals, the columns
+the analytics repository loads, so no database is needed. Rentals are
+spread at random, some overlapping, and the occupied days of a sample of
+properties are checked against a plain Python sweep.
+
+    python -m reservation_system.benchmarks.occupancy --rentals 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from reservation_system.utils.occupancy import SECONDS_PER_DAY, occupancy_report
+
+CITIES = ("Manila", "Cebu", "Davao", "Baguio", "Iloilo")
+
+
+def make_columns(rentals: int, properties: int, days: int, seed: int) -> tuple[dict, dict]:
+    """
+    Generate property and rental columns.
+
+    :param rentals: number of rentals.
+    :param properties: number of properties.
+    :param days: length of the period the rentals are spread over.
+    :param seed: random seed.
+    :return: property and rental columns.
+    """
+    generator = np.random.default_rng(seed)
+    property_ids = np.arange(1, properties + 1)
+    rental_property_ids = generator.integers(1, properties + 1, size=rentals)
+    starts = generator.uniform(-30, days, size=rentals) * SECONDS_PER_DAY
+    ends = starts + generator.uniform(1, 60, size=rentals) * SECONDS_PER_DAY
+
+    return (
+        {
+            "ids": property_ids.tolist(),
+            "names": [f"Property {property_id}" for property_id in property_ids],
+            "cities": [CITIES[property_id % len(CITIES)] for property_id in property_ids],
+            "tenanted": (generator.random(properties) < 0.5).tolist(),
+        },
+        {
+            "property_ids": rental_property_ids.tolist(),
+            "starts": starts.tolist(),
+            "ends": ends.tolist(),
+        },
+    )
+
+
+def occupied_seconds(intervals: list[tuple[float, float]], start: float, end: float) -> float:
+    """
+    Sweep the rentals of one property in Python, the reference result.
+
+    :param intervals: rental starts and ends.
+    :param start: start of the period.
+    :param end: end of the period.
+    :return: occupied seconds within the period.
+    """
+    occupied = 0.0
+    stay_end = start
+
+    for rental_start, rental_end in sorted(intervals):
+        rental_start, rental_end = max(rental_start, stay_end), min(rental_end, end)
+
+        if rental_end > rental_start:
+            occupied += rental_end - rental_start
+            stay_end = rental_end
+
+    return occupied
+
+
+def run(rentals: int, properties: int, days: int, sample: int) -> dict:
+    """
+    Build the report of a synthetic period and check a sample of it.
+
+    :param rentals: number of rentals.
+    :param properties: number of properties.
+    :param days: length of the period.
+    :param sample: properties checked against the Python sweep.
+    :return: benchmark results.
+    """
+    property_columns, rental_columns = make_columns(rentals, properties, days, seed=0)
+    period_end = days * SECONDS_PER_DAY
+
+    started = time.perf_counter()
+    report = occupancy_report(property_columns, rental_columns, period_start=0, period_end=period_end)
+    elapsed = time.perf_counter() - started
+
+    by_property = {}
+
+    for property_id, start, end in zip(*rental_columns.values()):
+        if property_id <= sample:
+            by_property.setdefault(property_id, []).append((start, end))
+
+    mismatches = sum(
+        abs(
+            occupied_seconds(by_property.get(stats["property_id"], []), 0, period_end) / SECONDS_PER_DAY
+            - stats["occupied_days"],
+        ) > 0.01
+        for stats in report["properties"][:sample]
+    )
+
+    return {
+        "rentals": rentals,
+        "properties": properties,
+        "cities": len(report["cities"]),
+        "seconds": round(elapsed, 3),
+        "rentals_per_second": round(rentals / elapsed),
+        "checked": min(sample, properties),
+        "mismatches": mismatches,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print its results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rentals", type=int, default=1_000_000)
+    parser.add_argument("--properties", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--sample", type=int, default=100)
+    args = parser.parse_args()
+
+    results = run(
+        rentals=args.rentals,
+        properties=args.properties,
+        days=args.days,
+        sample=args.sample,
+    )
+
+    for key, value in results.items():
+        print(f"{key}: {value}")  # noqa: WPS421
+
+    if results["mismatches"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,4 +10,6 @@ from .properties import PropertiesController
 from .tenants import TenantsController
 from .payments import PaymentsController
 from .notifications import NotificationController
-from .analytics import AnalyticsController
\ No newline at end of file
+from .analytics import AnalyticsController
+from .images import ImagesController
+from .rentals import RentalsController
@@ -1,13 +1,191 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
 from ..repositories import AnalyticsRepository
+from ..schemas.query_params import OccupancyQuery, RevenueSeriesQuery
+from ..settings import settings
+from ..utils.cache import analytics_cache
+from ..utils.occupancy import occupancy_report
+from ..utils.response import Response
+from ..utils.revenue import (
+    PROPERTIES_TAG,
+    bucket_count,
+    is_closed,
+    period_tags,
+    revenue_series,
+)
 
 
 class AnalyticsController:
     repo = AnalyticsRepository()
+    cache = analytics_cache
+
+    async def cached_revenue(
+        self,
+        key: str,
+        start: date,
+        end: date,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Get revenue analytics of a period from the cache or compute them.
+
+        Closed periods are kept until a payment of one of their months
+        changes, the current one for ``ANALYTICS_CACHE_TTL`` seconds.
+
+        :param key: cache key.
+        :param start: first day of the period.
+        :param end: last day of the period, inclusive.
+        :param compute: builds the analytics on a miss.
+        :return: analytics.
+        """
+        cached = await self.cache.get(key)
+
+        if cached is not None:
+            return cached
+
+        tags = [*period_tags(start, end), PROPERTIES_TAG]
+        # a payment change committed while computing leaves the result uncached
+        generation = await self.cache.generation(*tags)
+        data = await compute()
+        await self.cache.set(
+            key,
+            data,
+            tags=tags,
+            persistent=is_closed(end, datetime.utcnow().date()),
+            generation=generation,
+        )
+
+        return data
+
+    async def get_all_payments(self, year: int, month: int):
+        """
+        Get the revenue of every property in a month.
+
+        :param year: year.
+        :param month: month, 1 to 12.
+        :return: revenue keyed by property name.
+        """
+        if month not in range(1, 13):
+            raise Response.bad_request(f"Invalid month => {month} [required: 1-12]")
+
+        start = date(year, month, 1)
+        data = await self.cached_revenue(
+            self.cache.key("payments", year, month),
+            start=start,
+            end=date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1),
+            compute=lambda: self.repo.get_all_payments(year, month),
+        )
+
+        return Response.ok(
+            "Successfully retrieved analytics.",
+            data=data,
+        )
+
+    async def get_revenue_series(self, query: RevenueSeriesQuery):
+        """
+        Get the revenue per property and overall for each bucket of a date range.
+
+        :param query: date range, both days included, and bucket granularity.
+        :return: zero-filled revenue time series.
+        """
+        count = bucket_count(query.date_from, query.date_to, query.granularity)
 
-    def get_all_payments(self, year: int, month: int):
+        if count > settings.analytics_max_buckets:
+            raise Response.bad_request(
+                message=f"Range spans {count} buckets [max: {settings.analytics_max_buckets}]",
+            )
+
+        async def compute() -> dict:  # noqa: WPS430
+            return revenue_series(
+                await self.repo.get_revenue_series(
+                    start=query.date_from,
+                    end=query.date_to,
+                    granularity=query.granularity,
+                ),
+            )
+
+        series = await self.cached_revenue(
+            self.cache.key("revenue", query.model_dump()),
+            start=query.date_from,
+            end=query.date_to,
+            compute=compute,
+        )
+
+        return Response.ok(
+            message="Revenue time series retrieved",
+            data={
+                "date_from": query.date_from,
+                "date_to": query.date_to,
+                "granularity": query.granularity,
+                **series,
+            },
+        )
+
+    async def get_occupancy(self, query: OccupancyQuery):
+        """
+        Get the occupancy, vacancy and turnover of properties and cities over a date range.
+
+        :param query: date range, both days included, and optional city.
+        :return: statistics per property and per city.
         """
-        Get all analytics.
+        start = datetime.combine(query.date_from, time(), tzinfo=timezone.utc)
+        end = datetime.combine(query.date_to + timedelta(days=1), time(), tzinfo=timezone.utc)
+        properties, rentals = await self.repo.get_occupancy_columns(
+            start=start,
+            end=end,
+            city=query.city,
+        )
+
+        return Response.ok(
+            message="Occupancy retrieved",
+            data={
+                "date_from": query.date_from,
+                "date_to": query.date_to,
+                "days": (end - start).days,
+                **occupancy_report(
+                    properties,
+                    rentals,
+                    period_start=start.timestamp(),
+                    period_end=end.timestamp(),
+                ),
+            },
+        )
 
-        :return: list of analytics.
+    async def rebuild_revenue(self):
         """
-        return self.repo.get_all_payments(year, month)
+        Rebuild the revenue rollup from the payments table.
+
+        :return: number of property months rebuilt.
+        """
+        count = await self.repo.rebuild_revenue()
+        await self.cache.clear()
+
+        return Response.ok(
+            message="Revenue rollup rebuilt",
+            data={"count": count},
+        )
+
+    async def get_cache_stats(self):
+        """
+        Get the analytics cache counters.
+
+        :return: cache statistics.
+        """
+        return Response.ok(
+            message="Analytics cache statistics retrieved",
+            data=await self.cache.stats(),
+        )
+
+    async def check_revenue(self):
+        """
+        Check the revenue rollup against the payments table.
+
+        :return: property months with out of date revenue.
+        """
+        mismatches = await self.repo.check_revenue()
+
+        return Response.ok(
+            message="Revenue rollup checked",
+            data=mismatches,
+        )
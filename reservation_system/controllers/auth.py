@@ -7,8 +7,8 @@ from ..repositories import UserRepository
 from ..schemas.request import ForgotPassowrd, PasswordReset, RegisterUser
 from ..schemas.response import AuthResponse, Token
 from ..settings import settings
-from ..utils.hashing import check_password, hash_password
-from ..utils.jwt import encode_token
+from ..utils.hashing import check_password, hash_password, hashing_stats, needs_rehash
+from ..utils.jwt import decode_token, encode_token
 from ..utils.mail import send_email
 from ..utils.response import Response
 
@@ -33,7 +33,7 @@ class AuthController:
 
         mutated = {
             **data.model_dump(exclude=("password_confirmation",)),
-            "password": hash_password(password=data.password),
+            "password": await hash_password(password=data.password),
         }
 
         result = await self.repo.create(**mutated)
@@ -57,10 +57,23 @@ class AuthController:
         if not user:
             raise Response.unauthorized(message="User does not exist")
 
-        if not check_password(password=password, hashed_password=user.password):
+        if not await check_password(password=password, hashed_password=user.password):
             raise Response.unauthorized(message="Incorrect password")
 
-        session = {"id": user.id, "email": user.email, "isAdmin": user.admin}
+        # the plain password is only known here, upgrade hashes of an old cost factor
+        if needs_rehash(user.password):
+            await self.repo.update(
+                user_id=user.id,
+                password=await hash_password(password=password),
+            )
+            hashing_stats.rehashed += 1
+
+        session = {
+            "id": user.id,
+            "email": user.email,
+            "isAdmin": user.admin,
+            "ver": user.token_version,
+        }
 
         refresh_token = encode_token(session, expire_days=30)
         data = {
@@ -93,10 +106,17 @@ class AuthController:
         if not token:
             raise Response.unauthorized(message="Invalid refresh token")
 
+        # issued before the user's tokens were revoked
+        version = decode_token(refresh_token).get("ver")
+
+        if version is not None and version != token.user.token_version:
+            raise Response.unauthorized(message="Token revoked")
+
         session = {
             "id": token.user.id,
             "email": token.user.email,
             "isAdmin": token.user.admin,
+            "ver": token.user.token_version,
         }
         refresh_token = encode_token(session, expire_days=30)
 
@@ -110,7 +130,7 @@ class AuthController:
         }
 
         try:
-            await self.repo.delete_refresh_token(token=refresh_token)
+            await self.repo.delete_refresh_token(token=token.token)
             await self.repo.create_refresh_token(
                 user_id=token.user.id,
                 token=refresh_token,
@@ -173,11 +193,22 @@ class AuthController:
         if not user:
             raise Response.not_found(message="User not found")
 
-        await self.repo.update(
+        await self.repo.revoke_tokens(
             user_id=user.id,
-            password=hash_password(password=data.password),
+            password=await hash_password(password=data.password),
         )
 
         await self.repo.delete_email_token(code=data.token)
 
         return Response.ok(message="Password reset successfully")
+
+    async def get_hashing_stats(self):
+        """
+        Get the password hashing pool counters.
+
+        :return: hashing statistics.
+        """
+        return Response.ok(
+            message="Password hashing statistics retrieved",
+            data=hashing_stats.snapshot(),
+        )
@@ -0,0 +1,50 @@
+from typing import Optional
+
+from fastapi import responses, status
+
+from ..utils.etag import etag_matches
+from ..utils.file_response import RangeFileResponse
+from ..utils.response import Response
+from ..utils.storage import image_storage
+
+# variants are content addressed, the bytes behind an url never change
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ImagesController:
+    storage = image_storage
+
+    async def get_image(
+        self,
+        digest: str,
+        name: str,
+        range_header: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+    ):
+        """
+        Serve a stored image variant.
+
+        :param digest: image content hash.
+        :param name: variant file name, e.g. thumb.jpg.
+        :param range_header: Range header value.
+        :param if_none_match: If-None-Match header value.
+        :return: image file response.
+        """
+        variant, _, _ = name.partition(".")
+        path = self.storage.get_path(digest=digest, variant=variant)
+
+        if not path or not path.is_file():
+            raise Response.not_found(message="Image not found")
+
+        etag = f'"{digest}-{variant}"'
+        headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+
+        if etag_matches(if_none_match, etag):
+            return responses.Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return RangeFileResponse(
+            path=path,
+            media_type="image/jpeg",
+            headers=headers,
+            range_header=range_header,
+        )
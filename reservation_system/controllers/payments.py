@@ -1,22 +1,38 @@
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import UploadFile
+from fastapi.responses import StreamingResponse
+
 from ..repositories import PaymentRepository, NotificationRepository
-from ..controllers import PropertiesController
 
 from ..utils.response import Response
 from ..schemas.payments import Payments
+from ..schemas.query_params import PaymentQuery
+from ..schemas.request import PaymentBulkUpdate
+from ..settings import settings
+from ..utils.bulk import MEDIA_TYPES, dump_rows, read_chunks, row_error
+from ..utils.cache import FACETS_TAG, property_cache, property_tag
+from ..utils.reconcile import REPORT_FIELDS, PaymentIndex, parse_statement_row
 
 
 class PaymentsController:
     def __init__(self):
         self.__repo = PaymentRepository()
         self.__notification_repo = NotificationRepository()
-        self.__prop_controller = PropertiesController()
 
-    async def get_all_payments(self):
-        payments = await self.__repo.get_all()
+    async def get_all_payments(self, filters: PaymentQuery):
+        payments = await self.__repo.get_all(filters)
+        next_cursor = None
 
-        return Response.ok(
+        if len(payments) == filters.limit:
+            next_cursor = self.__repo.get_cursor(payments[-1])
+
+        return Response.paginated(
             message="Successfully retrieved payments.",
             data=[Payments(**payment.model_dump()).model_dump() for payment in payments],
+            next_cursor=next_cursor,
+            totals=await self.__repo.get_totals(filters),
         )
 
     async def get_payment(self, payment_id: int):
@@ -31,21 +47,125 @@ class PaymentsController:
         )
 
     async def mark_as_paid(self, payment_id: int):
-        payment = await self.__repo.get_by_id(payment_id=payment_id)
+        """
+        Mark a payment as paid, approving its rental as a bulk update does.
 
-        if not payment:
+        :param payment_id: payment id.
+        :return: success message.
+        """
+        transition = await self.__repo.bulk_transition(payment_ids=[payment_id], status="paid")
+        result = transition["results"][payment_id]
+
+        if result == "not_found":
             return Response.not_found(message="Payment not found.")
 
-        await self.__repo.update(payment_id=payment_id, status="paid")
-        await self.__notification_repo.create(
-            message=f"Payment for {payment.rental.property.name} was marked as paid.",
-            user_id=payment.rental.user_id,
-            created_by="SYSTEM"
+        if result == "conflict":
+            raise Response.conflict(message="Rental is no longer pending.")
+
+        await self.invalidate_tenanted(transition["tenanted"])
+
+        return Response.ok(message="Successfully marked payment as paid.")
+
+    async def bulk_update(self, data: PaymentBulkUpdate):
+        """
+        Mark several payments as paid or declined at once.
+
+        :param data: payment ids and target status.
+        :return: result of each payment id.
+        """
+        transition = await self.__repo.bulk_transition(
+            payment_ids=list(dict.fromkeys(data.ids)),
+            status=data.status,
+        )
+
+        await self.invalidate_tenanted(transition["tenanted"])
+
+        return Response.ok(
+            message="Successfully updated payments.",
+            data=[
+                {"id": payment_id, "result": result}
+                for payment_id, result in transition["results"].items()
+            ],
         )
-        await self.__prop_controller.accept_rental(
-            rental_id=payment.rental_id,
+
+    async def reconcile(self, file: UploadFile, date_format: Optional[str] = None):
+        """
+        Match a bank statement CSV against pending payments and mark matches as paid.
+
+        Rows match by the PAY-<id> reference, or by amount when exactly one
+        pending payment of that amount was created within the date window.
+        Matches are marked paid a batch at a time while the report streams.
+
+        :param file: statement CSV with date, amount and reference columns.
+        :param date_format: strptime format of the dates, ISO 8601 by default.
+        :return: streamed CSV report of every statement row.
+        """
+        index = PaymentIndex(
+            await self.__repo.get_pending_amounts(),
+            window=timedelta(days=settings.reconcile_date_window_days),
         )
-        return Response.ok(message="Successfully marked payment as paid.")
+
+        async def report():  # noqa: WPS430
+            header = True
+
+            async for chunk in read_chunks(file.file, format="csv", size=settings.bulk_batch_size):
+                rows = []
+                matched = []
+
+                for line, row in chunk:
+                    entry = {"line": line, **{field: "" for field in REPORT_FIELDS[1:]}}
+                    problem = row_error(row)
+
+                    if problem:
+                        rows.append({**entry, "result": "invalid", "error": problem})
+                        continue
+
+                    try:
+                        date, cents, reference = parse_statement_row(row, date_format=date_format)
+                    except ValueError as exc:
+                        rows.append({**entry, "result": "invalid", "error": str(exc)})
+                        continue
+
+                    entry.update(date=date.isoformat(), amount=cents / 100, reference=reference)
+
+                    if cents <= 0:
+                        rows.append({**entry, "result": "ignored"})
+                        continue
+
+                    result, payment_id = index.match(date, cents, reference)
+                    rows.append({**entry, "result": result, "payment_id": payment_id or ""})
+
+                    if result == "matched":
+                        matched.append(payment_id)
+
+                if matched:
+                    transition = await self.__repo.bulk_transition(payment_ids=matched, status="paid")
+                    await self.invalidate_tenanted(transition["tenanted"])
+
+                    for entry in rows:
+                        if entry["result"] == "matched" and transition["results"][entry["payment_id"]] == "conflict":
+                            entry["result"] = "conflict"
+
+                yield dump_rows(rows, format="csv", fields=REPORT_FIELDS, header=header)
+                header = False
+
+        return StreamingResponse(
+            report(),
+            media_type=MEDIA_TYPES["csv"],
+            headers={"Content-Disposition": 'attachment; filename="reconciliation.csv"'},
+        )
+
+    async def invalidate_tenanted(self, property_ids: list[int]) -> None:
+        """
+        Invalidate the cached properties that got a tenant.
+
+        :param property_ids: property ids.
+        """
+        if property_ids:
+            await property_cache.invalidate(
+                FACETS_TAG,
+                *[property_tag(property_id) for property_id in property_ids],
+            )
 
     async def mark_as_declined(self, payment_id: int):
         payment = await self.__repo.get_by_id(payment_id=payment_id)
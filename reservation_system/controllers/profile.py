@@ -4,21 +4,26 @@ from ..repositories import UserRepository
 from ..schemas.profile import Profile, Notification
 from ..schemas.request import ChangePassword, UpdateProfile
 from ..schemas.property import Rental
+from ..schemas.token import Principal
+from ..utils.cache import AVAILABILITY_TAG, property_cache
 from ..utils.hashing import check_password, hash_password
 from ..utils.response import Response
 
 
 class ProfileController:
     repo = UserRepository()
+    property_cache = property_cache
 
-    async def get_profile(self, user_id: int):
+    async def get_profile(self, user: Principal):
         """
         Get user profile.
 
-        :param user_id: user id.
+        :param user: authenticated user, carrying the profile unless it
+            came from a stateless token.
         :return: User profile.
         """
-        user = await self.repo.get_by_id(user_id=user_id)
+        if user.first_name is None:
+            user = await self.repo.get_by_id(user_id=user.id)
 
         return Response.ok(
             message="Profile retrieved",
@@ -51,7 +56,7 @@ class ProfileController:
 
         user = await self.repo.get_by_id(user_id=user_id)
 
-        if not check_password(data.old_password, user.password):
+        if not await check_password(data.old_password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect password",
@@ -63,9 +68,9 @@ class ProfileController:
                 detail="Passwords do not match",
             )
 
-        password = hash_password(data.new_password)
+        password = await hash_password(data.new_password)
 
-        user_updated = await self.repo.update(user_id=user_id, password=password)
+        user_updated = await self.repo.revoke_tokens(user_id=user_id, password=password)
 
         return Response.ok(
             message="Password updated",
@@ -169,6 +174,8 @@ class ProfileController:
         if not rental:
             raise Response.not_found(message="Rental not found")
 
+        await self.property_cache.invalidate(AVAILABILITY_TAG)
+
         return Response.ok(
             message="Rental cancelled",
             data=rental.model_dump(),
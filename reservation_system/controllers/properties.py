@@ -1,10 +1,16 @@
-import requests
-from fastapi import HTTPException, UploadFile, status
+import asyncio
+from datetime import datetime, timedelta
+from typing import IO, Optional
 
-from ..repositories import (PropertyRepository, NotificationRepository, UserRepository,
-                            PaymentRepository)
-from ..schemas.property import Rental, Property, Review
-from ..schemas.query_params import PropertyQuery
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from prisma import models
+
+from ..repositories import PropertyRepository, NotificationRepository, UserRepository
+from ..repositories.property import PROPERTY_TYPES, BookingConflict, rating_summary
+from ..schemas.property import PROPERTY_SUMMARY_FIELDS, Rental, Property, PropertySummary, Review
+from ..schemas.query_params import AvailabilityQuery, PropertyQuery, PropertyView
 from ..schemas.request import (
     RentalCreate,
     PropertyCreate,
@@ -14,62 +20,242 @@ from ..schemas.request import (
 )
 from ..schemas.user import Tenant
 from ..settings import settings
+from ..utils.availability import free_periods, parse_timestamp, utc
+from ..utils.bulk import (
+    MEDIA_TYPES,
+    BulkFormat,
+    detect_format,
+    dump_rows,
+    read_chunks,
+    validate_row,
+)
+from ..utils.cache import (
+    ANY_TAG,
+    AVAILABILITY_TAG,
+    FACETS_TAG,
+    LISTINGS_TAG,
+    analytics_cache,
+    property_cache,
+    property_tag,
+)
+from ..utils.etag import etag_matches, make_etag
 from ..utils.response import Response
+from ..utils.revenue import PROPERTIES_TAG
+from ..utils.storage import image_storage
+from ..utils.uploads import spool_upload, upload_jobs
+
+# columns of the bulk export, the import accepts the same rows
+EXPORT_FIELDS = ["id", *PropertyCreate.model_fields, "created_at", "updated_at"]
+
+
+def property_etag(data: models.Property, view: PropertyView) -> str:
+    """
+    Get the entity tag of a property representation.
+
+    :param data: property.
+    :param view: summary or full property.
+    :return: entity tag.
+    """
+    return make_etag("property", data.id, data.version, view)
+
+
+def listing_tags(filters: PropertyQuery) -> list[str]:
+    """
+    Get the cache tags shared by every entry built from a listing.
+
+    :param filters: property filters.
+    :return: cache tags.
+    """
+    if filters.available_from or filters.available_to:
+        return [LISTINGS_TAG, AVAILABILITY_TAG]
+
+    return [LISTINGS_TAG]
+
+
+def check_availability_window(filters: PropertyQuery) -> None:
+    """
+    Reject availability windows ending before they start.
+
+    :param filters: property filters.
+    """
+    if (
+        filters.available_from
+        and filters.available_to
+        and utc(filters.available_to) <= utc(filters.available_from)
+    ):
+        raise Response.bad_request(message="available_to must be after available_from")
+
+
+def image_thumbnail(image: models.Image) -> str:
+    """
+    Get the url of the smallest stored variant of an image.
+
+    :param image: property image.
+    :return: image url.
+    """
+    return (image.variants or {}).get("thumb", image.url)
 
 
 class PropertiesController:
     user_repo = UserRepository()
     repo = PropertyRepository()
     notif_repo = NotificationRepository()
-    payment_repo = PaymentRepository()
+    cache = property_cache
+    storage = image_storage
+    # orders image removals with uploads sharing the same stored files
+    image_lock = asyncio.Lock()
 
-    async def get_property(self, property_id: int):
+    async def get_property(
+        self,
+        property_id: int,
+        view: PropertyView = "full",
+        if_none_match: Optional[str] = None,
+    ) -> tuple[str, Optional[dict]]:
         """
         Get property by id.
 
         :param property_id: data id.
-        :return: Property.
+        :param view: summary or full property.
+        :param if_none_match: entity tags held by the client.
+        :return: entity tag and Property, None if the client copy is current.
         """
-        data = await self.repo.get_by_id(property_id=property_id)
+        key = self.cache.key("property", property_id, view)
+        cached = await self.cache.get(key)
+
+        if cached is not None:
+            if etag_matches(if_none_match, cached["etag"]):
+                return cached["etag"], None
+
+            return cached["etag"], cached["body"]
+
+        # an update committed while reading leaves the result uncached
+        generation = await self.cache.generation(property_tag(property_id))
+
+        if if_none_match:
+            data = await self.repo.get_by_id(property_id=property_id, view="basic")
+
+            if data and etag_matches(if_none_match, property_etag(data, view)):
+                return property_etag(data, view), None
+
+        data = await self.repo.get_by_id(
+            property_id=property_id,
+            view="detail" if view == "full" else view,
+        )
 
         if not data:
             raise Response.not_found(message="Property not found")
 
-        property_data = {
-            **data.model_dump(),
-            "occupied": bool(data.tenant_property),
-            "tenant": data.tenant_property.user.model_dump() if data.tenant_property else None,
-            "ratings": await self.get_ratings(property_id=property_id)
-        }
-
-        return Response.ok(
+        properties = await self.serialize_properties(properties=[data], view=view)
+        etag = property_etag(data, view)
+        body = Response.ok(
             message="Property retrieved",
-            data=Property(**property_data).model_dump(),
+            data=properties[0],
+        ).model_dump(mode="json")
+
+        await self.cache.set(
+            key,
+            {"etag": etag, "body": body},
+            tags=[property_tag(property_id)],
+            generation=generation,
         )
 
-    async def get_properties(self, filters: PropertyQuery):
+        return etag, body
+
+    async def get_properties(
+        self,
+        filters: PropertyQuery,
+        if_none_match: Optional[str] = None,
+    ) -> tuple[str, Optional[dict]]:
         """
         Get all properties.
 
-        :return: Properties.
+        :param filters: property filters.
+        :param if_none_match: entity tags held by the client.
+        :return: entity tag and Properties, None if the client copy is current.
         """
-        await self.get_ratings(property_id=1)
-        properties = await self.repo.get_all(filters)
+        check_availability_window(filters)
 
-        return Response.ok(
+        key = self.cache.key("properties", filters.model_dump())
+        cached = await self.cache.get(key)
+
+        if cached is not None:
+            if etag_matches(if_none_match, cached["etag"]):
+                return cached["etag"], None
+
+            return cached["etag"], cached["body"]
+
+        next_cursor = None
+        # the listed properties are only known once read, any write leaves the result uncached
+        generation = await self.cache.generation(ANY_TAG)
+
+        if filters.search:
+            properties = await self.repo.search(filters)
+
+        else:
+            properties = await self.repo.get_all(filters)
+
+            if len(properties) == filters.limit:
+                next_cursor = self.repo.get_cursor(filters, properties[-1])
+
+        etag = make_etag(
+            filters.model_dump(),
+            [(data.id, data.version) for data in properties],
+        )
+
+        if etag_matches(if_none_match, etag):
+            return etag, None
+
+        body = Response.paginated(
             message="Properties retrieved",
-            data=[
-                Property(
-                    **{
-                        **data.model_dump(),
-                        "occupied": bool(data.tenant_property),
-                        "tenant": data.tenant_property.user.model_dump() if data.tenant_property else None,
-                        "ratings": await self.get_ratings(property_id=data.id),
-                    }
-                ).model_dump()
-                for data in properties
-            ],
+            data=await self.serialize_properties(properties=properties, view=filters.view),
+            next_cursor=next_cursor,
+        ).model_dump(mode="json")
+
+        await self.cache.set(
+            key,
+            {"etag": etag, "body": body},
+            tags=[*listing_tags(filters), *[property_tag(data.id) for data in properties]],
+            generation=generation,
+        )
+
+        return etag, body
+
+    async def get_facets(
+        self,
+        filters: PropertyQuery,
+        price_buckets: Optional[list[int]] = None,
+    ):
+        """
+        Get property counts per facet for the listing filters.
+
+        :param filters: property filters.
+        :param price_buckets: price boundaries, defaults to the configured ones.
+        :return: Facet counts.
+        """
+        check_availability_window(filters)
+
+        price_buckets = sorted(set(price_buckets or settings.facet_price_buckets))
+        key = self.cache.key(
+            "facets",
+            filters.model_dump(exclude={"limit", "offset", "cursor", "sort", "order", "view"}),
+            price_buckets,
         )
+        cached = await self.cache.get(key)
+
+        if cached is not None:
+            return cached
+
+        tags = [*listing_tags(filters), FACETS_TAG]
+        generation = await self.cache.generation(*tags)
+        facets = await self.repo.get_facets(filters, price_buckets=price_buckets)
+        response = Response.ok(
+            message="Property facets retrieved",
+            data=facets,
+        ).model_dump(mode="json")
+
+        await self.cache.set(key, response, tags=tags, generation=generation)
+
+        return response
 
     async def create_property(self, data_in: PropertyCreate):
         """
@@ -80,14 +266,94 @@ class PropertiesController:
         """
 
         data = await self.repo.create(**data_in.model_dump())
+        await self.cache.invalidate(LISTINGS_TAG)
+        await analytics_cache.invalidate(PROPERTIES_TAG)
+
+        properties = await self.serialize_properties(properties=[data])
 
         return Response.ok(
             message="Property created",
-            data=Property(**{
-                **data.model_dump(),
-                "tenant": data.tenant_property.user.model_dump() if data.tenant_property else None,
-                "ratings": await self.get_ratings(property_id=data.id),
-            }).model_dump(),
+            data=properties[0],
+        )
+
+    async def import_properties(self, file: UploadFile, format: Optional[BulkFormat] = None):
+        """
+        Import properties from an NDJSON or CSV file.
+
+        Rows are validated in chunks and each chunk of valid rows is
+        created with a single insert. Invalid rows are skipped and
+        reported with their line number.
+
+        :param file: uploaded file.
+        :param format: bulk format, detected from the file when omitted.
+        :return: import report.
+        """
+        format = format or detect_format(file.filename, file.content_type)
+
+        if not format:
+            raise Response.bad_request(message="Unknown import format, use ndjson or csv")
+
+        created = 0
+        failed = 0
+        errors = []
+
+        async for chunk in read_chunks(file.file, format=format, size=settings.bulk_batch_size):
+            valid = []
+
+            for line, row in chunk:
+                data, problems = validate_row(row, PropertyCreate)
+
+                if data and data.type not in PROPERTY_TYPES:
+                    data, problems = None, [f"type: must be one of {', '.join(PROPERTY_TYPES)}"]
+
+                if data:
+                    valid.append(data.model_dump())
+                    continue
+
+                failed += 1
+
+                if len(errors) < settings.bulk_max_errors:
+                    errors.append({"line": line, "errors": problems})
+
+            if valid:
+                created += await self.repo.create_many(data=valid)
+
+        if created:
+            await self.cache.invalidate(LISTINGS_TAG, FACETS_TAG)
+            await analytics_cache.invalidate(PROPERTIES_TAG)
+
+        return Response.ok(
+            message="Properties imported",
+            data={"created": created, "failed": failed, "errors": errors},
+        )
+
+    async def export_properties(self, format: BulkFormat) -> StreamingResponse:
+        """
+        Export every property as NDJSON or CSV.
+
+        The export is streamed batch by batch and never holds the whole
+        catalog in memory.
+
+        :param format: bulk format.
+        :return: streaming response.
+        """
+
+        async def rows():  # noqa: WPS430
+            header = True
+
+            async for batch in self.repo.iter_all(batch_size=settings.bulk_batch_size):
+                yield dump_rows(
+                    (data.model_dump(include=set(EXPORT_FIELDS)) for data in batch),
+                    format=format,
+                    fields=EXPORT_FIELDS,
+                    header=header,
+                )
+                header = False
+
+        return StreamingResponse(
+            rows(),
+            media_type=MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="properties.{format}"'},
         )
 
     async def update_property(self, property_id: int, data: PropertyUpdate):
@@ -104,13 +370,14 @@ class PropertiesController:
         if not data:
             raise Response.not_found(message="Property not found")
 
+        await self.cache.invalidate(LISTINGS_TAG, property_tag(property_id))
+        await analytics_cache.invalidate(PROPERTIES_TAG)
+
+        properties = await self.serialize_properties(properties=[data])
+
         return Response.ok(
             message="Property updated",
-            data=Property(**{
-                **data.model_dump(),
-                "tenant": data.tenant_property.user.model_dump() if data.tenant_property else None,
-                "ratings": await self.get_ratings(property_id=data.id),
-            }).model_dump(),
+            data=properties[0],
         )
 
     async def delete_property(self, property_id: int):
@@ -125,13 +392,14 @@ class PropertiesController:
         if not data:
             raise Response.not_found(message="Property not found")
 
+        await self.cache.invalidate(LISTINGS_TAG, property_tag(property_id))
+        await analytics_cache.invalidate(PROPERTIES_TAG)
+
+        properties = await self.serialize_properties(properties=[data])
+
         return Response.ok(
             message="Property deleted",
-            data=Property(**{
-                **data.model_dump(),
-                "tenant": data.tenant_property.user.model_dump() if data.tenant_property else None,
-                "ratings": await self.get_ratings(property_id=data.id),
-            }).model_dump(),
+            data=properties[0],
         )
 
     async def get_reviews(self, property_id: int):
@@ -157,7 +425,7 @@ class PropertiesController:
         :param data: review data.
         :return: Property reviews.
         """
-        prop = await self.repo.get_by_id(property_id=property_id)
+        prop = await self.repo.get_by_id(property_id=property_id, view="basic")
 
         if not prop:
             raise Response.not_found(message="Property not found")
@@ -165,6 +433,7 @@ class PropertiesController:
         review = await self.repo.create_review(
             property_id, user_id=user_id, **data.model_dump()
         )
+        await self.cache.invalidate(property_tag(property_id))
 
         return Response.ok(
             message="Property review added",
@@ -187,17 +456,25 @@ class PropertiesController:
         :param data: review data.
         :return: Property reviews.
         """
-        prop = await self.repo.get_by_id(property_id=property_id)
+        prop = await self.repo.get_by_id(property_id=property_id, view="basic")
 
         if not prop:
             raise Response.not_found(message="Property not found")
 
         review = await self.repo.get_review(review_id=review_id)
 
-        if not review or user_id != review.user_id:
+        if not review or user_id != review.user_id or review.property_id != property_id:
+            raise Response.not_found(message="Review not found")
+
+        review = await self.repo.update_review(
+            review_id=review_id, **data.model_dump(exclude_none=True)
+        )
+
+        # deleted since it was read
+        if not review:
             raise Response.not_found(message="Review not found")
 
-        review = await self.repo.update_review(review_id=review_id, **data.model_dump())
+        await self.cache.invalidate(property_tag(property_id))
 
         return Response.ok(
             message="Property review updated",
@@ -215,16 +492,19 @@ class PropertiesController:
         :param user_id: user id.
         :return: Property reviews.
         """
-        data = await self.repo.get_by_id(property_id=property_id)
+        data = await self.repo.get_by_id(property_id=property_id, view="basic")
 
         if not data:
             raise Response.not_found(message="Property not found")
 
         review = await self.repo.get_review(review_id=review_id)
 
-        if not review or user_id != review.user_id:
+        if not review or user_id != review.user_id or review.property_id != property_id:
             raise Response.not_found(message="Review not found")
 
+        await self.repo.delete_review(review_id=review_id)
+        await self.cache.invalidate(property_tag(property_id))
+
         return Response.ok(
             message="Property review deleted",
             data=Review(**review.model_dump()).model_dump(),
@@ -237,7 +517,7 @@ class PropertiesController:
         :param property_id: data id.
         :return: Property rentals.
         """
-        data = await self.repo.get_by_id(property_id=property_id)
+        data = await self.repo.get_by_id(property_id=property_id, view="basic")
 
         if not data:
             raise Response.not_found(message="Property not found")
@@ -249,6 +529,45 @@ class PropertiesController:
             data=[Rental(**rental.model_dump()).model_dump() for rental in rentals],
         )
 
+    async def get_availability(self, property_id: int, query: AvailabilityQuery):
+        """
+        Get the availability calendar of a property.
+
+        :param property_id: property id.
+        :param query: calendar window, from now for the configured days by default.
+        :return: booked and available periods of the window.
+        """
+        start = utc(query.start or datetime.utcnow())
+        end = utc(query.end) if query.end else start + timedelta(days=settings.availability_window_days)
+
+        if end <= start:
+            raise Response.bad_request(message="End must be after start")
+
+        data = await self.repo.get_by_id(property_id=property_id, view="basic")
+
+        if not data:
+            raise Response.not_found(message="Property not found")
+
+        booked = [
+            {**row, "start": parse_timestamp(row["start"]), "end": parse_timestamp(row["end"])}
+            for row in await self.repo.get_booked_periods(
+                property_id=property_id,
+                start=start,
+                end=end,
+            )
+        ]
+        available = free_periods(start, end, [(row["start"], row["end"]) for row in booked])
+
+        return Response.ok(
+            message="Property availability retrieved",
+            data={
+                "start": start,
+                "end": end,
+                "booked": booked,
+                "available": [{"start": free_start, "end": free_end} for free_start, free_end in available],
+            },
+        )
+
     async def book_property(self, property_id: int, user_id: int, data: RentalCreate):
         """
         Book data.
@@ -258,41 +577,25 @@ class PropertiesController:
         :param data: rental data.
         :return: Property rentals.
         """
-        prop = await self.repo.get_by_id(property_id=property_id)
+        try:
+            rental = await self.repo.book(
+                property_id=property_id,
+                user_id=user_id,
+                start_date=data.start_date,
+                end_date=data.end_date,
+                amount=data.amount,
+            )
+        except BookingConflict as exc:
+            raise Response.bad_request(message=str(exc))
 
-        if not prop:
+        if not rental:
             raise Response.not_found(message="Property not found")
 
-        if prop.tenant_property:
-            raise Response.bad_request(message="Property is taken")
-
-        rental_check = await self.repo.get_rental(
-            user_id=user_id,
-            property_id=property_id,
-        )
-
-        if rental_check:
-            raise Response.bad_request(message="You already have a rental")
-
-        rental = await self.repo.create_rental(
-            property_id=property_id,
-            user_id=user_id,
-            start_date=data.start_date,
-            end_date=data.end_date,
-        )
-
-        payment = await self.payment_repo.create(
-            user_id=user_id,
-            rental_id=rental.id,
-            amount=data.amount,
-        )
-        payment = payment.model_dump()
-        rental = rental.model_dump()
-        rental["payment"] = payment
+        await self.cache.invalidate(AVAILABILITY_TAG)
 
         return Response.ok(
             message="Property booked",
-            data=Rental(**rental).model_dump(),
+            data=Rental(**rental.model_dump()).model_dump(),
         )
 
     async def accept_rental(self, rental_id: int):
@@ -307,12 +610,15 @@ class PropertiesController:
         if not rental:
             raise Response.not_found(message="Rental not found")
 
-        await self.repo.accept_rental(rental_id=rental_id)
+        # a freed rental's dates may have been booked since
+        if not await self.repo.accept_rental(rental_id=rental_id):
+            raise Response.conflict(message="Rental is no longer pending")
 
         if not rental.property.tenant_property:
             await self.repo.add_tenant(
                 property_id=rental.property_id, user_id=rental.user_id
             )
+            await self.cache.invalidate(FACETS_TAG, property_tag(rental.property_id))
             await self.notif_repo.create(
                 user_id=rental.user_id,
                 message=f"Your rental for {rental.property.name} has been accepted",
@@ -334,6 +640,7 @@ class PropertiesController:
             raise Response.not_found(message="Rental not found")
 
         await self.repo.decline_rental(rental_id=rental_id)
+        await self.cache.invalidate(AVAILABILITY_TAG)
         await self.notif_repo.create(
             user_id=rental.user_id,
             message=f"Your rental for {rental.property.name} has been declined",
@@ -392,6 +699,8 @@ class PropertiesController:
             )
 
         await self.repo.add_tenant(property_id=property_id, user_id=user_id)
+        await self.cache.invalidate(FACETS_TAG, property_tag(property_id))
+
         return Response.ok(message="Tenant added")
 
     async def remove_tenant(self, property_id: int, tenant_id: int):
@@ -403,7 +712,7 @@ class PropertiesController:
         :return: Property tenants.
         """
 
-        data = await self.repo.get_by_id(property_id=property_id)
+        data = await self.repo.get_by_id(property_id=property_id, view="basic")
 
         if not data:
             raise Response.not_found(message="Property not found")
@@ -414,6 +723,7 @@ class PropertiesController:
             raise Response.bad_request(message="User is not a tenant of this property")
 
         await self.repo.remove_tenant(property_id=property_id, user_id=tenant_id)
+        await self.cache.invalidate(FACETS_TAG, property_tag(property_id))
 
         return Response.ok(
             message="Tenant removed",
@@ -428,28 +738,86 @@ class PropertiesController:
         :param image: image file.
         """
 
-        data = await self.repo.get_by_id(property_id=property_id)
+        data = await self.repo.get_by_id(property_id=property_id, view="basic")
 
         if not data:
             raise Response.not_found(message="Property not found")
 
-        if "image" not in image.headers.get("Content-Type"):
+        if "image" not in (image.content_type or ""):
             raise Response.bad_request(message="Invalid image file")
 
-        url = "https://thumbsnap.com/api/upload"
-        resp = requests.post(
-            url,
-            data={"key": settings.thumbsnap_secret},
-            files={"media": image.file.read()},
+        file = await spool_upload(image, max_bytes=settings.image_max_bytes)
+        job = upload_jobs.create(property_id=property_id)
+        upload_jobs.run(
+            self.process_image_upload(
+                job=job,
+                file=file,
+                filename=image.filename or "image",
+                content_type=image.content_type,
+            )
         )
 
-        if resp.status_code != 200:
-            raise Response.bad_request(message="Image upload failed")
+        return Response.ok(message="Image upload started", data=job)
+
+    async def process_image_upload(
+        self,
+        job: dict,
+        file: IO[bytes],
+        filename: str,
+        content_type: str,
+    ) -> None:
+        """
+        Upload a spooled property image and attach it to the property.
+
+        :param job: upload job to report progress on.
+        :param file: spooled image file, closed once uploaded.
+        :param filename: image file name.
+        :param content_type: image content type.
+        """
+        job["status"] = "uploading"
+
+        try:
+            variants = await self.storage.save(file, filename=filename, content_type=content_type)
+
+            async with self.image_lock:
+                # a removal may have deleted the files this upload shares
+                if not await self.storage.exists(variants):
+                    variants = await self.storage.save(file, filename=filename, content_type=content_type)
 
-        image = resp.json()["data"]["thumb"]
-        await self.repo.add_image(property_id=property_id, url=image)
+                url = variants["full"]
+                await self.repo.add_image(
+                    property_id=job["property_id"],
+                    url=url,
+                    variants=variants if len(variants) > 1 else None,
+                )
 
-        return Response.ok(message="Image uploaded")
+            await self.cache.invalidate(property_tag(job["property_id"]))
+
+        except Exception as exc:
+            logger.exception("Image upload {} failed", job["id"])
+            job["status"] = "failed"
+            job["error"] = str(exc)
+
+        else:
+            job["status"] = "done"
+            job["url"] = url
+
+        finally:
+            file.close()
+
+    async def get_image_job(self, job_id: str):
+        """
+        Get the status of a background image upload.
+
+        :param job_id: upload job id.
+        :return: upload job.
+        """
+        job = upload_jobs.get(job_id)
+
+        if not job:
+            raise Response.not_found(message="Upload job not found")
+
+        return Response.ok(message="Upload job retrieved", data=job)
 
     async def remove_image(self, property_id: int, image_id: int):
         """
@@ -459,7 +827,7 @@ class PropertiesController:
         :param image_id: image id.
         """
 
-        data = await self.repo.get_by_id(property_id=property_id)
+        data = await self.repo.get_by_id(property_id=property_id, view="basic")
 
         if not data:
             raise Response.not_found(message="Property not found")
@@ -469,9 +837,92 @@ class PropertiesController:
         if not image:
             raise Response.not_found(message="Image not found")
 
-        await self.repo.remove_image(image_id=image_id)
+        async with self.image_lock:
+            await self.repo.remove_image(image_id=image_id)
+
+            # identical uploads share their stored files
+            if image.variants and not await self.repo.count_images_by_url(url=image.url):
+                await self.storage.delete(image.variants)
+
+        await self.cache.invalidate(property_tag(property_id))
 
         return Response.ok(message="Image removed")
 
-    async def get_ratings(self, property_id: int) -> int:
+    async def get_ratings(self, property_id: int) -> float:
         return await self.repo.get_ratings(property_id=property_id)
+
+    async def rebuild_ratings(self):
+        """
+        Rebuild the stored rating summary of every property.
+
+        :return: number of properties rebuilt.
+        """
+        count = await self.repo.rebuild_ratings()
+        await self.cache.clear()
+
+        return Response.ok(
+            message="Property ratings rebuilt",
+            data={"count": count},
+        )
+
+    async def check_ratings(self):
+        """
+        Check stored rating summaries against the reviews table.
+
+        :return: properties with an out of date summary.
+        """
+        mismatches = await self.repo.check_ratings()
+
+        return Response.ok(
+            message="Property ratings checked",
+            data=mismatches,
+        )
+
+    async def get_cache_stats(self):
+        """
+        Get the property cache counters.
+
+        :return: cache statistics.
+        """
+        return Response.ok(
+            message="Property cache statistics retrieved",
+            data=await self.cache.stats(),
+        )
+
+    async def serialize_properties(
+        self,
+        properties: list[models.Property],
+        view: PropertyView = "full",
+    ) -> list[dict]:
+        """
+        Serialize properties along with their stored rating summary.
+
+        :param properties: properties to serialize.
+        :param view: summary or full property.
+        :return: serialized properties.
+        """
+        ratings = {data.id: rating_summary(data) for data in properties}
+
+        if view == "summary":
+            return [
+                PropertySummary(**{
+                    **data.model_dump(include=PROPERTY_SUMMARY_FIELDS),
+                    "occupied": bool(data.tenant_property),
+                    "ratings": ratings[data.id]["average"],
+                    "ratings_count": ratings[data.id]["count"],
+                    "thumbnail": image_thumbnail(data.images[0]) if data.images else None,
+                }).model_dump()
+                for data in properties
+            ]
+
+        return [
+            Property(**{
+                **data.model_dump(),
+                "occupied": bool(data.tenant_property),
+                "tenant": data.tenant_property.user.model_dump() if data.tenant_property else None,
+                "ratings": ratings[data.id]["average"],
+                "ratings_count": ratings[data.id]["count"],
+                "ratings_histogram": ratings[data.id]["histogram"],
+            }).model_dump()
+            for data in properties
+        ]
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from ..repositories import NotificationRepository, PropertyRepository
+from ..settings import settings
+from ..utils.cache import AVAILABILITY_TAG, FACETS_TAG, LISTINGS_TAG, property_cache, property_tag
+from ..utils.response import Response
+
+
+class RentalsController:
+    """
+    Sweeps the rental lifecycle.
+
+    Expires pending rentals nobody answered and releases tenancies whose
+    rentals have ended, a batch per statement so no transaction grows with
+    the backlog.
+    """
+
+    repo = PropertyRepository()
+    notif_repo = NotificationRepository()
+    cache = property_cache
+    lock = asyncio.Lock()
+    totals = {"runs": 0, "expired": 0, "released": 0, "notifications": 0}
+    last_run: dict = {}
+
+    async def sweep(self) -> dict:
+        """
+        Run one sweep until no stale rental or ended tenancy is left.
+
+        :return: metrics of the run.
+        """
+        async with self.lock:
+            began = time.perf_counter()
+            now = datetime.utcnow()
+            created_before = now - timedelta(hours=settings.rental_pending_ttl_hours)
+            metrics = {"expired": 0, "released": 0, "notifications": 0, "batches": 0}
+
+            while True:
+                expired = await self.repo.expire_pending_rentals(
+                    created_before=created_before,
+                    starting_before=now,
+                    limit=settings.rental_sweep_batch_size,
+                )
+
+                if not expired:
+                    break
+
+                metrics["batches"] += 1
+                metrics["expired"] += len(expired)
+                metrics["notifications"] += await self.notif_repo.create_many(
+                    [
+                        {
+                            "user_id": rental["user_id"],
+                            "message": f"Your rental for {rental['property_name']} has expired",
+                        }
+                        for rental in expired
+                    ],
+                    created_by="SYSTEM",
+                )
+
+                if len(expired) < settings.rental_sweep_batch_size:
+                    break
+
+            released_properties = set()
+
+            while True:
+                released = await self.repo.release_ended_tenancies(
+                    ended_before=now,
+                    limit=settings.rental_sweep_batch_size,
+                )
+
+                if not released:
+                    break
+
+                metrics["batches"] += 1
+                metrics["released"] += len(released)
+                released_properties.update(tenancy["property_id"] for tenancy in released)
+                metrics["notifications"] += await self.notif_repo.create_many(
+                    [
+                        {
+                            "user_id": tenancy["user_id"],
+                            "message": f"Your tenancy at {tenancy['property_name']} has ended",
+                        }
+                        for tenancy in released
+                    ],
+                    created_by="SYSTEM",
+                )
+
+                if len(released) < settings.rental_sweep_batch_size:
+                    break
+
+            if metrics["expired"]:
+                await self.cache.invalidate(AVAILABILITY_TAG)
+
+            if released_properties:
+                await self.cache.invalidate(
+                    LISTINGS_TAG,
+                    FACETS_TAG,
+                    *[property_tag(property_id) for property_id in released_properties],
+                )
+
+            metrics["seconds"] = round(time.perf_counter() - began, 3)
+            metrics["finished_at"] = datetime.utcnow().isoformat()
+
+            self.totals["runs"] += 1
+
+            for key in ("expired", "released", "notifications"):
+                self.totals[key] += metrics[key]
+
+            RentalsController.last_run = metrics
+            logger.info("Rental sweep {}", metrics)
+
+            return metrics
+
+    async def run_sweep(self):
+        """
+        Run a rental sweep now.
+
+        :return: metrics of the run.
+        """
+        return Response.ok(message="Rental sweep finished", data=await self.sweep())
+
+    async def get_sweep_stats(self):
+        """
+        Get the rental sweeper metrics.
+
+        :return: totals since startup and metrics of the last run.
+        """
+        return Response.ok(
+            message="Rental sweep statistics retrieved",
+            data={
+                "interval": settings.rental_sweep_interval,
+                "totals": self.totals,
+                "last_run": self.last_run or None,
+            },
+        )
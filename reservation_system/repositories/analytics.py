@@ -1,51 +1,199 @@
-from typing import Any
-from datetime import datetime
+from typing import Optional
+from datetime import date, datetime, timedelta
 
+from ..utils.availability import utc
 from ..utils.prisma import get_db_session
-from ..utils.response import Response
+from ..utils.revenue import GRANULARITY_STEPS
+from .property import bind
+
+# paid payments per property and month, the source of the revenue rollup
+REVENUE_QUERY = """
+SELECT r."property_id", date_trunc('month', pay."created_at")::date AS "month",
+    SUM(pay."amount") AS "amount", COUNT(*) AS "payments"
+FROM "payments" AS pay
+JOIN "rentals" AS r ON r."id" = pay."rental_id"
+WHERE pay."status" = 'paid'
+GROUP BY 1, 2
+"""
 
 
 class AnalyticsRepository:
     prisma_client = get_db_session()
 
-    async def get_all_payments(self, year: int, month: int) -> Any:
+    async def get_all_payments(self, year: int, month: int) -> dict[str, float]:
         """
-        Get all analytics.
+        Get the revenue of every property in a month from the revenue rollup.
 
-        :return: list of analytics.
+        :param year: year.
+        :param month: month, 1 to 12.
+        :return: revenue keyed by property name.
         """
-        where = {"status": "paid"}
+        rows = await self.prisma_client.query_raw(
+            """
+            SELECT p."name", COALESCE(r."amount", 0) AS "amount"
+            FROM "properties" AS p
+            LEFT JOIN "revenue_rollup" AS r
+                ON r."property_id" = p."id" AND r."month" = $1::date
+            """,
+            date(year, month, 1).isoformat(),
+        )
         ret = {}
 
-        if month not in range(1, 13):
-            raise Response.bad_request(f"Invalid month => {month} [required: 1-12]")
+        for row in rows:
+            ret[row["name"]] = ret.get(row["name"], 0) + row["amount"]
 
-        month_start = datetime(year, month, 1)
-        month_end = datetime(year, month + 1, 1)
+        return ret
 
-        where["created_at"] = {
-            "gte": month_start,
-            "lt": month_end,
-        }
+    async def get_revenue_series(self, start: date, end: date, granularity: str) -> list[dict]:
+        """
+        Get the revenue of each property per time bucket in one grouped query.
 
-        for prop in await self.prisma_client.property.find_many():
-            ret[prop.name] = 0
+        Every bucket of the range is returned, those without revenue as a
+        single row without property.
 
-        payments = await self.prisma_client.payment.find_many(
-            where=where,
-            include={
-                "rental": {
-                    "include": {
-                        "property": True,
-                    }
-                },
-            }
+        :param start: first day of the series.
+        :param end: last day of the series, inclusive.
+        :param granularity: "day", "week", "month" or "quarter".
+        :return: bucket, property id, name, amount and payment count,
+            ordered by bucket.
+        """
+        return await self.prisma_client.query_raw(
+            """
+            WITH "revenue" AS (
+                SELECT
+                    date_trunc($1::text, pay."created_at") AS "bucket",
+                    r."property_id",
+                    SUM(pay."amount") AS "amount",
+                    COUNT(*) AS "payments"
+                FROM "payments" AS pay
+                JOIN "rentals" AS r ON r."id" = pay."rental_id"
+                WHERE pay."status" = 'paid'
+                    AND pay."created_at" >= $2::timestamp
+                    AND pay."created_at" < $3::timestamp
+                GROUP BY 1, 2
+            )
+            SELECT
+                b."bucket"::date::text AS "bucket",
+                rev."property_id",
+                p."name",
+                COALESCE(rev."amount", 0) AS "amount",
+                COALESCE(rev."payments", 0) AS "payments"
+            FROM generate_series(
+                date_trunc($1::text, $2::timestamp),
+                $3::timestamp - interval '1 day',
+                $4::interval
+            ) AS b("bucket")
+            LEFT JOIN "revenue" AS rev ON rev."bucket" = b."bucket"
+            LEFT JOIN "properties" AS p ON p."id" = rev."property_id"
+            ORDER BY b."bucket", rev."property_id"
+            """,
+            granularity,
+            start.isoformat(),
+            (end + timedelta(days=1)).isoformat(),
+            GRANULARITY_STEPS[granularity],
+        )
+
+    async def get_occupancy_columns(
+        self,
+        start: datetime,
+        end: datetime,
+        city: Optional[str] = None,
+    ) -> tuple[dict, dict]:
+        """
+        Get the properties and their approved rentals overlapping a period as columns.
+
+        Each is a single row of arrays, so large periods are loaded without
+        building a record per rental.
+
+        :param start: start of the period.
+        :param end: end of the period.
+        :param city: only properties of this city.
+        :return: property columns "ids", "names", "cities" and "tenanted",
+            and rental columns "property_ids", "starts" and "ends" in epoch
+            seconds.
+        """
+        # both queries share the city placeholder, the rental one appends its own
+        params = []
+        city_filter = f'p."city" = {bind(params, city)}' if city is not None else "TRUE"
+        properties = await self.prisma_client.query_raw(
+            f"""
+            SELECT
+                COALESCE(array_agg(p."id" ORDER BY p."id"), '{{}}') AS "ids",
+                COALESCE(array_agg(p."name" ORDER BY p."id"), '{{}}') AS "names",
+                COALESCE(array_agg(p."city" ORDER BY p."id"), '{{}}') AS "cities",
+                COALESCE(array_agg(t."id" IS NOT NULL ORDER BY p."id"), '{{}}') AS "tenanted"
+            FROM "properties" AS p
+            LEFT JOIN "tenant_properties" AS t ON t."property_id" = p."id"
+            WHERE {city_filter}
+            """,
+            *params,
         )
+        rentals = await self.prisma_client.query_raw(
+            f"""
+            SELECT
+                COALESCE(array_agg(r."property_id"), '{{}}') AS "property_ids",
+                COALESCE(array_agg(extract(epoch FROM r."start_date")::float8), '{{}}') AS "starts",
+                COALESCE(array_agg(extract(epoch FROM r."end_date")::float8), '{{}}') AS "ends"
+            FROM "rentals" AS r
+            JOIN "properties" AS p ON p."id" = r."property_id"
+            WHERE r."status" = 'approved'
+                AND r."period" && tsrange(
+                    {bind(params, utc(start).isoformat())}::timestamp,
+                    {bind(params, utc(end).isoformat())}::timestamp
+                )
+                AND {city_filter}
+            """,
+            *params,
+        )
+
+        return properties[0], rentals[0]
+
+    async def rebuild_revenue(self) -> int:
+        """
+        Recompute the revenue rollup from the paid payments.
+
+        :return: number of property months stored.
+        """
+        async with self.prisma_client.tx() as transaction:
+            await transaction.execute_raw('DELETE FROM "revenue_rollup"')
 
-        for payment in payments:
-            ret[payment.rental.property.name] += payment.amount
+            return await transaction.execute_raw(
+                f"""
+                INSERT INTO "revenue_rollup" ("property_id", "month", "amount", "payments")
+                {REVENUE_QUERY}
+                """,
+            )
 
-        return Response.ok(
-            "Successfully retrieved analytics.",
-            data=ret,
+    async def check_revenue(self) -> list[dict]:
+        """
+        Compare the revenue rollup with a live aggregate of paid payments.
+
+        :return: property months whose stored revenue is out of date.
+        """
+        rows = await self.prisma_client.query_raw(
+            f"""
+            SELECT
+                COALESCE(stored."property_id", live."property_id") AS "property_id",
+                COALESCE(stored."month", live."month")::text AS "month",
+                COALESCE(stored."amount", 0) AS "stored_amount",
+                COALESCE(stored."payments", 0) AS "stored_payments",
+                COALESCE(live."amount", 0) AS "live_amount",
+                COALESCE(live."payments", 0) AS "live_payments"
+            FROM "revenue_rollup" AS stored
+            FULL OUTER JOIN ({REVENUE_QUERY}) AS live
+                ON live."property_id" = stored."property_id" AND live."month" = stored."month"
+            WHERE COALESCE(stored."payments", 0) <> COALESCE(live."payments", 0)
+                OR abs(COALESCE(stored."amount", 0) - COALESCE(live."amount", 0)) > 0.005
+            ORDER BY 1, 2
+            """,
         )
+
+        return [
+            {
+                "property_id": row["property_id"],
+                "month": row["month"],
+                "stored": {"amount": row["stored_amount"], "payments": row["stored_payments"]},
+                "live": {"amount": row["live_amount"], "payments": row["live_payments"]},
+            }
+            for row in rows
+        ]
@@ -39,6 +39,21 @@ class NotificationRepository:
             },
         )
 
+    async def create_many(self, notifications: list[dict], created_by: str) -> int:
+        """
+        Create notifications in a single insert.
+
+        :param notifications: user id and message of each notification.
+        :param created_by: notification creator.
+        :return: number of notifications created.
+        """
+        if not notifications:
+            return 0
+
+        return await self.prisma_client.notification.create_many(
+            data=[{**notification, "created_by": created_by} for notification in notifications],
+        )
+
     async def update(self, notification_id: int, **kwargs) -> models.Notification:
         """
         Update notification.
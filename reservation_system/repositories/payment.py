@@ -1,6 +1,26 @@
-from prisma import models
+from datetime import date
+from typing import Iterable
 
+from prisma import Prisma, models
+
+from ..schemas.query_params import PaymentQuery
+from ..utils.availability import ACTIVE_RENTAL_STATUSES, parse_timestamp
+from ..utils.pagination import decode_cursor, encode_cursor
+from ..utils.cache import analytics_cache
 from ..utils.prisma import get_db_session
+from ..utils.revenue import revenue_deltas, revenue_sign, revenue_tag
+from .property import ACTIVE_RENTAL, bind
+
+PAYMENT_STATUSES = ("pending", "paid", "declined")
+
+PAYMENT_INCLUDES = {
+    "rental": {
+        "include": {
+            "property": True
+        }
+    },
+    "user": True
+}
 
 
 class PaymentRepository:
@@ -25,23 +45,114 @@ class PaymentRepository:
             }
         )
 
-    async def get_all(self) -> list[models.Payment]:
+    async def get_all(self, filters: PaymentQuery) -> list[models.Payment]:
         """
-        Get all payments.
+        Get a page of payments, newest first by default.
 
+        Pages with ``offset`` by default, or by keyset over ``created_at``
+        and id when a ``cursor`` returned by :meth:`get_cursor` is given.
+
+        :param filters: payment filters.
         :return: list of payments.
         """
-        return await self.prisma_client.payment.find_many(
-            include={
-                "rental": {
-                    "include": {
-                        "property": True
-                    }
-                },
-                "user": True
+        where = self.build_filters(filters)
+        direction = filters.order
+
+        if filters.cursor:
+            value, last_id = decode_cursor(
+                filters.cursor,
+                sort="created_at",
+                date_fields=("created_at",),
+            )
+            operator = "gt" if direction == "asc" else "lt"
+            where = {
+                "AND": [
+                    where,
+                    {
+                        "OR": [
+                            {"created_at": {operator: value}},
+                            {"created_at": value, "id": {operator: last_id}},
+                        ],
+                    },
+                ],
             }
+
+        return await self.prisma_client.payment.find_many(
+            take=filters.limit,
+            skip=None if filters.cursor else filters.offset,
+            where=where,
+            order=[{"created_at": direction}, {"id": direction}],
+            include=PAYMENT_INCLUDES,
         )
 
+    def build_filters(self, filters: PaymentQuery) -> dict:
+        """
+        Build the where clause of a payment listing.
+
+        :param filters: payment filters.
+        :return: where clause.
+        """
+        where = {}
+
+        if filters.status:
+            where["status"] = filters.status
+
+        if filters.type:
+            where["type"] = filters.type
+
+        if filters.user_id:
+            where["user_id"] = filters.user_id
+
+        if filters.property_id:
+            where["rental"] = {"is": {"property_id": filters.property_id}}
+
+        if filters.date_from or filters.date_to:
+            where["created_at"] = {}
+
+            if filters.date_from:
+                where["created_at"]["gte"] = filters.date_from
+
+            if filters.date_to:
+                where["created_at"]["lt"] = filters.date_to
+
+        return where
+
+    def get_cursor(self, data: models.Payment) -> str:
+        """
+        Get the cursor of the page following a payment.
+
+        :param data: last payment of the current page.
+        :return: cursor token.
+        """
+        return encode_cursor(sort="created_at", value=data.created_at, id=data.id)
+
+    async def get_totals(self, filters: PaymentQuery) -> dict:
+        """
+        Summarize every payment matching the filters in one grouped query.
+
+        :param filters: payment filters, pagination is ignored.
+        :return: count and amount overall and per status.
+        """
+        groups = await self.prisma_client.payment.group_by(
+            by=["status"],
+            where=self.build_filters(filters),
+            count=True,
+            sum={"amount": True},
+        )
+        by_status = {status: {"count": 0, "amount": 0} for status in PAYMENT_STATUSES}
+
+        for group in groups:
+            by_status[group["status"]] = {
+                "count": group["_count"]["_all"],
+                "amount": group["_sum"]["amount"] or 0,
+            }
+
+        return {
+            "count": sum(totals["count"] for totals in by_status.values()),
+            "amount": sum(totals["amount"] for totals in by_status.values()),
+            "by_status": by_status,
+        }
+
     async def create(self, **data) -> models.Payment:
         """
         Create payment.
@@ -53,33 +164,266 @@ class PaymentRepository:
 
     async def update(self, payment_id: int, **kwargs) -> models.Payment:
         """
-        Update payment.
+        Update payment, keeping the revenue rollup in step with its status.
 
         :param payment_id: payment id.
         :param kwargs: payment data.
         :return: Payment.
         """
-        return await self.prisma_client.payment.update(
-            where={"id": payment_id},
-            data=kwargs,
-            include={
-                "rental": {
-                    "include": {
-                        "property": True
-                    }
-                },
-                "user": True
+        async with self.prisma_client.tx() as transaction:
+            await self.lock_payments(transaction, [payment_id])
+            previous = await transaction.payment.find_unique(
+                where={"id": payment_id},
+                include={"rental": True},
+            )
+            payment = await transaction.payment.update(
+                where={"id": payment_id},
+                data=kwargs,
+                include=PAYMENT_INCLUDES,
+            )
+
+            months = set()
+
+            # the old row leaves and the new one enters, amount edits included
+            if previous is not None:
+                months = await self.apply_revenue(
+                    transaction,
+                    changes=[
+                        (previous, revenue_sign(previous.status, "")),
+                        (payment, revenue_sign("", payment.status)),
+                    ],
+                )
+
+        await self.invalidate_revenue(months)
+
+        return payment
+
+    async def get_pending_amounts(self) -> list[dict]:
+        """
+        Get the id, amount and creation date of every pending payment.
+
+        Payments whose rental expired or was canceled or declined are
+        flagged stale, settling them would approve a freed booking.
+
+        :return: pending payments.
+        """
+        rows = await self.prisma_client.query_raw(
+            f"""
+            SELECT pay."id", pay."amount", pay."created_at", NOT {ACTIVE_RENTAL} AS "stale"
+            FROM "payments" AS pay
+            JOIN "rentals" AS r ON r."id" = pay."rental_id"
+            WHERE pay."status" = 'pending'
+            """,
+        )
+
+        return [{**row, "created_at": parse_timestamp(row["created_at"])} for row in rows]
+
+    async def bulk_transition(self, payment_ids: list[int], status: str) -> dict:
+        """
+        Move payments to a status in one transaction with set-based statements.
+
+        Paid payments approve their pending rentals and make the renter the
+        tenant of every property that has none yet, as accepting a rental
+        does. Rentals that were expired, canceled or declined may have given
+        their dates to another booking, so their payments are not marked
+        paid. Users are notified of each change.
+
+        :param payment_ids: payment ids.
+        :param status: "paid" or "declined".
+        :return: result of each id, "updated", "unchanged", "conflict" or
+            "not_found", and the ids of the properties that got a tenant.
+        """
+        async with self.prisma_client.tx() as transaction:
+            await self.lock_rentals(transaction, payment_ids)
+            await self.lock_payments(transaction, payment_ids)
+            payments = await transaction.payment.find_many(
+                where={"id": {"in": payment_ids}},
+                include={"rental": {"include": {"property": True}}},
+            )
+            changing = [payment for payment in payments if payment.status != status]
+            conflicts = {
+                payment.id
+                for payment in changing
+                if status == "paid" and payment.rental.status not in ACTIVE_RENTAL_STATUSES
             }
+            changed = [payment for payment in changing if payment.id not in conflicts]
+            results = {payment_id: "not_found" for payment_id in payment_ids}
+            results.update({payment.id: "unchanged" for payment in payments})
+            results.update({payment_id: "conflict" for payment_id in conflicts})
+            results.update({payment.id: "updated" for payment in changed})
+            tenanted = []
+
+            if not changed:
+                return {"results": results, "tenanted": tenanted}
+
+            await transaction.payment.update_many(
+                where={"id": {"in": [payment.id for payment in changed]}},
+                data={"status": status},
+            )
+            months = await self.apply_revenue(
+                transaction,
+                changes=[
+                    (payment, revenue_sign(payment.status, status))
+                    for payment in changed
+                ],
+            )
+            verb = "marked as paid" if status == "paid" else "declined"
+            notifications = [
+                {
+                    "user_id": payment.rental.user_id,
+                    "message": f"Payment for {payment.rental.property.name} was {verb}.",
+                    "created_by": "SYSTEM",
+                }
+                for payment in changed
+            ]
+
+            if status == "paid":
+                tenanted = await self.approve_rentals(
+                    transaction,
+                    rentals=[payment.rental for payment in changed],
+                )
+                notifications.extend(
+                    {
+                        "user_id": rental.user_id,
+                        "message": f"Your rental for {rental.property.name} has been accepted",
+                        "created_by": "SYSTEM",
+                    }
+                    for rental in tenanted
+                )
+
+            await transaction.notification.create_many(data=notifications)
+
+        await self.invalidate_revenue(months)
+
+        return {"results": results, "tenanted": [rental.property_id for rental in tenanted]}
+
+    async def lock_rentals(self, transaction: Prisma, payment_ids: list[int]) -> None:
+        """
+        Lock the rentals of payments until the transaction ends.
+
+        Rentals are locked in id order, as the sweep expiring them does, so
+        their status can not change while their payments are moved.
+
+        :param transaction: open transaction.
+        :param payment_ids: payment ids.
+        """
+        if not payment_ids:
+            return
+
+        params = []
+        await transaction.query_raw(
+            f"""
+            SELECT r."id" FROM "rentals" AS r
+            JOIN "payments" AS pay ON pay."rental_id" = r."id"
+            WHERE pay."id" IN ({", ".join(bind(params, payment_id) for payment_id in payment_ids)})
+            ORDER BY r."id"
+            FOR UPDATE OF r
+            """,
+            *params,
+        )
+
+    async def lock_payments(self, transaction: Prisma, payment_ids: list[int]) -> None:
+        """
+        Lock payments until the transaction ends.
+
+        Their status is read before it is changed, a concurrent change
+        would be counted twice or not at all in the revenue rollup.
+
+        :param transaction: open transaction.
+        :param payment_ids: payment ids.
+        """
+        if not payment_ids:
+            return
+
+        params = []
+        await transaction.query_raw(
+            f"""
+            SELECT "id" FROM "payments"
+            WHERE "id" IN ({", ".join(bind(params, payment_id) for payment_id in payment_ids)})
+            ORDER BY "id"
+            FOR UPDATE
+            """,
+            *params,
+        )
+
+    async def approve_rentals(
+        self,
+        transaction: Prisma,
+        rentals: list[models.Rental],
+    ) -> list[models.Rental]:
+        """
+        Approve pending rentals and assign tenants to the properties without one.
+
+        :param transaction: open transaction.
+        :param rentals: pending or approved rentals, locked by the transaction.
+        :return: rentals whose renter became the tenant.
+        """
+        await transaction.rental.update_many(
+            where={"id": {"in": [rental.id for rental in rentals]}, "status": "pending"},
+            data={"status": "approved"},
+        )
+        existing = await transaction.tenantproperty.find_many(
+            where={
+                "OR": [
+                    {"property_id": {"in": [rental.property_id for rental in rentals]}},
+                    {"user_id": {"in": [rental.user_id for rental in rentals]}},
+                ],
+            },
         )
+        taken_properties = {tenant.property_id for tenant in existing}
+        taken_users = {tenant.user_id for tenant in existing}
+        candidates = []
+
+        # a property and a user hold at most one tenancy, first rental wins
+        for rental in sorted(rentals, key=lambda rental: rental.id):
+            if rental.property_id in taken_properties or rental.user_id in taken_users:
+                continue
+
+            taken_properties.add(rental.property_id)
+            taken_users.add(rental.user_id)
+            candidates.append(rental)
+
+        if not candidates:
+            return []
+
+        await transaction.tenantproperty.create_many(
+            data=[
+                {"property_id": rental.property_id, "user_id": rental.user_id}
+                for rental in candidates
+            ],
+            skip_duplicates=True,
+        )
+        await transaction.property.update_many(
+            where={"id": {"in": [rental.property_id for rental in candidates]}},
+            data={"version": {"increment": 1}},
+        )
+
+        return candidates
 
     async def delete(self, payment_id: int) -> models.Payment:
         """
-        Delete payment.
+        Delete payment, removing it from the revenue rollup if it was paid.
 
         :param payment_id: payment id.
         :return: Payment.
         """
-        return await self.prisma_client.payment.delete(where={"id": payment_id})
+        async with self.prisma_client.tx() as transaction:
+            payment = await transaction.payment.delete(
+                where={"id": payment_id},
+                include={"rental": True},
+            )
+
+            months = set()
+
+            if payment is not None:
+                months = await self.apply_revenue(
+                    transaction,
+                    changes=[(payment, revenue_sign(payment.status, ""))],
+                )
+
+        await self.invalidate_revenue(months)
+
+        return payment
 
     async def mark_paid(self, payment_id: int) -> models.Payment:
         """
@@ -88,18 +432,7 @@ class PaymentRepository:
         :param payment_id: payment id.
         :return: Payment.
         """
-        return await self.prisma_client.payment.update(
-            where={"id": payment_id},
-            data={"status": "PAID"},
-            include={
-                "rental": {
-                    "include": {
-                        "property": True
-                    }
-                },
-                "user": True
-            }
-        )
+        return await self.update(payment_id=payment_id, status="paid")
 
     async def mark_declined(self, payment_id: int) -> models.Payment:
         """
@@ -108,15 +441,58 @@ class PaymentRepository:
         :param payment_id: payment id.
         :return: Payment.
         """
-        return await self.prisma_client.payment.update(
-            where={"id": payment_id},
-            data={"status": "DECLINED"},
-            include={
-                "rental": {
-                    "include": {
-                        "property": True
-                    }
-                },
-                "user": True
-            }
+        return await self.update(payment_id=payment_id, status="declined")
+
+    async def apply_revenue(
+        self,
+        transaction: Prisma,
+        changes: Iterable[tuple[models.Payment, int]],
+    ) -> set[date]:
+        """
+        Add payments entering or leaving the paid status to the revenue rollup.
+
+        :param transaction: open transaction the status change is made in.
+        :param changes: payments, with their rental, and the sign of the
+            change, +1 when it became paid and -1 when it stopped being paid.
+        :return: months whose revenue changed.
+        """
+        deltas = revenue_deltas(
+            (payment.rental.property_id, payment.created_at, payment.amount, sign)
+            for payment, sign in changes
+            if sign
+        )
+
+        if not deltas:
+            return set()
+
+        params = []
+        rows = ", ".join(
+            f"({bind(params, property_id)}, {bind(params, month.isoformat())}::date, "
+            f"{bind(params, amount)}::double precision, {bind(params, count)})"
+            for (property_id, month), (amount, count) in sorted(deltas.items())
         )
+
+        await transaction.execute_raw(
+            f"""
+            INSERT INTO "revenue_rollup" ("property_id", "month", "amount", "payments")
+            VALUES {rows}
+            ON CONFLICT ("property_id", "month") DO UPDATE SET
+                "amount" = "revenue_rollup"."amount" + EXCLUDED."amount",
+                "payments" = "revenue_rollup"."payments" + EXCLUDED."payments"
+            """,
+            *params,
+        )
+
+        return {month for _, month in deltas}
+
+    async def invalidate_revenue(self, months: set[date]) -> None:
+        """
+        Drop the cached analytics of months whose revenue changed.
+
+        Called once the change is committed, entries cached before the
+        commit would hold the previous revenue.
+
+        :param months: months whose revenue changed.
+        """
+        if months:
+            await analytics_cache.invalidate(*(revenue_tag(month) for month in months))
@@ -1,32 +1,109 @@
-from prisma import models
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+from prisma import Json, models
 
 from ..schemas.query_params import PropertyQuery
+from ..utils.availability import ACTIVE_RENTAL_STATUSES, utc
+from ..utils.pagination import decode_cursor, encode_cursor
+from ..settings import settings
 from ..utils.prisma import get_db_session
 
+RATING_STARS = (1, 2, 3, 4, 5)
+
+SORT_FIELDS = ("price", "created_at", "updated_at")
+
+PROPERTY_TYPES = ("one_bedroom", "two_bedroom", "studio", "house")
+
+# bumped whenever a property or anything shown with it changes
+BUMP_VERSION = {"version": {"increment": 1}}
+
+# relations loaded for each property view, "summary" only needs the
+# thumbnail and whether the property is occupied
+PROPERTY_INCLUDES = {
+    "basic": None,
+    "summary": {
+        "images": {"take": 1, "order_by": {"id": "asc"}},
+        "tenant_property": True,
+    },
+    "full": {
+        "images": True,
+        "reviews": True,
+        "tenant_property": {
+            "include": {
+                "user": True
+            }
+        }
+    },
+    "detail": {
+        "images": True,
+        "reviews": {
+            "include": {"user": True}
+        },
+        "tenant_property": {
+            "include": {
+                "user": True
+            }
+        }
+    },
+}
+
+# must match the expression of the properties_search_text_trgm_idx index
+SEARCH_TEXT = """(p."name" || ' ' || p."address" || ' ' || p."city" || ' ' || p."state")"""
+
+# rentals holding their dates, matches the predicate of the rental period index
+ACTIVE_RENTAL = "r.\"status\" IN ({})".format(
+    ", ".join(f"'{status}'" for status in ACTIVE_RENTAL_STATUSES),
+)
+
+
+REBUILD_RATINGS_QUERY = """
+UPDATE "properties" AS p SET
+    "review_count" = COALESCE(s."review_count", 0),
+    "rating_sum" = COALESCE(s."rating_sum", 0),
+    "rating_1" = COALESCE(s."rating_1", 0),
+    "rating_2" = COALESCE(s."rating_2", 0),
+    "rating_3" = COALESCE(s."rating_3", 0),
+    "rating_4" = COALESCE(s."rating_4", 0),
+    "rating_5" = COALESCE(s."rating_5", 0),
+    "version" = p."version" + 1
+FROM "properties" AS q
+LEFT JOIN (
+    SELECT
+        "property_id",
+        COUNT(*) AS "review_count",
+        SUM("rating") AS "rating_sum",
+        COUNT(*) FILTER (WHERE "rating" = 1) AS "rating_1",
+        COUNT(*) FILTER (WHERE "rating" = 2) AS "rating_2",
+        COUNT(*) FILTER (WHERE "rating" = 3) AS "rating_3",
+        COUNT(*) FILTER (WHERE "rating" = 4) AS "rating_4",
+        COUNT(*) FILTER (WHERE "rating" = 5) AS "rating_5"
+    FROM "reviews"
+    WHERE "rating" BETWEEN 1 AND 5
+    GROUP BY "property_id"
+) AS s ON s."property_id" = q."id"
+WHERE p."id" = q."id"
+"""
+
+
+class BookingConflict(Exception):
+    """Raised when a property can not be booked, the message says why."""
+
 
 class PropertyRepository:
     prisma_client = get_db_session()
 
-    async def get_by_id(self, property_id: int) -> models.Property:
+    async def get_by_id(self, property_id: int, view: str = "detail") -> models.Property:
         """
         Get property by id.
 
         :param property_id: property id.
+        :param view: name of the include profile to load.
         :return: Property.
         """
         return await self.prisma_client.property.find_first(
             where={"id": property_id},
-            include={
-                "images": True,
-                "reviews": {
-                    "include": {"user": True}
-                },
-                "tenant_property": {
-                    "include": {
-                        "user": True
-                    }
-                }
-            },
+            include=PROPERTY_INCLUDES[view],
         )
 
     async def get_by_name(self, name: str) -> models.Property:
@@ -38,39 +115,66 @@ class PropertyRepository:
         """
         return await self.prisma_client.property.find_unique(
             where={"name": name},
-            include={
-                "images": True,
-                "reviews": True,
-                "tenant_property": {
-                    "include": {
-                        "user": True
-                    }
-                }
-            },
+            include=PROPERTY_INCLUDES["full"],
         )
 
     async def get_all(self, filters: PropertyQuery) -> list[models.Property]:
         """
         Get all properties.
 
+        Pages with ``offset`` by default, or by keyset when a ``cursor``
+        returned by :meth:`get_cursor` is given.
+
+        :param filters: property filters.
         :return: list of properties.
         """
+        where = self.build_filters(filters)
+        sort, direction = self.get_sort(filters)
+        order = [{sort: direction}]
+
+        if sort != "id":
+            order.append({"id": direction})
+
+        if filters.cursor:
+            value, last_id = decode_cursor(
+                filters.cursor,
+                sort=sort,
+                date_fields=("created_at", "updated_at"),
+            )
+            operator = "gt" if direction == "asc" else "lt"
+            keyset = {"id": {operator: last_id}}
+
+            if sort != "id":
+                keyset = {
+                    "OR": [
+                        {sort: {operator: value}},
+                        {sort: value, "id": {operator: last_id}},
+                    ],
+                }
 
-        order = None
-        where = {}
+            where = {"AND": [where, keyset]}
+
+        return await self.prisma_client.property.find_many(
+            take=filters.limit,
+            skip=None if filters.cursor else filters.offset,
+            where=where,
+            order=order,
+            include=PROPERTY_INCLUDES[filters.view],
+        )
 
-        if filters.sort and filters.order:
-            order = {filters.sort: filters.order}
+    def build_filters(self, filters: PropertyQuery) -> dict:
+        """
+        Build the where clause of a property listing.
+
+        :param filters: property filters.
+        :return: where clause.
+        """
+        where = {}
 
         if filters.keyword:
-            where["name"] = {"contains": filters.keyword}
+            where["name"] = {"contains": filters.keyword, "mode": "insensitive"}
 
-        if filters.type and filters.type in (
-            "one_bedroom",
-            "two_bedroom",
-            "studio",
-            "house",
-        ):
+        if filters.type and filters.type in PROPERTY_TYPES:
             where["type"] = filters.type
 
         if filters.min_price or filters.max_price or filters.price:
@@ -85,30 +189,196 @@ class PropertyRepository:
             if filters.price:
                 where["price"] = filters.price
 
-        if filters.sort and filters.order:
-            if filters.sort in (
-                "price",
-                "created_at",
-                "updated_at",
-            ):
-                order = {filters.sort: filters.order}
+        if filters.available_from or filters.available_to:
+            # rentals overlapping the half open window, either bound may be open
+            overlapping = {"status": {"in": list(ACTIVE_RENTAL_STATUSES)}}
 
-        return await self.prisma_client.property.find_many(
-            take=filters.limit,
-            skip=filters.offset,
-            where=where,
-            order=order,
-            include={
-                "images": True,
-                "reviews": True,
-                "tenant_property": {
-                    "include": {
-                        "user": True
-                    }
-                }
-            },
+            if filters.available_to:
+                overlapping["start_date"] = {"lt": filters.available_to}
+
+            if filters.available_from:
+                overlapping["end_date"] = {"gt": filters.available_from}
+
+            where["rentals"] = {"none": overlapping}
+
+        return where
+
+    async def search(self, filters: PropertyQuery) -> list[models.Property]:
+        """
+        Search properties by relevance.
+
+        Matches the full text index over name, description, address, city and
+        state, falling back to trigram similarity for misspelled words. The
+        regular listing filters still apply.
+
+        :param filters: property filters, ``search`` holds the search terms.
+        :return: list of properties, most relevant first.
+        """
+        query, params = self.build_search_query(filters)
+        rows = await self.prisma_client.query_raw(query, *params)
+        ids = [row["id"] for row in rows]
+
+        properties = await self.prisma_client.property.find_many(
+            where={"id": {"in": ids}},
+            include=PROPERTY_INCLUDES[filters.view],
+        )
+        by_id = {data.id: data for data in properties}
+
+        return [by_id[property_id] for property_id in ids if property_id in by_id]
+
+    def build_search_query(self, filters: PropertyQuery) -> tuple[str, list]:
+        """
+        Build the ranked search query of a property listing.
+
+        :param filters: property filters.
+        :return: query and its positional parameters.
+        """
+        params = []
+        conditions = self.build_conditions(filters, params)
+        query = f"""
+            SELECT p."id"
+            FROM "properties" AS p
+            WHERE {" AND ".join(conditions)}
+            ORDER BY
+                ts_rank(p."search_vector", websearch_to_tsquery('english', $1))
+                + word_similarity($1, {SEARCH_TEXT}) DESC,
+                p."id"
+            LIMIT {bind(params, filters.limit)} OFFSET {bind(params, filters.offset)}
+        """
+
+        return query, params
+
+    def build_conditions(self, filters: PropertyQuery, params: list) -> list[str]:
+        """
+        Build the SQL conditions of a property listing.
+
+        Mirrors :meth:`build_filters` for raw queries over ``properties AS p``.
+        The search terms, when given, are always bound first as ``$1``.
+
+        :param filters: property filters.
+        :param params: positional parameters, extended in place.
+        :return: conditions to AND together.
+        """
+        conditions = ["TRUE"]
+
+        if filters.search:
+            terms = bind(params, filters.search)
+            conditions.append(
+                f"""(p."search_vector" @@ websearch_to_tsquery('english', {terms})"""
+                f" OR {terms} <% {SEARCH_TEXT})",
+            )
+
+        if filters.keyword:
+            # the keyword is matched literally, as Prisma's contains does
+            conditions.append(f'p."name" ILIKE {bind(params, contains_pattern(filters.keyword))}')
+
+        if filters.type and filters.type in PROPERTY_TYPES:
+            conditions.append(f'p."type" = {bind(params, filters.type)}::"PropertyType"')
+
+        if filters.price:
+            conditions.append(f'p."price" = {bind(params, filters.price)}')
+
+        else:
+            if filters.min_price:
+                conditions.append(f'p."price" >= {bind(params, filters.min_price)}')
+
+            if filters.max_price:
+                conditions.append(f'p."price" <= {bind(params, filters.max_price)}')
+
+        if filters.available_from or filters.available_to:
+            window = rental_window(params, filters.available_from, filters.available_to)
+            conditions.append(
+                'NOT EXISTS (SELECT 1 FROM "rentals" AS r WHERE r."property_id" = p."id"'
+                f' AND {ACTIVE_RENTAL} AND r."period" && {window})',
+            )
+
+        return conditions
+
+    async def get_facets(self, filters: PropertyQuery, price_buckets: list[int]) -> dict:
+        """
+        Count the properties matching a listing per facet in one grouped query.
+
+        :param filters: property filters.
+        :param price_buckets: ascending price boundaries.
+        :return: counts per type, city, state, occupancy and price bucket.
+        """
+        params = []
+        conditions = self.build_conditions(filters, params)
+        boundaries = ", ".join(str(float(boundary)) for boundary in price_buckets)
+        rows = await self.prisma_client.query_raw(
+            f"""
+            SELECT
+                CASE
+                    WHEN GROUPING(f."type") = 0 THEN 'type'
+                    WHEN GROUPING(f."city") = 0 THEN 'city'
+                    WHEN GROUPING(f."state") = 0 THEN 'state'
+                    WHEN GROUPING(f."occupied") = 0 THEN 'occupancy'
+                    ELSE 'price'
+                END AS "facet",
+                COALESCE(f."type", f."city", f."state", f."occupied"::text, f."bucket"::text) AS "value",
+                COUNT(*)::int AS "count"
+            FROM (
+                SELECT
+                    p."type"::text AS "type",
+                    p."city",
+                    p."state",
+                    tp."property_id" IS NOT NULL AS "occupied",
+                    width_bucket(p."price", ARRAY[{boundaries}]::double precision[]) AS "bucket"
+                FROM "properties" AS p
+                LEFT JOIN "tenant_properties" AS tp ON tp."property_id" = p."id"
+                WHERE {" AND ".join(conditions)}
+            ) AS f
+            GROUP BY GROUPING SETS ((f."type"), (f."city"), (f."state"), (f."occupied"), (f."bucket"))
+            """,
+            *params,
         )
 
+        facets = {
+            "type": {property_type: 0 for property_type in PROPERTY_TYPES},
+            "city": {},
+            "state": {},
+            "occupancy": {"occupied": 0, "vacant": 0},
+            "price": [
+                {"min": low, "max": high, "count": 0}
+                for low, high in zip([None, *price_buckets], [*price_buckets, None])
+            ],
+        }
+
+        for row in rows:
+            if row["facet"] == "occupancy":
+                facets["occupancy"]["occupied" if row["value"] == "true" else "vacant"] = row["count"]
+
+            elif row["facet"] == "price":
+                facets["price"][int(row["value"])]["count"] = row["count"]
+
+            else:
+                facets[row["facet"]][row["value"]] = row["count"]
+
+        return facets
+
+    def get_sort(self, filters: PropertyQuery) -> tuple[str, str]:
+        """
+        Get the sort column and direction of a property listing.
+
+        :param filters: property filters.
+        :return: sort column and direction.
+        """
+        sort = filters.sort if filters.sort in SORT_FIELDS else "id"
+
+        return sort, filters.order or "asc"
+
+    def get_cursor(self, filters: PropertyQuery, data: models.Property) -> str:
+        """
+        Get the cursor of the page following a property.
+
+        :param filters: property filters.
+        :param data: last property of the current page.
+        :return: cursor token.
+        """
+        sort, _ = self.get_sort(filters)
+
+        return encode_cursor(sort=sort, value=getattr(data, sort), id=data.id)
+
     async def create(self, **data) -> models.Property:
         """
         Create property.
@@ -118,17 +388,46 @@ class PropertyRepository:
         """
         return await self.prisma_client.property.create(
             data=data,
-            include={
-                "images": True,
-                "reviews": True,
-                "tenant_property": {
-                    "include": {
-                        "user": True
-                    }
-                }
-            },
+            include=PROPERTY_INCLUDES["full"],
         )
 
+    async def create_many(self, data: list[dict]) -> int:
+        """
+        Create properties in a single insert.
+
+        The insert is atomic, either every property is created or none.
+
+        :param data: property data of each property.
+        :return: number of properties created.
+        """
+        return await self.prisma_client.property.create_many(data=data)
+
+    async def iter_all(self, batch_size: int) -> AsyncIterator[list[models.Property]]:
+        """
+        Iterate over all properties in batches, ordered by id.
+
+        Each batch is a separate keyset query so only one batch is held
+        in memory at a time.
+
+        :param batch_size: properties per batch.
+        :return: async iterator of property batches.
+        """
+        last_id = 0
+
+        while True:
+            batch = await self.prisma_client.property.find_many(
+                where={"id": {"gt": last_id}},
+                order={"id": "asc"},
+                take=batch_size,
+            )
+
+            if not batch:
+                return
+
+            yield batch
+
+            last_id = batch[-1].id
+
     async def update(self, property_id: int, **kwargs) -> models.Property:
         """
         Update property.
@@ -139,16 +438,8 @@ class PropertyRepository:
         """
         return await self.prisma_client.property.update(
             where={"id": property_id},
-            data=kwargs,
-            include={
-                "images": True,
-                "reviews": True,
-                "tenant_property": {
-                    "include": {
-                        "user": True
-                    }
-                }
-            },
+            data={**kwargs, **BUMP_VERSION},
+            include=PROPERTY_INCLUDES["full"],
         )
 
     async def delete(self, property_id: int) -> models.Property:
@@ -160,15 +451,7 @@ class PropertyRepository:
         """
         return await self.prisma_client.property.delete(
             where={"id": property_id},
-            include={
-                "images": True,
-                "reviews": True,
-                "tenant_property": {
-                    "include": {
-                        "user": True
-                    }
-                }
-            },
+            include=PROPERTY_INCLUDES["full"],
         )
 
     async def get_image(self, property_id: int, image_id: int) -> models.Image:
@@ -187,22 +470,32 @@ class PropertyRepository:
             },
         )
 
-    async def add_image(self, property_id: int, url: str) -> models.Property:
+    async def add_image(
+        self,
+        property_id: int,
+        url: str,
+        variants: Optional[dict[str, str]] = None,
+    ) -> models.Property:
         """
         Add property image.
 
         :param property_id: property id.
         :param url: image url.
+        :param variants: url of each stored image variant.
         :return: Property.
         """
+        image = {"url": url}
+
+        if variants:
+            image["variants"] = Json(variants)
+
         return await self.prisma_client.property.update(
             where={"id": property_id},
             data={
                 "images": {
-                    "create": {
-                        "url": url,
-                    },
+                    "create": image,
                 },
+                **BUMP_VERSION,
             },
         )
 
@@ -213,7 +506,25 @@ class PropertyRepository:
         :param image_id: image id.
         :return: Property.
         """
-        return await self.prisma_client.image.delete(where={"id": image_id})
+        async with self.prisma_client.tx() as transaction:
+            image = await transaction.image.delete(where={"id": image_id})
+
+            if image:
+                await transaction.property.update(
+                    where={"id": image.property_id},
+                    data=BUMP_VERSION,
+                )
+
+        return image
+
+    async def count_images_by_url(self, url: str) -> int:
+        """
+        Count the images stored at an url.
+
+        :param url: image url.
+        :return: number of images.
+        """
+        return await self.prisma_client.image.count(where={"url": url})
 
     async def get_reviews(self, property_id: int) -> list[models.Review]:
         """
@@ -247,40 +558,78 @@ class PropertyRepository:
         """
         Create a property review.
 
+        The property rating summary is updated in the same transaction.
+
         :param property_id: property id.
         :param data: review data.
         :returns: Review.
         """
-        return await self.prisma_client.review.create(
-            data={
-                "property_id": property_id,
-                **data,
-            },
-        )
+        async with self.prisma_client.tx() as transaction:
+            review = await transaction.review.create(
+                data={
+                    "property_id": property_id,
+                    **data,
+                },
+            )
+            await transaction.property.update(
+                where={"id": property_id},
+                data={**rating_delta((review.rating, 1)), **BUMP_VERSION},
+            )
+
+        return review
 
     async def update_review(self, review_id: int, **data) -> models.Review:
         """
         Update a property review.
 
+        The property rating summary is updated in the same transaction.
+
         :param review_id: property id.
         :param data: review data.
         :returns: Review.
         """
-        return await self.prisma_client.review.update(
-            where={"id": review_id},
-            data=data,
-        )
+        async with self.prisma_client.tx() as transaction:
+            # concurrent edits wait, so each one moves the rating it replaced
+            await transaction.query_raw(
+                'SELECT "id" FROM "reviews" WHERE "id" = $1 FOR UPDATE',
+                review_id,
+            )
+            old = await transaction.review.find_unique(where={"id": review_id})
+            review = await transaction.review.update(
+                where={"id": review_id},
+                data=data,
+            )
+
+            if old and review:
+                await transaction.property.update(
+                    where={"id": review.property_id},
+                    data={
+                        **rating_delta((old.rating, -1), (review.rating, 1)),
+                        **BUMP_VERSION,
+                    },
+                )
 
-    async def delete_review(self, property_id: int) -> models.Review:
+        return review
+
+    async def delete_review(self, review_id: int) -> models.Review:
         """
         Delete a property review.
 
-        :param property_id: property id.
+        The property rating summary is updated in the same transaction.
+
+        :param review_id: review id.
         :returns: Review.
         """
-        return await self.prisma_client.review.delete(
-            where={"property_id": property_id}
-        )
+        async with self.prisma_client.tx() as transaction:
+            review = await transaction.review.delete(where={"id": review_id})
+
+            if review:
+                await transaction.property.update(
+                    where={"id": review.property_id},
+                    data={**rating_delta((review.rating, -1)), **BUMP_VERSION},
+                )
+
+        return review
 
     async def get_rentals(self, property_id: int) -> list[models.Rental]:
         """
@@ -316,6 +665,120 @@ class PropertyRepository:
             }
         )
 
+    async def get_booked_periods(
+        self,
+        property_id: int,
+        start: datetime,
+        end: datetime,
+    ) -> list[dict]:
+        """
+        Get the pending and approved rentals of a property during a date window.
+
+        :param property_id: property id.
+        :param start: window start.
+        :param end: window end.
+        :return: rental id, status and period clipped to the window, ordered by start.
+        """
+        params = [property_id]
+        window = rental_window(params, start, end)
+
+        return await self.prisma_client.query_raw(
+            f"""
+            SELECT
+                r."id",
+                r."status"::text AS "status",
+                lower(r."period" * {window}) AS "start",
+                upper(r."period" * {window}) AS "end"
+            FROM "rentals" AS r
+            WHERE r."property_id" = $1 AND {ACTIVE_RENTAL} AND r."period" && {window}
+            ORDER BY lower(r."period")
+            """,
+            *params,
+        )
+
+    async def book(
+        self,
+        property_id: int,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        amount: float,
+    ) -> Optional[models.Rental]:
+        """
+        Book a property, creating the rental and its payment together.
+
+        Runs in one transaction holding a row lock on the property, so
+        concurrent bookings of the same property are checked one at a time
+        and can never both take the same dates.
+
+        :param property_id: property id.
+        :param user_id: user id.
+        :param start_date: rental start.
+        :param end_date: rental end.
+        :param amount: payment amount.
+        :return: Rental with its payment, None if the property does not exist.
+        :raises BookingConflict: if the property is taken, already booked by
+            the user or booked during the dates.
+        """
+        params = [property_id, user_id]
+        window = rental_window(params, start_date, end_date)
+
+        async with self.prisma_client.tx(
+            max_wait=timedelta(seconds=settings.booking_tx_max_wait),
+            timeout=timedelta(seconds=settings.booking_tx_timeout),
+        ) as transaction:
+            rows = await transaction.query_raw(
+                f"""
+                SELECT
+                    EXISTS (
+                        SELECT 1 FROM "tenant_properties" AS t WHERE t."property_id" = p."id"
+                    ) AS "taken",
+                    EXISTS (
+                        SELECT 1 FROM "rentals" AS r
+                        WHERE r."property_id" = p."id" AND r."user_id" = $2
+                    ) AS "rented",
+                    EXISTS (
+                        SELECT 1 FROM "rentals" AS r
+                        WHERE r."property_id" = p."id" AND {ACTIVE_RENTAL} AND r."period" && {window}
+                    ) AS "overlaps"
+                FROM "properties" AS p
+                WHERE p."id" = $1
+                FOR UPDATE OF p
+                """,
+                *params,
+            )
+
+            if not rows:
+                return None
+
+            if rows[0]["taken"]:
+                raise BookingConflict("Property is taken")
+
+            if rows[0]["rented"]:
+                raise BookingConflict("You already have a rental")
+
+            if rows[0]["overlaps"]:
+                raise BookingConflict("Property is not available for these dates")
+
+            return await transaction.rental.create(
+                data={
+                    "property_id": property_id,
+                    "user_id": user_id,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "payment": {
+                        "create": {
+                            "user_id": user_id,
+                            "amount": amount,
+                        },
+                    },
+                },
+                include={
+                    "property": True,
+                    "payment": True,
+                },
+            )
+
     async def get_rental(self, property_id: int, user_id: int) -> models.Rental:
         """
         Get property rental.
@@ -359,22 +822,25 @@ class PropertyRepository:
             },
         )
 
-    async def accept_rental(self, rental_id: int) -> models.Rental:
+    async def accept_rental(self, rental_id: int) -> bool:
         """
-        Delete a property rental.
+        Approve a property rental still holding its dates.
 
         :param rental_id: rental id.
-        :returns: Rental.
+        :returns: False if the rental expired or was canceled or declined.
         """
-        return await self.prisma_client.rental.update(
+        count = await self.prisma_client.rental.update_many(
             where={
                 "id": rental_id,
+                "status": {"in": list(ACTIVE_RENTAL_STATUSES)},
             },
             data={
                 "status": "approved"
             }
         )
 
+        return count > 0
+
     async def decline_rental(self, rental_id: int) -> models.Rental:
         """Decline a rental.
 
@@ -391,6 +857,100 @@ class PropertyRepository:
             }
         )
 
+    async def expire_pending_rentals(
+        self,
+        created_before: datetime,
+        starting_before: datetime,
+        limit: int,
+    ) -> list[dict]:
+        """
+        Expire a batch of stale pending rentals in one statement.
+
+        A pending rental is stale once it was requested before
+        ``created_before`` or its start date has passed. Its pending payment
+        is declined in the same statement. Rows locked by a concurrent sweep
+        are skipped.
+
+        :param created_before: expire rentals requested before this date.
+        :param starting_before: expire rentals starting before this date.
+        :param limit: maximum rentals expired.
+        :return: id, user id, property id and property name of each rental.
+        """
+        return await self.prisma_client.query_raw(
+            """
+            WITH batch AS (
+                SELECT r."id" FROM "rentals" AS r
+                WHERE r."status" = 'pending'
+                    AND (r."created_at" < $1::timestamp OR r."start_date" < $2::timestamp)
+                ORDER BY r."id"
+                LIMIT $3
+                FOR UPDATE SKIP LOCKED
+            ),
+            expired AS (
+                UPDATE "rentals" AS r SET "status" = 'expired', "updated_at" = $2::timestamp
+                FROM batch, "properties" AS p
+                WHERE r."id" = batch."id" AND p."id" = r."property_id"
+                RETURNING r."id", r."user_id", r."property_id", p."name" AS "property_name"
+            ),
+            declined AS (
+                UPDATE "payments" AS pay SET "status" = 'declined', "updated_at" = $2::timestamp
+                FROM expired
+                WHERE pay."rental_id" = expired."id" AND pay."status" = 'pending'
+            )
+            SELECT * FROM expired
+            """,
+            utc(created_before).isoformat(),
+            utc(starting_before).isoformat(),
+            limit,
+        )
+
+    async def release_ended_tenancies(self, ended_before: datetime, limit: int) -> list[dict]:
+        """
+        Release a batch of tenancies whose rentals have all ended, in one statement.
+
+        A tenancy ends once none of the tenant's approved rentals of the
+        property ends after ``ended_before``. Released properties get their
+        version bumped. Rows locked by a concurrent sweep are skipped.
+
+        :param ended_before: release tenancies ended before this date.
+        :param limit: maximum tenancies released.
+        :return: user id, property id and property name of each tenancy.
+        """
+        return await self.prisma_client.query_raw(
+            """
+            WITH batch AS (
+                SELECT t."id" FROM "tenant_properties" AS t
+                WHERE EXISTS (
+                    SELECT 1 FROM "rentals" AS r
+                    WHERE r."property_id" = t."property_id" AND r."user_id" = t."user_id"
+                        AND r."status" = 'approved'
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM "rentals" AS r
+                    WHERE r."property_id" = t."property_id" AND r."user_id" = t."user_id"
+                        AND r."status" = 'approved' AND r."end_date" >= $1::timestamp
+                )
+                ORDER BY t."id"
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            ),
+            released AS (
+                DELETE FROM "tenant_properties" AS t USING batch
+                WHERE t."id" = batch."id"
+                RETURNING t."user_id", t."property_id"
+            ),
+            bumped AS (
+                UPDATE "properties" AS p SET "version" = p."version" + 1
+                FROM released WHERE p."id" = released."property_id"
+                RETURNING p."id", p."name"
+            )
+            SELECT released."user_id", released."property_id", bumped."name" AS "property_name"
+            FROM released JOIN bumped ON bumped."id" = released."property_id"
+            """,
+            utc(ended_before).isoformat(),
+            limit,
+        )
+
     async def add_tenant(self, property_id: int, user_id: int) -> models.User:
         """
         Add tenant to property.
@@ -399,12 +959,19 @@ class PropertyRepository:
         :param user_id: user id.
         :return: User.
         """
-        return await self.prisma_client.tenantproperty.create(
-            data={
-                "property_id": property_id,
-                "user_id": user_id,
-            }
-        )
+        async with self.prisma_client.tx() as transaction:
+            tenant = await transaction.tenantproperty.create(
+                data={
+                    "property_id": property_id,
+                    "user_id": user_id,
+                }
+            )
+            await transaction.property.update(
+                where={"id": property_id},
+                data=BUMP_VERSION,
+            )
+
+        return tenant
 
     async def remove_tenant(self, property_id: int, user_id: int) -> models.TenantProperty:
         """
@@ -414,11 +981,18 @@ class PropertyRepository:
         :param user_id: user id.
         :return: User.
         """
-        return await self.prisma_client.tenantproperty.delete(
-            where={
-                "property_id": property_id,
-            }
-        )
+        async with self.prisma_client.tx() as transaction:
+            tenant = await transaction.tenantproperty.delete(
+                where={
+                    "property_id": property_id,
+                }
+            )
+            await transaction.property.update(
+                where={"id": property_id},
+                data=BUMP_VERSION,
+            )
+
+        return tenant
 
     async def get_tenant(self, property_id: int) -> models.TenantProperty:
         """
@@ -434,55 +1008,176 @@ class PropertyRepository:
 
         return data
 
-    async def get_ratings(self, property_id: int) -> int:
+    async def get_ratings(self, property_id: int) -> float:
         """
         Get property star ratings.
 
         :param property_id: property id.
         :return: star ratings.
         """
+        data = await self.prisma_client.property.find_unique(where={"id": property_id})
 
-        count = await self.prisma_client.review.count(
-            where={
-                "property_id": property_id,
-            }
-        )
+        if not data:
+            return 0
 
-        one = await self.prisma_client.review.count(
-            where={
-                "property_id": property_id,
-                "rating": 1,
-            }
-        )
+        return rating_summary(data)["average"]
 
-        two = await self.prisma_client.review.count(
-            where={
-                "property_id": property_id,
-                "rating": 2,
-            }
-        )
+    async def get_ratings_many(self, property_ids: list[int]) -> dict[int, dict]:
+        """
+        Get star ratings of several properties in a single grouped query.
 
-        three = await self.prisma_client.review.count(
-            where={
-                "property_id": property_id,
-                "rating": 3,
-            }
-        )
+        This aggregates the reviews table directly and is used to check and
+        rebuild the summary stored on each property.
 
-        four = await self.prisma_client.review.count(
-            where={
-                "property_id": property_id,
-                "rating": 4,
+        :param property_ids: property ids.
+        :return: average, count and 1-5 histogram keyed by property id.
+        """
+        ratings = {
+            property_id: {
+                "average": 0,
+                "count": 0,
+                "histogram": {star: 0 for star in RATING_STARS},
             }
-        )
+            for property_id in property_ids
+        }
 
-        five = await self.prisma_client.review.count(
-            where={
-                "property_id": property_id,
-                "rating": 5,
-            }
+        if not property_ids:
+            return ratings
+
+        groups = await self.prisma_client.review.group_by(
+            by=["property_id", "rating"],
+            where={"property_id": {"in": property_ids}},
+            count=True,
         )
 
-        if count:
-            return ((one * 1) + (two * 2) + (three * 3) + (four * 4) + (five * 5)) / count
-        return 0
+        for group in groups:
+            summary = ratings[group["property_id"]]
+            count = group["_count"]["_all"]
+
+            if group["rating"] in summary["histogram"]:
+                summary["histogram"][group["rating"]] += count
+
+        for summary in ratings.values():
+            histogram = summary["histogram"]
+            summary["count"] = sum(histogram.values())
+
+            if summary["count"]:
+                summary["average"] = sum(
+                    star * count for star, count in histogram.items()
+                ) / summary["count"]
+
+        return ratings
+
+    async def rebuild_ratings(self) -> int:
+        """
+        Recompute the stored rating summary of every property from its reviews.
+
+        :return: number of properties updated.
+        """
+        return await self.prisma_client.execute_raw(REBUILD_RATINGS_QUERY)
+
+    async def check_ratings(self) -> list[dict]:
+        """
+        Compare the stored rating summaries with a live aggregate of reviews.
+
+        :return: properties whose stored summary is out of date.
+        """
+        properties = await self.prisma_client.property.find_many()
+        live = await self.get_ratings_many(property_ids=[data.id for data in properties])
+        mismatches = []
+
+        for data in properties:
+            stored = rating_summary(data)
+
+            if stored != live[data.id]:
+                mismatches.append({
+                    "property_id": data.id,
+                    "stored": stored,
+                    "live": live[data.id],
+                })
+
+        return mismatches
+
+
+def bind(params: list, value) -> str:
+    """
+    Add a positional parameter to a raw query.
+
+    :param params: positional parameters, extended in place.
+    :param value: parameter value.
+    :return: placeholder of the parameter.
+    """
+    params.append(value)
+
+    return f"${len(params)}"
+
+
+def contains_pattern(text: str) -> str:
+    """
+    Build a LIKE pattern matching values containing a text.
+
+    :param text: text to look for, its ``%`` and ``_`` are not wildcards.
+    :return: pattern, escaped with the default backslash escape character.
+    """
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    return f"%{escaped}%"
+
+
+def rental_window(
+    params: list,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> str:
+    """
+    Bind a half open date window compared against rental periods.
+
+    :param params: positional parameters, extended in place.
+    :param start: window start, None for no lower bound.
+    :param end: window end, None for no upper bound.
+    :return: range expression.
+    """
+    return "tsrange({}::timestamp, {}::timestamp, '[)')".format(
+        bind(params, utc(start).isoformat()) if start else "NULL",
+        bind(params, utc(end).isoformat()) if end else "NULL",
+    )
+
+
+def rating_delta(*changes: tuple[int, int]) -> dict:
+    """
+    Build the property update applying reviews to the rating summary.
+
+    Ratings outside 1-5 are left out of the summary, as when it is rebuilt.
+
+    :param changes: review rating and step, 1 when the review is added,
+        -1 when it is removed.
+    :return: property update data.
+    """
+    increments = {}
+
+    for rating, step in changes:
+        if rating not in RATING_STARS:
+            continue
+
+        for field, value in (
+            ("review_count", step),
+            ("rating_sum", rating * step),
+            (f"rating_{rating}", step),
+        ):
+            increments[field] = increments.get(field, 0) + value
+
+    return {field: {"increment": value} for field, value in increments.items() if value}
+
+
+def rating_summary(data: models.Property) -> dict:
+    """
+    Read the rating summary stored on a property.
+
+    :param data: property.
+    :return: average, count and 1-5 histogram.
+    """
+    return {
+        "average": data.rating_sum / data.review_count if data.review_count else 0,
+        "count": data.review_count,
+        "histogram": {star: getattr(data, f"rating_{star}") for star in RATING_STARS},
+    }
@@ -1,12 +1,17 @@
 from datetime import datetime
+from typing import Optional
 
 from prisma import enums, models
 
+from ..utils.cache import principal_cache
 from ..utils.prisma import get_db_session
+from ..utils.revenue import REVENUE_STATUS
+from .payment import PaymentRepository
 
 
 class UserRepository:
     prisma_client = get_db_session()
+    payment_repo = PaymentRepository()
 
     async def get_by_id(self, user_id: int) -> models.User:
         """
@@ -42,28 +47,129 @@ class UserRepository:
         """
         return await self.prisma_client.user.create(data=data)
 
+    async def get_principal(self, user_id: int) -> Optional[dict]:
+        """
+        Get the fields authentication and the profile need of a user, cached.
+
+        :param user_id: user id.
+        :return: id, email, admin flag, token version and profile fields,
+            None if the user does not exist.
+        """
+        key = principal_cache.key("principal", user_id)
+        principal = await principal_cache.get(key)
+
+        if principal is not None:
+            return principal
+
+        tag = f"user:{user_id}"
+        generation = await principal_cache.generation(tag)
+        user = await self.prisma_client.user.find_unique(where={"id": user_id})
+
+        if not user:
+            return None
+
+        principal = {
+            "id": user.id,
+            "email": user.email,
+            "is_admin": user.admin,
+            "token_version": user.token_version,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "phone_number": user.phone_number,
+            "created_at": user.created_at,
+            "updated_at": user.updated_at,
+        }
+        await principal_cache.set(key, principal, tags=[tag], generation=generation)
+
+        return principal
+
+    async def invalidate_principal(self, user_id: int) -> None:
+        """
+        Drop the cached principal of a user.
+
+        :param user_id: user id.
+        """
+        await principal_cache.invalidate(f"user:{user_id}")
+
     async def update(self, user_id: int, **data) -> models.User:
         """
         Update user.
 
+        Changing the admin flag revokes the access tokens issued before.
+        The cached principal is dropped, it carries ``updated_at``.
+
         :param user_id: user id.
         :param data: user data.
         :return: User.
         """
+        if "admin" in data:
+            data.setdefault("token_version", {"increment": 1})
 
-        return await self.prisma_client.user.update(
+        user = await self.prisma_client.user.update(
             where={"id": user_id},
             data=data,
         )
 
+        await self.invalidate_principal(user_id)
+
+        return user
+
+    async def revoke_tokens(self, user_id: int, **data) -> models.User:
+        """
+        Update user, revoking the access and refresh tokens issued before.
+
+        :param user_id: user id.
+        :param data: user data.
+        :return: User.
+        """
+        async with self.prisma_client.tx() as transaction:
+            user = await transaction.user.update(
+                where={"id": user_id},
+                data={**data, "token_version": {"increment": 1}},
+            )
+            await transaction.refreshtoken.delete_many(where={"user_id": user_id})
+
+        await self.invalidate_principal(user_id)
+
+        return user
+
     async def delete(self, user_id: int) -> models.User:
         """
-        Delete user.
+        Delete user along with their rentals and payments.
 
         :param user_id: user id.
         :return: User.
         """
-        return await self.prisma_client.user.delete(where={"id": user_id})
+        async with self.prisma_client.tx() as transaction:
+            # rentals first, in id order, as the other payment transitions lock them
+            await transaction.query_raw(
+                """
+                SELECT pay."id" FROM "payments" AS pay
+                JOIN "rentals" AS r ON r."id" = pay."rental_id"
+                WHERE pay."user_id" = $1 OR r."user_id" = $1
+                ORDER BY r."id"
+                FOR UPDATE OF r, pay
+                """,
+                user_id,
+            )
+            # the cascade deletes the user's paid payments, which leave the revenue rollup
+            payments = await transaction.payment.find_many(
+                where={
+                    "status": REVENUE_STATUS,
+                    "OR": [{"user_id": user_id}, {"rental": {"is": {"user_id": user_id}}}],
+                },
+                include={"rental": True},
+            )
+            months = await self.payment_repo.apply_revenue(
+                transaction,
+                changes=[(payment, -1) for payment in payments],
+            )
+            user = await transaction.user.delete(where={"id": user_id})
+
+        await self.payment_repo.invalidate_revenue(months)
+        await self.invalidate_principal(user_id)
+
+        return user
 
     async def get_reviews(self, user_id: int) -> list[models.Review]:
         """
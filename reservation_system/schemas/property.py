@@ -8,6 +8,7 @@ from .user import User
 class PropertyImage(CamelBaseModel):
     id: int
     url: str
+    variants: Optional[dict[str, str]] = None
     created_at: datetime
     updated_at: datetime
 
@@ -35,6 +36,8 @@ class Property(CamelBaseModel):
     zip: str
     occupied: bool = False
     ratings: float
+    ratings_count: int = 0
+    ratings_histogram: dict[int, int] = {}
     created_at: datetime
     updated_at: datetime
     images: list[PropertyImage]
@@ -42,6 +45,22 @@ class Property(CamelBaseModel):
     tenant: Optional[User]
 
 
+class PropertySummary(CamelBaseModel):
+    id: int
+    name: str
+    price: int
+    type: str
+    city: str
+    state: str
+    occupied: bool = False
+    ratings: float
+    ratings_count: int = 0
+    thumbnail: Optional[str] = None
+
+
+PROPERTY_SUMMARY_FIELDS = {"id", "name", "price", "type", "city", "state"}
+
+
 class PropertyBasic(CamelBaseModel):
     id: int
     name: str
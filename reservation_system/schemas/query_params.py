@@ -1,19 +1,79 @@
-from typing import Optional
+from datetime import date, datetime
+from typing import Literal, Optional
 
 from fastapi import Query
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+from ..settings import settings
+from ..utils.response import Response
+
+
+PropertyView = Literal["summary", "full"]
+
+PaymentStatus = Literal["pending", "paid", "declined"]
+
+Granularity = Literal["day", "week", "month", "quarter"]
 
 
 class CommonQuery(BaseModel):
-    limit: int = 100
+    limit: int = Query(default=100, ge=1)
     offset: int = Query(default=0, ge=0)
+    cursor: Optional[str] = Query(default=None)
 
 
 class PropertyQuery(CommonQuery):
     keyword: Optional[str] = Query(default=None)
+    search: Optional[str] = Query(default=None, min_length=1)
     min_price: int = Query(default=0, ge=0)
     max_price: Optional[int] = Query(default=None, ge=0)
     price: Optional[int] = Query(default=None, ge=0)
     sort: Optional[str] = Query(default=None)
     type: Optional[str] = Query(default=None)
     order: Optional[str] = Query(default=None, regex="^(asc|desc)$")
+    view: PropertyView = Query(default="full")
+    available_from: Optional[datetime] = Query(default=None)
+    available_to: Optional[datetime] = Query(default=None)
+
+
+class AvailabilityQuery(BaseModel):
+    start: Optional[datetime] = Query(default=None)
+    end: Optional[datetime] = Query(default=None)
+
+
+class PaymentQuery(CommonQuery):
+    status: Optional[PaymentStatus] = Query(default=None)
+    type: Optional[Literal["cash", "ewallet"]] = Query(default=None)
+    user_id: Optional[int] = Query(default=None)
+    property_id: Optional[int] = Query(default=None)
+    date_from: Optional[datetime] = Query(default=None)
+    date_to: Optional[datetime] = Query(default=None)
+    order: Literal["asc", "desc"] = Query(default="desc")
+
+
+class AnalyticsPeriodQuery(BaseModel):
+    date_from: date = Query()
+    date_to: date = Query()
+
+    @model_validator(mode="after")
+    def check_period(self) -> "AnalyticsPeriodQuery":
+        # raised as HTTP errors, a ValueError of a query dependency is not
+        # turned into a validation response
+        if self.date_to < self.date_from:
+            raise Response.bad_request(message="date_to must not be before date_from")
+
+        days = (self.date_to - self.date_from).days + 1
+
+        if days > settings.analytics_max_days:
+            raise Response.bad_request(
+                message=f"Range spans {days} days [max: {settings.analytics_max_days}]",
+            )
+
+        return self
+
+
+class RevenueSeriesQuery(AnalyticsPeriodQuery):
+    granularity: Granularity = Query(default="month")
+
+
+class OccupancyQuery(AnalyticsPeriodQuery):
+    city: Optional[str] = Query(default=None)
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import EmailStr
+from pydantic import EmailStr, Field, model_validator
 
 from ..utils.base_schema import CamelBaseModel
 
@@ -71,12 +71,12 @@ class PropertyUpdate(CamelBaseModel):
 
 
 class ReviewCreate(CamelBaseModel):
-    rating: int
+    rating: int = Field(ge=1, le=5)
     comment: str
 
 
 class ReviewUpdate(CamelBaseModel):
-    rating: int = None
+    rating: int = Field(default=None, ge=1, le=5)
     comment: str = None
 
 
@@ -86,7 +86,20 @@ class RentalCreate(CamelBaseModel):
     payment_type: str
     amount: float
 
+    @model_validator(mode="after")
+    def check_dates(self) -> "RentalCreate":
+        if self.end_date <= self.start_date:
+            raise ValueError("end_date must be after start_date")
+
+        return self
+
 
 # Tenant Schemas
 class Notify(CamelBaseModel):
     message: str
+
+
+# Payment Schemas
+class PaymentBulkUpdate(CamelBaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+    status: Literal["paid", "declined"]
@@ -28,3 +28,15 @@ class Response(BaseModel):
     success: bool = True
     message: str
     data: Optional[list | dict] = None
+
+
+class PaginatedResponse(Response):
+    """Response schema for cursor paginated listings."""
+
+    next_cursor: Optional[str] = None
+
+
+class TotalsPaginatedResponse(PaginatedResponse):
+    """Response schema for paginated listings summarizing the whole filtered set."""
+
+    totals: dict
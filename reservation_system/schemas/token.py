@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from ..utils.base_schema import CamelBaseModel
 
 
@@ -6,3 +9,23 @@ class JWTData(CamelBaseModel):
     email: str
     is_admin: bool
     exp: int
+    # token version of the user when the token was issued
+    ver: Optional[int] = None
+
+
+class Principal(CamelBaseModel):
+    """
+    Authenticated user behind a token, attached to the request as ``request.state.user``.
+
+    The profile fields are unset when the principal was read from a stateless token.
+    """
+
+    id: int
+    email: str
+    is_admin: bool
+    token_version: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -51,10 +51,83 @@ class Settings(BaseSettings):
 
     # Thumbsnap
     thumbsnap_secret: str
+    thumbsnap_url: str = "https://thumbsnap.com/api/upload"
+
+    # Image uploads
+    image_max_bytes: int = 10 * 1024 * 1024
+    image_upload_timeout: float = 30
+    image_upload_retries: int = 3
+    image_upload_backoff: float = 0.5
+    image_upload_connections: int = 10
+
+    # Image storage, "thumbsnap" or "filesystem"
+    image_storage: str = "thumbsnap"
+    image_storage_path: Path = TEMP_DIR / "reservation_system_images"
+    image_storage_url: str = "/api/images"
+    # processes resizing images for the filesystem storage
+    image_workers: int = 2
+
+    # days shown by the availability calendar when no end is given
+    availability_window_days: int = 90
+    # Rental sweeper, expires stale pending rentals and ends finished tenancies
+    # seconds between sweeps, 0 disables the sweeper
+    rental_sweep_interval: int = 15 * 60
+    # hours a rental may stay pending before it expires
+    rental_pending_ttl_hours: int = 72
+    # rows updated per statement
+    rental_sweep_batch_size: int = 500
+
+    # seconds a booking waits for a connection and may hold the property lock
+    booking_tx_max_wait: float = 10
+    booking_tx_timeout: float = 10
+
+    # Bulk property import and export
+    bulk_batch_size: int = 500
+    # rows reported back with their errors, the rest are only counted
+    bulk_max_errors: int = 1000
+
+    # seconds the user behind a token is cached, changes to it invalidate the entry
+    auth_principal_ttl: int = 30
+    # trust the claims of tokens carrying a version without looking the user up,
+    # revoked access tokens then stay valid until they expire
+    auth_stateless_tokens: bool = False
+
+    # bcrypt cost factor, stored hashes of another cost are redone on login
+    password_hash_rounds: int = 12
+    # threads hashing passwords, bcrypt releases the GIL
+    password_hash_workers: int = 4
+    # hashes waiting for a thread before new ones are rejected with 503
+    password_hash_queue: int = 64
 
     # Frontend URL
     frontend_url: str = "http://localhost:3000"
 
+    # Response cache, "memory" is per process, use "redis" with several workers
+    cache_backend: str = "memory"
+    cache_ttl: int = 60
+    cache_max_entries: int = 1024
+    cache_redis_url: str = "redis://localhost:6379/0"
+
+    # Idempotency-Key responses, kept in the cache backend
+    idempotency_ttl: int = 24 * 60 * 60
+    idempotency_max_keys: int = 10000
+    # requests or responses larger than this are not stored and can not be replayed
+    idempotency_max_body: int = 64 * 1024
+
+    # days an analytics date range may span
+    analytics_max_days: int = 5 * 366
+    # buckets a revenue time series may span
+    analytics_max_buckets: int = 400
+    # seconds analytics of the current period are cached, closed periods are
+    # kept until a payment of theirs changes
+    analytics_cache_ttl: int = 60
+
+    # days between a payment and its bank transaction for them to match
+    reconcile_date_window_days: int = 3
+
+    # Upper bounds of the property price facet buckets
+    facet_price_buckets: list[int] = [5000, 10000, 20000, 50000]
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
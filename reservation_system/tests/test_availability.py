@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pydantic import ValidationError
+
+from reservation_system.schemas.request import RentalCreate
+from reservation_system.utils.availability import free_periods, parse_timestamp, utc
+
+START = datetime(2026, 1, 1)
+
+
+def day(offset: int) -> datetime:
+    return START + timedelta(days=offset)
+
+
+def test_free_periods_between_bookings() -> None:
+    """Free periods fill the gaps around booked periods."""
+    booked = [(day(2), day(5)), (day(4), day(7)), (day(7), day(9))]
+
+    assert free_periods(day(0), day(10), booked) == [(day(0), day(2)), (day(9), day(10))]
+
+
+def test_free_periods_fully_booked() -> None:
+    """A window covered by bookings has no free periods."""
+    assert free_periods(day(0), day(10), [(day(0), day(10))]) == []
+    assert free_periods(day(0), day(10), []) == [(day(0), day(10))]
+
+
+def test_timestamps_are_normalized_to_naive_utc() -> None:
+    """Aware datetimes and raw query strings compare with stored dates."""
+    aware = datetime(2026, 1, 1, 8, tzinfo=timezone(timedelta(hours=8)))
+
+    assert utc(aware) == START
+    assert parse_timestamp("2026-01-01T00:00:00.000Z") == START
+    assert parse_timestamp(START) == START
+
+
+def test_rental_dates_must_be_ordered() -> None:
+    """Rentals ending before they start are rejected."""
+    with pytest.raises(ValidationError):
+        RentalCreate(start_date=day(2), end_date=day(1), payment_type="cash", amount=1)
@@ -0,0 +1,104 @@
+import csv
+import io
+
+from reservation_system.schemas.request import PropertyCreate
+from reservation_system.utils.bulk import (
+    detect_format,
+    dump_rows,
+    iter_chunks,
+    iter_rows,
+    row_error,
+    validate_row,
+)
+
+EXPORT_FIELDS = ["id", *PropertyCreate.model_fields, "created_at", "updated_at"]
+
+ROW = {
+    "name": "Unit 1",
+    "description": "Corner unit",
+    "address": "1 Main St",
+    "city": "Springfield",
+    "state": "IL",
+    "zip": "62701",
+    "type": "studio",
+    "price": "1200",
+}
+
+
+def test_detect_format() -> None:
+    """The format is detected from the file name or content type."""
+    assert detect_format("units.ndjson", None) == "ndjson"
+    assert detect_format("units.CSV", None) == "csv"
+    assert detect_format("upload", "text/csv") == "csv"
+    assert detect_format("units.xlsx", "application/octet-stream") is None
+
+
+def test_iter_rows_ndjson_reports_bad_lines() -> None:
+    """Malformed lines are yielded as errors with their line number."""
+    file = io.BytesIO(b'{"name": "a"}\n\n{oops\n{"name": "b"}\n')
+    rows = list(iter_rows(file, "ndjson"))
+
+    assert [line for line, _ in rows] == [1, 3, 4]
+    assert isinstance(rows[1][1], ValueError)
+    assert rows[2][1] == {"name": "b"}
+
+
+def test_iter_rows_csv() -> None:
+    """CSV rows are keyed by header, empty cells are dropped."""
+    file = io.BytesIO("﻿name,price,zip\nUnit,100,\n".encode())
+
+    assert list(iter_rows(file, "csv")) == [(2, {"name": "Unit", "price": "100"})]
+
+
+def test_iter_rows_reports_undecodable_lines() -> None:
+    """NDJSON lines that are not UTF-8 are reported, the rest still parsed."""
+    file = io.BytesIO(b'{"name": "a"}\n{"name": "\xff"}\n{"name": "b"}\n')
+    rows = list(iter_rows(file, "ndjson"))
+
+    assert [line for line, _ in rows] == [1, 2, 3]
+    assert row_error(rows[1][1]) == "Invalid UTF-8: invalid start byte"
+    assert rows[2][1] == {"name": "b"}
+
+
+def test_iter_rows_stops_at_malformed_csv() -> None:
+    """A CSV record that can not be read ends the file with an error row."""
+    file = io.BytesIO(b"name,price\nUnit,100\n\xff,1\nUnit 2,200\n")
+    rows = list(iter_rows(file, "csv"))
+
+    assert rows[0] == (2, {"name": "Unit", "price": "100"})
+    assert len(rows) == 2
+    assert rows[1][0] == 3
+    assert validate_row(rows[1][1], PropertyCreate) == (
+        None,
+        ["Invalid CSV, rest of the file skipped: not UTF-8, invalid start byte"],
+    )
+
+    oversized = io.BytesIO(b"name\n" + b"x" * (csv.field_size_limit() + 1) + b"\n")
+
+    assert row_error(list(iter_rows(oversized, "csv"))[0][1]).startswith("Invalid CSV, rest of the file skipped")
+
+
+def test_iter_chunks() -> None:
+    """Rows are grouped into chunks of at most the given size."""
+    assert list(iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_validate_row() -> None:
+    """Rows are validated against the schema, problems are listed per field."""
+    data, problems = validate_row(ROW, PropertyCreate)
+    assert problems == []
+    assert data.price == 1200
+
+    assert validate_row({"name": "x"}, PropertyCreate)[1][0] == "description: Field required"
+    assert validate_row(ValueError("bad"), PropertyCreate) == (None, ["Invalid JSON: bad"])
+    assert validate_row([1], PropertyCreate) == (None, ["Row must be an object"])
+
+
+def test_export_round_trips_through_import() -> None:
+    """Exported CSV rows are accepted by the import."""
+    row = {"id": 1, **ROW, "created_at": "2026-01-01", "updated_at": "2026-01-01"}
+    dumped = dump_rows([row], "csv", EXPORT_FIELDS, header=True)
+    rows = list(iter_rows(io.BytesIO(dumped.encode()), "csv"))
+
+    assert validate_row(rows[0][1], PropertyCreate)[1] == []
+    assert dump_rows([row], "ndjson", EXPORT_FIELDS, header=False).count("\n") == 1
@@ -0,0 +1,114 @@
+import pytest
+
+from reservation_system.utils.cache import ANY_TAG, MemoryCache
+
+
+@pytest.mark.anyio
+async def test_memory_cache_hit_and_miss() -> None:
+    """Checks that cached values are returned and lookups are counted."""
+    cache = MemoryCache(namespace="test", ttl=60, max_entries=10)
+
+    assert await cache.get("key") is None
+
+    await cache.set("key", {"value": 1})
+
+    assert await cache.get("key") == {"value": 1}
+
+    stats = await cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.anyio
+async def test_memory_cache_evicts_least_recently_used() -> None:
+    """Checks that the least recently used entry is evicted first."""
+    cache = MemoryCache(namespace="test", ttl=60, max_entries=2)
+
+    await cache.set("first", 1)
+    await cache.set("second", 2)
+    await cache.get("first")
+    await cache.set("third", 3)
+
+    assert await cache.get("first") == 1
+    assert await cache.get("second") is None
+    assert await cache.get("third") == 3
+
+
+@pytest.mark.anyio
+async def test_memory_cache_expires_entries() -> None:
+    """Checks that entries are dropped once their ttl elapses."""
+    cache = MemoryCache(namespace="test", ttl=0, max_entries=10)
+
+    await cache.set("key", 1)
+
+    assert await cache.get("key") is None
+
+
+@pytest.mark.anyio
+async def test_memory_cache_invalidates_by_tag() -> None:
+    """Checks that invalidating a tag only drops the entries carrying it."""
+    cache = MemoryCache(namespace="test", ttl=60, max_entries=10)
+
+    await cache.set("detail", 1, tags=["property:1"])
+    await cache.set("listing", 2, tags=["properties", "property:1", "property:2"])
+    await cache.set("other", 3, tags=["property:3"])
+    await cache.invalidate("property:1")
+
+    assert await cache.get("detail") is None
+    assert await cache.get("listing") is None
+    assert await cache.get("other") == 3
+
+
+@pytest.mark.anyio
+async def test_memory_cache_keeps_persistent_entries() -> None:
+    """Checks that persistent entries outlive the ttl until invalidated."""
+    cache = MemoryCache(namespace="test", ttl=0, max_entries=10)
+
+    await cache.set("closed", 1, tags=["revenue:2026-01"], persistent=True)
+    await cache.set("current", 2, tags=["revenue:2026-02"])
+
+    assert await cache.get("closed") == 1
+    assert await cache.get("current") is None
+    assert (await cache.stats())["persistent_entries"] == 1
+
+    await cache.invalidate("revenue:2026-01")
+
+    assert await cache.get("closed") is None
+
+
+@pytest.mark.anyio
+async def test_memory_cache_skips_values_computed_across_an_invalidation() -> None:
+    """Checks that a value is not stored once its tags were invalidated or the cache cleared."""
+    cache = MemoryCache(namespace="test", ttl=60, max_entries=10)
+
+    generation = await cache.generation("revenue:2026-01")
+    await cache.invalidate("revenue:2026-01")
+    await cache.set("stale", 1, tags=["revenue:2026-01"], persistent=True, generation=generation)
+
+    generation = await cache.generation("revenue:2026-02")
+    await cache.invalidate("revenue:2026-01")
+    await cache.set("fresh", 2, tags=["revenue:2026-02"], generation=generation)
+
+    assert await cache.get("stale") is None
+    assert await cache.get("fresh") == 2
+
+    cleared = await cache.generation("revenue:2026-02")
+    await cache.clear()
+    await cache.set("cleared", 3, tags=["revenue:2026-02"], generation=cleared)
+
+    assert await cache.get("cleared") is None
+
+
+@pytest.mark.anyio
+async def test_memory_cache_any_tag_moves_with_every_invalidation() -> None:
+    """Checks that a value whose tags are only known once computed is not stored stale."""
+    cache = MemoryCache(namespace="test", ttl=60, max_entries=10)
+
+    generation = await cache.generation(ANY_TAG)
+    await cache.invalidate("property:7")
+    await cache.set("listing", 1, tags=["properties", "property:7"], generation=generation)
+
+    generation = await cache.generation(ANY_TAG)
+    await cache.set("listing", 2, tags=["properties", "property:7"], generation=generation)
+
+    assert await cache.get("listing") == 2
@@ -0,0 +1,29 @@
+from starlette import status
+
+from reservation_system.utils.etag import conditional_response, etag_matches, make_etag
+
+
+def test_etag_matches() -> None:
+    """Checks If-None-Match parsing."""
+    etag = make_etag("property", 1, 3, "full")
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("property", 1, 4, "full"), etag)
+
+
+def test_conditional_response() -> None:
+    """Checks that a missing body produces an empty 304 with validators."""
+    etag = make_etag("property", 1, 3, "full")
+
+    not_modified = conditional_response(etag, None, cache_control="no-cache")
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified.headers["ETag"] == etag
+    assert not not_modified.body
+
+    response = conditional_response(etag, {"message": "ok"}, cache_control="no-cache")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Cache-Control"] == "no-cache"
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from reservation_system.settings import settings
+from reservation_system.utils import hashing
+
+
+@pytest.mark.anyio
+async def test_hash_and_check_in_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks that hashes use the configured cost and are timed."""
+    monkeypatch.setattr(settings, "password_hash_rounds", 4)
+    count = hashing.hashing_stats.operations["check"]["count"]
+
+    hashed = await hashing.hash_password("secret")
+
+    assert hashed.startswith("$2b$04$")
+    assert await hashing.check_password("secret", hashed)
+    assert not await hashing.check_password("wrong", hashed)
+    assert hashing.hashing_stats.operations["check"]["count"] == count + 2
+
+
+def test_needs_rehash(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks that hashes of another cost factor are flagged."""
+    monkeypatch.setattr(settings, "password_hash_rounds", 12)
+
+    assert not hashing.needs_rehash("$2b$12$" + "a" * 53)
+    assert hashing.needs_rehash("$2b$10$" + "a" * 53)
+    assert hashing.needs_rehash("plain")
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks that calls beyond the workers and queue get a 503."""
+    monkeypatch.setattr(settings, "password_hash_workers", 1)
+    monkeypatch.setattr(settings, "password_hash_queue", 1)
+    monkeypatch.setattr(hashing, "_pool", None)
+    release = threading.Event()
+
+    running = [
+        asyncio.ensure_future(hashing.run_in_pool("hash", release.wait))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HTTPException) as error:
+        await hashing.run_in_pool("hash", release.wait)
+
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"]
+
+    release.set()
+    await asyncio.gather(*running)
+    hashing.shutdown_hash_pool()
+
+
+@pytest.mark.anyio
+async def test_cancelled_hash_stays_in_flight(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks that a cancelled call holds its slot until the hash really ends."""
+    monkeypatch.setattr(hashing, "_pool", None)
+    release = threading.Event()
+    in_flight = hashing._in_flight
+
+    call = asyncio.ensure_future(hashing.run_in_pool("hash", release.wait))
+    await asyncio.sleep(0.05)
+    call.cancel()
+    await asyncio.sleep(0.05)
+
+    assert hashing._in_flight == in_flight + 1
+
+    release.set()
+    await asyncio.sleep(0.05)
+
+    assert hashing._in_flight == in_flight
+
+    pool = hashing.get_hash_pool()
+    hashing.shutdown_hash_pool()
+
+    assert hashing.get_hash_pool() is not pool
+    hashing.shutdown_hash_pool()
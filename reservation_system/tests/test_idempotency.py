@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from reservation_system.settings import settings
+from reservation_system.utils.cache import MemoryCache
+from reservation_system.web.idempotency import IdempotencyMiddleware
+
+
+def make_client(calls: list, delay: float = 0, status_code: int = 200) -> AsyncClient:
+    async def book(request: Request) -> JSONResponse:
+        calls.append(await request.json())
+        await asyncio.sleep(delay)
+
+        return JSONResponse({"booking": len(calls)}, status_code=status_code)
+
+    app = Starlette(routes=[Route("/book", book, methods=["POST"])])
+    store = MemoryCache(namespace="test", ttl=60, max_entries=10)
+    app = IdempotencyMiddleware(app, store=store)
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.anyio
+async def test_retries_replay_the_stored_response() -> None:
+    """Checks that a retried key replays the first response without a second call."""
+    calls = []
+    client = make_client(calls)
+    headers = {"Idempotency-Key": "abc"}
+
+    first = await client.post("/book", json={"day": 1}, headers=headers)
+    retry = await client.post("/book", json={"day": 1}, headers=headers)
+
+    assert len(calls) == 1
+    assert retry.json() == first.json() == {"booking": 1}
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+@pytest.mark.anyio
+async def test_keys_are_scoped_and_optional() -> None:
+    """Checks that requests without a key, or from other users, are not replayed."""
+    calls = []
+    client = make_client(calls)
+
+    await client.post("/book", json={"day": 1})
+    await client.post("/book", json={"day": 1})
+    await client.post("/book", json={"day": 1}, headers={"Idempotency-Key": "abc"})
+    await client.post(
+        "/book",
+        json={"day": 1},
+        headers={"Idempotency-Key": "abc", "Authorization": "Bearer other"},
+    )
+
+    assert len(calls) == 4
+
+
+@pytest.mark.anyio
+async def test_reused_key_with_other_body_is_rejected() -> None:
+    """Checks that a key can not be reused for a different request."""
+    calls = []
+    client = make_client(calls)
+    headers = {"Idempotency-Key": "abc"}
+
+    await client.post("/book", json={"day": 1}, headers=headers)
+    response = await client.post("/book", json={"day": 2}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicate_gets_conflict() -> None:
+    """Checks that a duplicate arriving mid-request is answered with 409."""
+    calls = []
+    client = make_client(calls, delay=0.1)
+    headers = {"Idempotency-Key": "abc"}
+
+    first, second = await asyncio.gather(
+        client.post("/book", json={"day": 1}, headers=headers),
+        client.post("/book", json={"day": 1}, headers=headers),
+    )
+
+    assert sorted([first.status_code, second.status_code]) == [200, 409]
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_server_errors_are_not_stored() -> None:
+    """Checks that a failed request can be retried with the same key."""
+    calls = []
+    client = make_client(calls, status_code=503)
+    headers = {"Idempotency-Key": "abc"}
+
+    await client.post("/book", json={"day": 1}, headers=headers)
+    await client.post("/book", json={"day": 1}, headers=headers)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.anyio
+async def test_cancelled_request_releases_its_key() -> None:
+    """Checks that a key can be retried once the request holding it is cancelled."""
+    calls = []
+    client = make_client(calls, delay=0.2)
+    headers = {"Idempotency-Key": "abc"}
+
+    first = asyncio.ensure_future(client.post("/book", json={"day": 1}, headers=headers))
+    await asyncio.sleep(0.05)
+    first.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    retry = await client.post("/book", json={"day": 1}, headers=headers)
+
+    assert retry.status_code == 200
+    assert len(calls) == 2
+
+
+@pytest.mark.anyio
+async def test_large_bodies_are_not_stored(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks that requests and responses over the limit are not replayed."""
+    monkeypatch.setattr(settings, "idempotency_max_body", 12)
+    calls = []
+    client = make_client(calls)
+    headers = {"Idempotency-Key": "abc"}
+
+    await client.post("/book", json={"day": 1}, headers=headers)
+    await client.post("/book", json={"day": 1}, headers=headers)
+    await client.post("/book", json={"day": 1, "night": 2}, headers={"Idempotency-Key": "def"})
+    await client.post("/book", json={"day": 1, "night": 2}, headers={"Idempotency-Key": "def"})
+
+    assert len(calls) == 4
+
+
+@pytest.mark.anyio
+async def test_reused_key_with_other_query_is_rejected() -> None:
+    """Checks that the query string is part of the request a key stands for."""
+    calls = []
+    client = make_client(calls)
+    headers = {"Idempotency-Key": "abc"}
+
+    await client.post("/book?user_id=1", json={"day": 1}, headers=headers)
+    response = await client.post("/book?user_id=2", json={"day": 1}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(calls) == 1
@@ -0,0 +1,121 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from reservation_system.schemas.query_params import OccupancyQuery
+from reservation_system.settings import settings
+from reservation_system.utils.occupancy import (
+    SECONDS_PER_DAY,
+    occupancy,
+    occupancy_report,
+    summarize,
+)
+
+DAY = SECONDS_PER_DAY
+
+
+def test_occupancy_sweeps_rentals_per_property() -> None:
+    """Checks occupied time, vacancies and move-ins over a 30 day period."""
+    stats = occupancy(
+        property_ids=np.array([1, 2, 3, 4]),
+        rental_property_ids=np.array([1, 1, 1, 2, 2, 9]),
+        # property 1: days 5-10 and 8-12 overlap, 12-20 follows right after
+        # property 2: started before the period and runs past its end
+        starts=np.array([5, 8, 12, -10, 25, 0]) * DAY,
+        ends=np.array([10, 12, 20, 3, 40, 30]) * DAY,
+        period_start=0,
+        period_end=30 * DAY,
+    )
+
+    assert (stats["occupied"] / DAY).tolist() == [15, 8, 0, 0]
+    assert (stats["vacant"] / DAY).tolist() == [15, 22, 30, 30]
+    # property 1 is vacant before and after its single stay
+    assert stats["vacancies"].tolist() == [2, 1, 1, 1]
+    # property 1 moves in once, property 2 was rented before the period began
+    assert stats["move_ins"].tolist() == [1, 1, 0, 0]
+
+
+def test_summarize_groups_properties() -> None:
+    """Checks that rates and averages are weighted by the grouped totals."""
+    length = 10 * DAY
+    stats = {
+        "occupied": np.array([10, 5, 0]) * DAY,
+        "vacant": np.array([0, 5, 10]) * DAY,
+        "vacancies": np.array([0, 1, 1]),
+        "move_ins": np.array([1, 2, 0]),
+    }
+
+    cities = summarize(stats, length, groups=np.array([0, 1, 1]))
+
+    assert cities["properties"].tolist() == [1, 2]
+    assert cities["occupancy_rate"].tolist() == [1.0, 0.25]
+    assert cities["average_vacancy_days"].tolist() == [0.0, 7.5]
+    assert cities["turnover"].tolist() == [1.0, 1.0]
+
+
+def test_occupancy_without_rentals() -> None:
+    """Checks that properties without rentals are vacant the whole period."""
+    stats = occupancy(
+        property_ids=np.array([1]),
+        rental_property_ids=np.array([], dtype=np.int64),
+        starts=np.array([], dtype=float),
+        ends=np.array([], dtype=float),
+        period_start=0,
+        period_end=DAY,
+    )
+
+    assert stats["occupied"].tolist() == [0]
+    assert stats["vacancies"].tolist() == [1]
+
+
+def test_occupancy_report_groups_cities() -> None:
+    """Checks the per property and per city report."""
+    report = occupancy_report(
+        properties={
+            "ids": [1, 2, 3],
+            "names": ["A", "B", "C"],
+            "cities": ["Cebu", "Manila", "Cebu"],
+            "tenanted": [True, False, False],
+        },
+        rentals={"property_ids": [1, 3], "starts": [0, 0], "ends": [10 * DAY, 5 * DAY]},
+        period_start=0,
+        period_end=10 * DAY,
+    )
+
+    assert [stats["occupancy_rate"] for stats in report["properties"]] == [1.0, 0.0, 0.5]
+    assert report["cities"] == [
+        {
+            "city": "Cebu",
+            "properties": 2,
+            "occupancy_rate": 0.75,
+            "average_vacancy_days": 5.0,
+            "turnover": 1.0,
+            "tenanted": 1,
+        },
+        {
+            "city": "Manila",
+            "properties": 1,
+            "occupancy_rate": 0.0,
+            "average_vacancy_days": 10.0,
+            "turnover": 0.0,
+            "tenanted": 0,
+        },
+    ]
+
+
+def test_occupancy_query_bounds_the_period(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks reversed and overlong date ranges are rejected as bad requests."""
+    monkeypatch.setattr(settings, "analytics_max_days", 31)
+
+    assert OccupancyQuery(date_from=date(2026, 1, 1), date_to=date(2026, 1, 31)).date_to == date(2026, 1, 31)
+
+    with pytest.raises(HTTPException) as reversed_range:
+        OccupancyQuery(date_from=date(2026, 2, 1), date_to=date(2026, 1, 1))
+
+    with pytest.raises(HTTPException) as long_range:
+        OccupancyQuery(date_from=date(2026, 1, 1), date_to=date(2026, 2, 1))
+
+    assert reversed_range.value.status_code == 400
+    assert long_range.value.detail == "Range spans 32 days [max: 31]"
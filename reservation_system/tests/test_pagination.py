@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from reservation_system.utils.pagination import decode_cursor, encode_cursor
+from reservation_system.utils.response import Response
+
+
+def test_cursor_round_trip() -> None:
+    """Checks that a cursor decodes to the position it was built from."""
+    created_at = datetime(2023, 11, 4, 11, 27, 44)
+    cursor = encode_cursor(sort="created_at", value=created_at, id=42)
+
+    assert decode_cursor(cursor, sort="created_at", date_fields=("created_at",)) == (
+        created_at,
+        42,
+    )
+
+
+def test_cursor_rejects_other_sort() -> None:
+    """Checks that a cursor cannot be reused with a different sort column."""
+    cursor = encode_cursor(sort="price", value=1000.0, id=1)
+
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, sort="id")
+
+
+def test_cursor_rejects_garbage() -> None:
+    """Checks that malformed cursors are rejected."""
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", sort="id")
+
+
+def test_paginated_totals_are_optional() -> None:
+    """Checks that totals are only part of listings that summarize their rows."""
+    plain = Response.paginated(message="ok", data=[], next_cursor=None).model_dump()
+    summarized = Response.paginated(message="ok", data=[], totals={"count": 0}).model_dump()
+
+    assert "totals" not in plain
+    assert summarized["totals"] == {"count": 0}
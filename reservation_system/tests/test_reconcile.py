@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from reservation_system.utils.reconcile import PaymentIndex, parse_statement_row, to_cents
+
+DAY = datetime(2026, 3, 10)
+
+
+def make_index() -> PaymentIndex:
+    return PaymentIndex(
+        [
+            {"id": 1, "amount": 1500.0, "created_at": DAY},
+            {"id": 2, "amount": 900.0, "created_at": DAY},
+            {"id": 3, "amount": 900.0, "created_at": DAY + timedelta(days=1)},
+            {"id": 4, "amount": 700.0, "created_at": DAY - timedelta(days=20)},
+        ],
+        window=timedelta(days=3),
+    )
+
+
+def test_to_cents() -> None:
+    """Checks that currency symbols and separators are ignored."""
+    assert to_cents("₱1,500.50") == 150050
+    assert to_cents(9.99) == 999
+
+    with pytest.raises(ValueError):
+        to_cents("n/a")
+
+
+def test_parse_statement_row_accepts_header_aliases() -> None:
+    """Checks that common bank export headers are understood."""
+    row = {"Transaction Date": "10/03/2026", "Credit": "1,500.00", "Description": "PAY-1"}
+
+    assert parse_statement_row(row, date_format="%d/%m/%Y") == (DAY, 150000, "PAY-1")
+
+    with pytest.raises(ValueError):
+        parse_statement_row({"Reference": "PAY-1"})
+
+
+def test_parse_statement_row_converts_aware_dates_to_utc() -> None:
+    """Checks that offsets are applied before dropping the time zone."""
+    row = {"Date": "2026-03-10T08:00:00+08:00", "Amount": "15"}
+
+    assert parse_statement_row(row)[0] == DAY
+    assert parse_statement_row({**row, "Date": "2026-03-10T00:00:00"})[0] == DAY
+
+
+def test_match_by_reference() -> None:
+    """Checks that a quoted payment id wins and is only matched once."""
+    index = make_index()
+
+    assert index.match(DAY, 150000, "rent pay-1") == ("matched", 1)
+    assert index.match(DAY, 150000, "rent pay-1") == ("unmatched", None)
+    assert index.match(DAY, 100, "PAY-2") == ("amount_mismatch", 2)
+
+
+def test_match_by_amount_and_date_window() -> None:
+    """Checks that amounts match within the window, ambiguity is reported."""
+    index = make_index()
+
+    assert index.match(DAY, 90000, "") == ("ambiguous", None)
+    assert index.match(DAY, 70000, "") == ("unmatched", None)
+    assert index.match(DAY - timedelta(days=3), 90000, "") == ("matched", 2)
+    assert index.match(DAY, 90000, "") == ("matched", 3)
+
+
+def test_stale_payments_are_reported_not_matched() -> None:
+    """Checks that payments of freed rentals match as stale, by reference or amount."""
+    index = PaymentIndex(
+        [
+            {"id": 1, "amount": 1500.0, "created_at": DAY, "stale": True},
+            {"id": 2, "amount": 900.0, "created_at": DAY, "stale": True},
+        ],
+        window=timedelta(days=3),
+    )
+
+    assert index.match(DAY, 150000, "PAY-1") == ("stale", 1)
+    assert index.match(DAY, 90000, "") == ("stale", 2)
+    assert index.match(DAY, 90000, "") == ("unmatched", None)
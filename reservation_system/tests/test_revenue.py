@@ -0,0 +1,86 @@
+from datetime import date, datetime
+
+from reservation_system.utils.revenue import (
+    bucket_count,
+    is_closed,
+    month_of,
+    period_tags,
+    revenue_deltas,
+    revenue_series,
+    revenue_sign,
+)
+
+
+def test_revenue_sign() -> None:
+    """Checks that only moves in and out of the paid status count."""
+    assert revenue_sign("pending", "paid") == 1
+    assert revenue_sign("paid", "declined") == -1
+    assert revenue_sign("pending", "declined") == 0
+    assert revenue_sign("paid", "paid") == 0
+
+
+def test_month_of() -> None:
+    """Checks that December does not roll over into the next year."""
+    assert month_of(datetime(2026, 12, 31, 23, 59)) == date(2026, 12, 1)
+
+
+def test_revenue_deltas() -> None:
+    """Checks that changes are summed per property month and cancel out."""
+    deltas = revenue_deltas([
+        (1, datetime(2026, 3, 2), 100.0, 1),
+        (1, datetime(2026, 3, 20), 50.0, 1),
+        (1, datetime(2026, 4, 1), 70.0, 1),
+        (2, datetime(2026, 3, 5), 30.0, 1),
+        (2, datetime(2026, 3, 5), 30.0, -1),
+    ])
+
+    assert deltas == {
+        (1, date(2026, 3, 1)): [150.0, 2],
+        (1, date(2026, 4, 1)): [70.0, 1],
+    }
+
+
+def test_bucket_count() -> None:
+    """Checks that partial buckets at both ends are counted."""
+    assert bucket_count(date(2026, 1, 1), date(2026, 1, 1), "day") == 1
+    assert bucket_count(date(2026, 1, 1), date(2026, 12, 31), "day") == 365
+    # Sunday to the following Monday spans two weeks
+    assert bucket_count(date(2026, 3, 8), date(2026, 3, 9), "week") == 2
+    assert bucket_count(date(2026, 3, 9), date(2026, 3, 15), "week") == 1
+    assert bucket_count(date(2025, 12, 31), date(2026, 1, 1), "month") == 2
+    assert bucket_count(date(2026, 3, 31), date(2026, 4, 1), "quarter") == 2
+    assert bucket_count(date(2026, 1, 1), date(2026, 12, 31), "quarter") == 4
+
+
+def test_revenue_series() -> None:
+    """Checks that property revenue is zero filled across every bucket."""
+    series = revenue_series([
+        {"bucket": "2026-01-01", "property_id": 1, "name": "A", "amount": 100.0},
+        {"bucket": "2026-01-01", "property_id": 2, "name": "B", "amount": 300.0},
+        {"bucket": "2026-02-01", "property_id": None, "name": None, "amount": 0},
+        {"bucket": "2026-03-01", "property_id": 1, "name": "A", "amount": 50.0},
+    ])
+
+    assert series["buckets"] == ["2026-01-01", "2026-02-01", "2026-03-01"]
+    assert series["total"] == [400.0, 0.0, 50.0]
+    assert series["total_revenue"] == 450.0
+    assert series["properties"] == [
+        {"property_id": 2, "name": "B", "revenue": [300.0, 0.0, 0.0], "total": 300.0},
+        {"property_id": 1, "name": "A", "revenue": [100.0, 0.0, 50.0], "total": 150.0},
+    ]
+
+
+def test_period_tags() -> None:
+    """Checks that a period is tagged with every month it spans."""
+    assert period_tags(date(2025, 11, 15), date(2026, 2, 1)) == [
+        "revenue:2025-11",
+        "revenue:2025-12",
+        "revenue:2026-01",
+        "revenue:2026-02",
+    ]
+
+
+def test_is_closed() -> None:
+    """Checks that only periods ended before today are closed."""
+    assert is_closed(date(2026, 9, 30), today=date(2026, 10, 18))
+    assert not is_closed(date(2026, 10, 31), today=date(2026, 10, 18))
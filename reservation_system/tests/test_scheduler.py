@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from reservation_system.utils.scheduler import run_periodically
+
+
+@pytest.mark.anyio
+async def test_run_periodically_survives_failures() -> None:
+    """Checks that a failing run does not stop the following ones."""
+    runs = []
+
+    async def job() -> None:
+        runs.append(len(runs))
+
+        if len(runs) == 1:
+            raise RuntimeError("first run fails")
+
+    task = run_periodically(job, interval=0.01, name="test")
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert len(runs) >= 3
@@ -0,0 +1,148 @@
+import io
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+
+from reservation_system.utils.file_response import RangeFileResponse, parse_range
+from reservation_system.utils import storage
+from reservation_system.utils.storage import VARIANTS, FileSystemStorage, build_variants
+
+
+def write_image(path: Path, size: tuple[int, int] = (3000, 1500)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format="PNG")
+    path.write_bytes(buffer.getvalue())
+
+    return buffer.getvalue()
+
+
+def test_build_variants_resizes_and_deduplicates(tmp_path: Path) -> None:
+    """Identical uploads are stored once, resized to every variant."""
+    first = tmp_path / "first.png"
+    second = tmp_path / "second.png"
+    write_image(first)
+    write_image(second)
+
+    digest = build_variants(str(first), str(tmp_path / "store"))
+    stored = tmp_path / "store" / digest[:2] / digest
+    modified = {name: (stored / f"{name}.jpg").stat().st_mtime_ns for name in VARIANTS}
+
+    assert build_variants(str(second), str(tmp_path / "store")) == digest
+    assert not first.exists() and not second.exists()
+
+    for name, size in VARIANTS.items():
+        with Image.open(stored / f"{name}.jpg") as variant:
+            assert max(variant.size) == min(size, 3000)
+
+        assert (stored / f"{name}.jpg").stat().st_mtime_ns == modified[name]
+
+
+def test_storage_path_rejects_unknown_names(tmp_path: Path) -> None:
+    """Only stored variants of well formed digests map to a path."""
+    storage = FileSystemStorage(root=tmp_path, base_url="/api/images")
+
+    assert storage.get_path("a" * 64, "thumb") == tmp_path / "aa" / ("a" * 64) / "thumb.jpg"
+    assert storage.get_path("../" + "a" * 61, "thumb") is None
+    assert storage.get_path("a" * 64, "original") is None
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, None),
+        ("bytes=0-9", (0, 9)),
+        ("bytes=90-", (90, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=50-500", (50, 99)),
+        ("bytes=0-1,5-6", None),
+    ],
+)
+def test_parse_range(header, expected) -> None:
+    """Single byte ranges are clamped to the file size."""
+    assert parse_range(header, 100) == expected
+
+
+def test_parse_range_unsatisfiable() -> None:
+    """Ranges starting past the end are rejected."""
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.mark.anyio
+async def test_range_file_response(tmp_path: Path) -> None:
+    """Range requests get partial content, bad ranges a 416."""
+    path = tmp_path / "file.bin"
+    path.write_bytes(bytes(range(100)))
+
+    def endpoint(request: Request) -> RangeFileResponse:
+        return RangeFileResponse(
+            path=path,
+            media_type="application/octet-stream",
+            range_header=request.headers.get("Range"),
+        )
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    full = await client.get("/")
+    assert full.status_code == 200
+    assert full.content == bytes(range(100))
+    assert full.headers["Accept-Ranges"] == "bytes"
+
+    partial = await client.get("/", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == bytes(range(10, 20))
+    assert partial.headers["Content-Range"] == "bytes 10-19/100"
+
+    unsatisfiable = await client.get("/", headers={"Range": "bytes=200-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["Content-Range"] == "bytes */100"
+
+
+@pytest.mark.anyio
+async def test_range_file_response_empty_file(tmp_path: Path) -> None:
+    """An empty file still ends the response body."""
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    messages = []
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    response = RangeFileResponse(path=path, media_type="application/octet-stream")
+    await response({"type": "http", "method": "GET"}, None, send)
+
+    assert messages[0]["status"] == 200
+    assert messages[-1] == {"type": "http.response.body", "body": b""}
+
+
+@pytest.mark.anyio
+async def test_storage_exists(tmp_path: Path) -> None:
+    """Deleted images are no longer in place."""
+    storage = FileSystemStorage(root=tmp_path, base_url="/api/images")
+    source = tmp_path / "image.png"
+    write_image(source)
+    digest = build_variants(str(source), str(tmp_path))
+    variants = {name: f"/api/images/{digest}/{name}.jpg" for name in VARIANTS}
+
+    assert await storage.exists(variants)
+
+    await storage.delete(variants)
+
+    assert not await storage.exists(variants)
+
+
+def test_image_pool_is_made_again_after_shutdown(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A shut down pool is not handed out again."""
+    monkeypatch.setattr(storage, "_pool", None)
+    pool = storage.get_image_pool()
+    storage.shutdown_image_pool()
+
+    assert storage.get_image_pool() is not pool
+
+    storage.shutdown_image_pool()
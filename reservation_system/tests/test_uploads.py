@@ -0,0 +1,156 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterator, Iterator
+
+import pytest
+from fastapi import FastAPI, HTTPException, UploadFile
+from httpx import ASGITransport, AsyncClient
+from starlette import status
+
+from reservation_system.settings import settings
+from reservation_system.utils import uploads
+from reservation_system.web.upload_limit import MULTIPART_OVERHEAD, UploadLimitMiddleware
+
+
+class ThumbsnapStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the thumbsnap upload API."""
+
+    # statuses answered to the next requests, 200 once exhausted
+    statuses: list = []
+    bodies: list = []
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.bodies.append(body)
+        code = self.statuses.pop(0) if self.statuses else 200
+        payload = json.dumps({"data": {"thumb": "https://thumbsnap.test/t.jpg"}})
+
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(payload.encode())
+
+    def log_message(self, *args: object) -> None:
+        """Silence request logs."""
+
+
+@pytest.fixture
+def thumbsnap(monkeypatch: pytest.MonkeyPatch) -> Iterator[type]:
+    """
+    Serve the thumbsnap stand-in on a free local port.
+
+    :param monkeypatch: pytest monkeypatch.
+    :yields: request handler class, holding the received bodies.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThumbsnapStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    ThumbsnapStandIn.statuses = []
+    ThumbsnapStandIn.bodies = []
+    monkeypatch.setattr(settings, "thumbsnap_url", f"http://127.0.0.1:{server.server_port}/")
+    monkeypatch.setattr(settings, "image_upload_backoff", 0)
+
+    yield ThumbsnapStandIn
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.anyio
+async def test_upload_streams_file(thumbsnap: type) -> None:
+    """Checks that the file is posted as multipart and the thumb url returned."""
+    url = await uploads.upload_to_thumbsnap(
+        io.BytesIO(b"image-bytes"),
+        filename="image.jpg",
+        content_type="image/jpeg",
+    )
+
+    assert url == "https://thumbsnap.test/t.jpg"
+    assert b"image-bytes" in thumbsnap.bodies[0]
+    await uploads.close_http_client()
+
+
+@pytest.mark.anyio
+async def test_upload_retries_server_errors(thumbsnap: type) -> None:
+    """Checks that 5xx answers are retried with the file rewound."""
+    thumbsnap.statuses = [503, 502]
+
+    url = await uploads.upload_to_thumbsnap(
+        io.BytesIO(b"image-bytes"),
+        filename="image.jpg",
+        content_type="image/jpeg",
+    )
+
+    assert url == "https://thumbsnap.test/t.jpg"
+    assert len(thumbsnap.bodies) == 3
+    assert all(b"image-bytes" in body for body in thumbsnap.bodies)
+    await uploads.close_http_client()
+
+
+@pytest.mark.anyio
+async def test_upload_gives_up_on_client_errors(thumbsnap: type) -> None:
+    """Checks that 4xx answers are not retried."""
+    thumbsnap.statuses = [400]
+
+    with pytest.raises(ValueError):
+        await uploads.upload_to_thumbsnap(
+            io.BytesIO(b"image-bytes"),
+            filename="image.jpg",
+            content_type="image/jpeg",
+        )
+
+    assert len(thumbsnap.bodies) == 1
+    await uploads.close_http_client()
+
+
+@pytest.mark.anyio
+async def test_spool_upload_enforces_size_cap() -> None:
+    """Checks that oversized uploads are rejected while being copied."""
+    image = UploadFile(file=io.BytesIO(b"x" * 10), filename="image.jpg")
+
+    with pytest.raises(HTTPException) as exc:
+        await uploads.spool_upload(image, max_bytes=5)
+
+    assert exc.value.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    image = UploadFile(file=io.BytesIO(b"x" * 10), filename="image.jpg")
+    spooled = await uploads.spool_upload(image, max_bytes=10)
+
+    assert spooled.read() == b"x" * 10
+
+
+@pytest.mark.anyio
+async def test_upload_limit_rejects_large_bodies_early(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks that oversized uploads get 413 before the route reads them."""
+    monkeypatch.setattr(settings, "image_max_bytes", 10)
+    received = []
+    app = FastAPI()
+
+    @app.post("/api/properties/{property_id}/images")
+    async def upload_image(property_id: int, image: UploadFile) -> dict:
+        received.append(await image.read())
+
+        return {"size": len(received[-1])}
+
+    client = AsyncClient(transport=ASGITransport(app=UploadLimitMiddleware(app)), base_url="http://test")
+    large = b"x" * (MULTIPART_OVERHEAD + 11)
+
+    small = await client.post("/api/properties/1/images", files={"image": ("a.jpg", b"x" * 10)})
+    declared = await client.post("/api/properties/1/images", files={"image": ("a.jpg", large)})
+
+    async def stream() -> AsyncIterator[bytes]:  # noqa: WPS430
+        for _ in range(4):
+            yield large
+
+    streamed = await client.post(
+        "/api/properties/1/images",
+        content=stream(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+
+    assert small.json() == {"size": 10}
+    assert declared.status_code == streamed.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert streamed.json() == {"detail": "Image is larger than 10 bytes"}
+    assert len(received) == 1
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from typing import Iterable, Union
+
+# rental statuses holding their dates, the others free them
+ACTIVE_RENTAL_STATUSES = ("pending", "approved")
+
+Period = tuple[datetime, datetime]
+
+
+def utc(value: datetime) -> datetime:
+    """
+    Convert a datetime to naive UTC, as rental dates are stored.
+
+    :param value: aware or naive UTC datetime.
+    :return: naive UTC datetime.
+    """
+    if value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return value
+
+
+def parse_timestamp(value: Union[str, datetime]) -> datetime:
+    """
+    Parse a timestamp returned by a raw query.
+
+    :param value: ISO 8601 string or datetime.
+    :return: naive UTC datetime.
+    """
+    if isinstance(value, str):
+        # fromisoformat only takes a Z suffix from Python 3.11
+        if value.endswith("Z"):
+            value = f"{value[:-1]}+00:00"
+
+        value = datetime.fromisoformat(value)
+
+    return utc(value)
+
+
+def free_periods(start: datetime, end: datetime, booked: Iterable[Period]) -> list[Period]:
+    """
+    Get the free periods of a window around booked periods.
+
+    Periods are half open, a booking ending when another starts does
+    not overlap it.
+
+    :param start: window start.
+    :param end: window end.
+    :param booked: booked periods, clipped to the window and ordered by start.
+    :return: free periods ordered by start.
+    """
+    free = []
+    cursor = start
+
+    for booked_start, booked_end in booked:
+        if booked_start > cursor:
+            free.append((cursor, booked_start))
+
+        cursor = max(cursor, booked_end)
+
+    if cursor < end:
+        free.append((cursor, end))
+
+    return free
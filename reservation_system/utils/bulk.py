@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+from typing import IO, Any, AsyncIterator, Iterable, Iterator, Literal, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import iterate_in_threadpool
+
+BulkFormat = Literal["ndjson", "csv"]
+
+# media type of each bulk format
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[BulkFormat]:
+    """
+    Detect the bulk format of an uploaded file.
+
+    :param filename: uploaded file name.
+    :param content_type: uploaded file content type.
+    :return: bulk format, None if unknown.
+    """
+    name = (filename or "").lower()
+
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+
+    if name.endswith(".csv") or "csv" in (content_type or ""):
+        return "csv"
+
+    return None
+
+
+def decode_lines(file: IO[bytes]) -> Iterator[str]:
+    """
+    Decode a UTF-8 file line by line, dropping a leading byte order mark.
+
+    :param file: binary file.
+    :return: iterator of lines.
+    :raises UnicodeDecodeError: at the first line that is not UTF-8.
+    """
+    file.seek(0)
+
+    for index, line in enumerate(file):
+        yield line.decode("utf-8-sig" if index == 0 else "utf-8")
+
+
+def iter_rows(file: IO[bytes], format: BulkFormat) -> Iterator[tuple[int, Any]]:
+    """
+    Parse rows from a file one at a time.
+
+    Malformed NDJSON lines, including those that are not UTF-8, are yielded
+    as the ValueError raised parsing them. A CSV file can not be read past a
+    malformed record, which ends the file and is yielded as a csv.Error.
+
+    :param file: binary file.
+    :param format: bulk format.
+    :return: iterator of line numbers and parsed rows.
+    """
+    if format == "csv":
+        reader = csv.DictReader(decode_lines(file))
+        line_num = 0
+
+        try:
+            for row in reader:
+                line_num = reader.line_num
+                # empty cells are treated as missing values
+                yield line_num, {key: value for key, value in row.items() if value != ""}
+        except UnicodeDecodeError as exc:
+            yield line_num + 1, csv.Error(f"not UTF-8, {exc.reason}")
+        except csv.Error as exc:
+            yield line_num + 1, exc
+
+        return
+
+    file.seek(0)
+
+    for line_num, raw in enumerate(file, start=1):
+        try:
+            line = raw.decode("utf-8-sig" if line_num == 1 else "utf-8")
+
+            if line.strip():
+                yield line_num, json.loads(line)
+        except ValueError as exc:
+            yield line_num, exc
+
+
+def row_error(row: Any) -> Optional[str]:
+    """
+    Describe a row that could not be parsed.
+
+    :param row: parsed row, or the error raised parsing it.
+    :return: problem, None if the row was parsed.
+    """
+    if isinstance(row, UnicodeDecodeError):
+        return f"Invalid UTF-8: {row.reason}"
+
+    if isinstance(row, csv.Error):
+        return f"Invalid CSV, rest of the file skipped: {row}"
+
+    if isinstance(row, ValueError):
+        return f"Invalid JSON: {row}"
+
+    return None
+
+
+def validate_row(row: Any, model: type[Model]) -> tuple[Optional[Model], list[str]]:
+    """
+    Validate a parsed row against a schema.
+
+    :param row: parsed row, or the error raised parsing it.
+    :param model: schema of a row.
+    :return: validated row, None with the problems found if the row is invalid.
+    """
+    problem = row_error(row)
+
+    if problem:
+        return None, [problem]
+
+    if not isinstance(row, dict):
+        return None, ["Row must be an object"]
+
+    try:
+        return model.model_validate(row), []
+    except ValidationError as exc:
+        return None, [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in exc.errors()
+        ]
+
+
+def iter_chunks(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """
+    Group rows into chunks.
+
+    :param rows: rows.
+    :param size: maximum chunk size.
+    :return: iterator of chunks.
+    """
+    chunk = []
+
+    for row in rows:
+        chunk.append(row)
+
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def read_chunks(file: IO[bytes], format: BulkFormat, size: int) -> AsyncIterator[list[tuple[int, Any]]]:
+    """
+    Parse a file in chunks without blocking the event loop.
+
+    :param file: binary file.
+    :param format: bulk format.
+    :param size: maximum chunk size.
+    :return: async iterator of chunks of line numbers and parsed rows.
+    """
+    return iterate_in_threadpool(iter_chunks(iter_rows(file, format), size))
+
+
+def dump_rows(rows: Iterable[dict], format: BulkFormat, fields: list[str], header: bool) -> str:
+    """
+    Serialize rows.
+
+    :param rows: rows.
+    :param format: bulk format.
+    :param fields: fields to write.
+    :param header: write the CSV header first.
+    :return: serialized rows.
+    """
+    if format == "ndjson":
+        return "".join(
+            json.dumps({field: row[field] for field in fields}, default=str) + "\n"
+            for row in rows
+        )
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+
+    if header:
+        writer.writeheader()
+
+    writer.writerows(rows)
+
+    return buffer.getvalue()
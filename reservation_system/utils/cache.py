@@ -0,0 +1,429 @@
+import hashlib
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from ..settings import settings
+
+LISTINGS_TAG = "properties"
+FACETS_TAG = "facets"
+# entries filtered by availability, stale whenever a rental takes or frees dates
+AVAILABILITY_TAG = "availability"
+# pseudo tag whose generation moves with every invalidation, for values whose
+# tags are only known once computed
+ANY_TAG = "*"
+
+
+class CacheBackend(ABC):
+    """
+    Base class of the response cache backends.
+
+    Entries are JSON compatible values stored under a key for ``ttl``
+    seconds. Each entry can be tagged so that writes can invalidate every
+    entry depending on a record at once. Every invalidation bumps the
+    generation of its tags and of :data:`ANY_TAG`, so a value computed
+    while its tags were invalidated can be left out instead of stored stale.
+    """
+
+    def __init__(self, namespace: str, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def key(self, *parts: Any) -> str:
+        """
+        Build a cache key from JSON compatible parts.
+
+        :param parts: key parts, dicts are normalized by sorting their keys.
+        :return: cache key.
+        """
+        raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        :param key: cache key.
+        :return: value, None when missing or expired.
+        """
+        value = await self._get(key)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        tags: Iterable[str] = (),
+        persistent: bool = False,
+        generation: Optional[dict[str, int]] = None,
+    ) -> None:
+        """
+        Cache a value.
+
+        :param key: cache key.
+        :param value: JSON compatible value.
+        :param tags: tags to invalidate the entry with.
+        :param persistent: keep the entry until it is evicted or
+            invalidated instead of ``ttl`` seconds.
+        :param generation: generation of tags read by :meth:`generation`
+            before the value was computed, the value is not stored if one
+            of them was invalidated or the cache cleared since.
+        """
+        await self._set(key, value, tuple(tags), persistent, generation)
+
+    async def generation(self, *tags: str) -> dict[str, int]:
+        """
+        Get the generation of tags, bumped whenever they are invalidated.
+
+        :param tags: tags the value depends on, usually those it will be
+            stored with, :data:`ANY_TAG` when they are not known yet.
+        :return: generation to pass to :meth:`set`.
+        """
+        return await self._generation(("", *tags))
+
+    async def add(self, key: str, value: Any) -> bool:
+        """
+        Cache a value unless the key already holds one.
+
+        :param key: cache key.
+        :param value: JSON compatible value.
+        :return: True if the value was stored.
+        """
+        return await self._add(key, value)
+
+    async def delete(self, key: str) -> None:
+        """
+        Drop an entry.
+
+        :param key: cache key.
+        """
+        await self._delete_key(key)
+
+    async def invalidate(self, *tags: str) -> None:
+        """
+        Drop every entry carrying one of the tags.
+
+        :param tags: tags to invalidate.
+        """
+        self.invalidations += 1
+        await self._invalidate(tags)
+
+    async def clear(self) -> None:
+        """Drop every entry."""
+        self.invalidations += 1
+        await self._clear()
+
+    async def stats(self) -> dict:
+        """
+        Get the cache counters.
+
+        :return: hits, misses and invalidations.
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0,
+            "invalidations": self.invalidations,
+        }
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def _set(
+        self,
+        key: str,
+        value: Any,
+        tags: tuple,
+        persistent: bool,
+        generation: Optional[dict[str, int]],
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def _generation(self, tags: tuple) -> dict[str, int]:
+        ...
+
+    @abstractmethod
+    async def _add(self, key: str, value: Any) -> bool:
+        ...
+
+    @abstractmethod
+    async def _delete_key(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def _invalidate(self, tags: tuple) -> None:
+        ...
+
+    @abstractmethod
+    async def _clear(self) -> None:
+        ...
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache evicting the least recently used entries."""
+
+    def __init__(self, namespace: str, ttl: int, max_entries: int):
+        super().__init__(namespace=namespace, ttl=ttl)
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        # the empty tag counts clears, which invalidate every tag
+        self._generations: dict[str, int] = {}
+
+    async def stats(self) -> dict:
+        return {
+            **await super().stats(),
+            "entries": len(self._entries),
+            "persistent_entries": sum(entry[0] == math.inf for entry in self._entries.values()),
+        }
+
+    async def _get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, value, _ = entry
+
+        if expires_at <= time.monotonic():
+            self._delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+
+        return value
+
+    async def _set(
+        self,
+        key: str,
+        value: Any,
+        tags: tuple,
+        persistent: bool,
+        generation: Optional[dict[str, int]],
+    ) -> None:
+        if generation is not None and generation != await self._generation(tuple(generation)):
+            return
+
+        self._delete(key)
+        expires_at = math.inf if persistent else time.monotonic() + self.ttl
+        self._entries[key] = (expires_at, value, tags)
+
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._delete(next(iter(self._entries)))
+
+    async def _add(self, key: str, value: Any) -> bool:
+        if await self._get(key) is not None:
+            return False
+
+        await self._set(key, value, (), False, None)
+
+        return True
+
+    async def _delete_key(self, key: str) -> None:
+        self._delete(key)
+
+    async def _invalidate(self, tags: tuple) -> None:
+        for tag in (*tags, ANY_TAG):
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                self._delete(key)
+
+    async def _clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._generations[""] = self._generations.get("", 0) + 1
+
+    async def _generation(self, tags: tuple) -> dict[str, int]:
+        return {tag: self._generations.get(tag, 0) for tag in tags}
+
+    def _delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache shared by every worker, stored in Redis.
+
+    Least recently used eviction is left to the server ``maxmemory-policy``.
+    Requires the ``redis`` extra.
+    """
+
+    def __init__(self, namespace: str, ttl: int, url: str):
+        from redis import asyncio as redis  # noqa: WPS433
+
+        super().__init__(namespace=namespace, ttl=ttl)
+        self._redis = redis.from_url(url)
+
+    async def _get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(self._entry_key(key))
+
+        return json.loads(raw) if raw is not None else None
+
+    async def _set(
+        self,
+        key: str,
+        value: Any,
+        tags: tuple,
+        persistent: bool,
+        generation: Optional[dict[str, int]],
+    ) -> None:
+        from redis.exceptions import WatchError  # noqa: WPS433
+
+        entry_key = self._entry_key(key)
+
+        async with self._redis.pipeline(transaction=generation is not None) as pipe:
+            if generation is not None:
+                generation_keys = [self._generation_key(tag) for tag in generation]
+                # an invalidation between the check and the write aborts the write
+                await pipe.watch(*generation_keys)
+                counts = await pipe.mget(generation_keys)
+
+                if list(generation.values()) != [int(count or 0) for count in counts]:
+                    return
+
+                pipe.multi()
+
+            pipe.set(entry_key, json.dumps(value, default=str), ex=None if persistent else self.ttl)
+
+            # persistent entries get their own tag sets, which never expire
+            for tag in tags:
+                tag_key = self._tag_key(tag, persistent)
+                pipe.sadd(tag_key, entry_key)
+
+                if not persistent:
+                    pipe.expire(tag_key, self.ttl)
+
+            try:
+                await pipe.execute()
+            except WatchError:
+                return
+
+    async def _add(self, key: str, value: Any) -> bool:
+        return bool(
+            await self._redis.set(
+                self._entry_key(key),
+                json.dumps(value, default=str),
+                ex=self.ttl,
+                nx=True,
+            ),
+        )
+
+    async def _delete_key(self, key: str) -> None:
+        await self._redis.delete(self._entry_key(key))
+
+    async def _invalidate(self, tags: tuple) -> None:
+        for tag in (*tags, ANY_TAG):
+            await self._redis.incr(self._generation_key(tag))
+
+        for tag in tags:
+            tag_keys = (self._tag_key(tag), self._tag_key(tag, persistent=True))
+            keys = await self._redis.sunion(*tag_keys)
+            await self._redis.delete(*tag_keys, *keys)
+
+    async def _clear(self) -> None:
+        await self._redis.incr(self._generation_key(""))
+        keys = [
+            key
+            async for key in self._redis.scan_iter(f"{self.namespace}:*")
+            if not key.startswith(f"{self.namespace}:generation:".encode())
+        ]
+
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def _generation(self, tags: tuple) -> dict[str, int]:
+        counts = await self._redis.mget([self._generation_key(tag) for tag in tags])
+
+        return {tag: int(count or 0) for tag, count in zip(tags, counts)}
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.namespace}:entry:{key}"
+
+    def _generation_key(self, tag: str) -> str:
+        return f"{self.namespace}:generation:{tag}"
+
+    def _tag_key(self, tag: str, persistent: bool = False) -> str:
+        if persistent:
+            return f"{self.namespace}:persistent-tag:{tag}"
+
+        return f"{self.namespace}:tag:{tag}"
+
+
+def property_tag(property_id: int) -> str:
+    """
+    Get the cache tag of the entries built from a property.
+
+    :param property_id: property id.
+    :return: cache tag.
+    """
+    return f"property:{property_id}"
+
+
+def get_cache(
+    namespace: str,
+    ttl: Optional[int] = None,
+    max_entries: Optional[int] = None,
+) -> CacheBackend:
+    """
+    Get the configured response cache.
+
+    :param namespace: name prefixing the keys of this cache.
+    :param ttl: seconds entries are kept, defaults to the cache settings.
+    :param max_entries: entries kept in memory, defaults to the cache settings.
+    :return: cache backend.
+    """
+    if settings.cache_backend == "redis":
+        return RedisCache(
+            namespace=namespace,
+            ttl=ttl or settings.cache_ttl,
+            url=settings.cache_redis_url,
+        )
+
+    return MemoryCache(
+        namespace=namespace,
+        ttl=ttl or settings.cache_ttl,
+        max_entries=max_entries or settings.cache_max_entries,
+    )
+
+
+property_cache = get_cache(namespace="properties")
+
+analytics_cache = get_cache(namespace="analytics", ttl=settings.analytics_cache_ttl)
+
+principal_cache = get_cache(namespace="principals", ttl=settings.auth_principal_ttl)
@@ -0,0 +1,55 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import status
+from fastapi.responses import Response, UJSONResponse
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong entity tag from JSON compatible parts.
+
+    :param parts: values identifying the representation, e.g. id and version.
+    :return: quoted entity tag.
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag.
+
+    :param if_none_match: If-None-Match header value.
+    :param etag: current entity tag.
+    :return: True if the client copy is current.
+    """
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def conditional_response(
+    etag: str,
+    body: Optional[Any],
+    cache_control: str,
+) -> Response:
+    """
+    Build the response of a conditional GET.
+
+    :param etag: current entity tag.
+    :param body: JSON compatible body, None when the client copy is current.
+    :param cache_control: Cache-Control header value.
+    :return: 200 response with the body or an empty 304 response.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return UJSONResponse(body, headers=headers)
@@ -0,0 +1,133 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single byte range request.
+
+    :param header: Range header value.
+    :param size: file size.
+    :return: first and last byte of the range, None to send the whole file.
+    :raises ValueError: if the range can not be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    start, _, end = header[len("bytes="):].strip().partition("-")
+
+    if not start and not end:
+        return None
+
+    if not start:
+        # suffix range, the last n bytes
+        length = int(end)
+
+        if length <= 0:
+            raise ValueError(header)
+
+        return max(size - length, 0), size - 1
+
+    first = int(start)
+    last = min(int(end), size - 1) if end else size - 1
+
+    if first >= size or first > last:
+        raise ValueError(header)
+
+    return first, last
+
+
+class RangeFileResponse(Response):
+    """
+    Streams a file, honouring single byte range requests.
+
+    Uses the zero copy send extension of the ASGI server when available.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        media_type: str,
+        headers: Optional[dict[str, str]] = None,
+        range_header: Optional[str] = None,
+    ):
+        self.path = path
+        self.media_type = media_type
+        self.size = os.stat(path).st_size
+        self.status_code = 200
+        self.background = None
+        self.range = None
+
+        try:
+            self.range = parse_range(range_header, self.size)
+        except ValueError:
+            self.status_code = 416
+
+        extra = {"Accept-Ranges": "bytes"}
+
+        if self.status_code == 416:
+            extra["Content-Range"] = f"bytes */{self.size}"
+            extra["Content-Length"] = "0"
+
+        elif self.range:
+            first, last = self.range
+            self.status_code = 206
+            extra["Content-Range"] = f"bytes {first}-{last}/{self.size}"
+            extra["Content-Length"] = str(last - first + 1)
+
+        else:
+            extra["Content-Length"] = str(self.size)
+
+        self.init_headers({**(headers or {}), **extra})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if self.status_code == 416 or scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        first, last = self.range or (0, self.size - 1)
+        remaining = last - first + 1
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped.fileno(),
+                    "offset": first,
+                    "count": remaining,
+                })
+                return
+
+            await file.seek(first)
+
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+
+                if not chunk:
+                    break
+
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+
+                if remaining <= 0:
+                    return
+
+        # empty file, or one truncated while it was read
+        await send({"type": "http.response.body", "body": b""})
@@ -1,22 +1,222 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
 import bcrypt
 
+from ..settings import settings
+from .response import Response
+
+_pool: Optional[ThreadPoolExecutor] = None
+# hashes running or waiting for a worker
+_in_flight = 0
+
+
+class HashingStats:
+    """Counters of the password hashing pool, times in milliseconds."""
+
+    def __init__(self):
+        self.operations = {
+            operation: {
+                "count": 0,
+                "wait_total": 0.0,
+                "wait_max": 0.0,
+                "latency_total": 0.0,
+                "latency_max": 0.0,
+            }
+            for operation in ("hash", "check")
+        }
+        self.rejected = 0
+        self.rehashed = 0
+        self.max_in_flight = 0
+
+    def record(self, operation: str, wait: float, latency: float) -> None:
+        """
+        Record a finished operation.
+
+        :param operation: "hash" or "check".
+        :param wait: seconds spent waiting for a worker.
+        :param latency: seconds spent hashing.
+        """
+        counters = self.operations[operation]
+        counters["count"] += 1
+        counters["wait_total"] += wait * 1000
+        counters["wait_max"] = max(counters["wait_max"], wait * 1000)
+        counters["latency_total"] += latency * 1000
+        counters["latency_max"] = max(counters["latency_max"], latency * 1000)
+
+    def snapshot(self) -> dict:
+        """
+        Get the counters along with averages.
+
+        :return: statistics of each operation and of the pool.
+        """
+        operations = {}
+
+        for operation, counters in self.operations.items():
+            count = counters["count"]
+            operations[operation] = {
+                "count": count,
+                "wait_avg_ms": round(counters["wait_total"] / count, 3) if count else 0,
+                "wait_max_ms": round(counters["wait_max"], 3),
+                "latency_avg_ms": round(counters["latency_total"] / count, 3) if count else 0,
+                "latency_max_ms": round(counters["latency_max"], 3),
+            }
+
+        return {
+            **operations,
+            "rounds": settings.password_hash_rounds,
+            "workers": settings.password_hash_workers,
+            "queue_limit": settings.password_hash_queue,
+            "in_flight": _in_flight,
+            "max_in_flight": self.max_in_flight,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+
+hashing_stats = HashingStats()
+
+
+def get_hash_pool() -> ThreadPoolExecutor:
+    """
+    Get the thread pool hashing passwords.
+
+    bcrypt releases the GIL while hashing, so threads hash in parallel.
+
+    :return: shared thread pool.
+    """
+    global _pool  # noqa: WPS420
+
+    if _pool is None:
+        _pool = ThreadPoolExecutor(  # noqa: WPS442
+            max_workers=settings.password_hash_workers,
+            thread_name_prefix="password-hash",
+        )
+
+    return _pool
+
+
+def shutdown_hash_pool() -> None:
+    """Shut down the thread pool hashing passwords, a new one is made on next use."""
+    global _pool  # noqa: WPS420
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None  # noqa: WPS442
+
+
+def timed(function: Callable[..., Any], submitted: float, *args: Any) -> tuple[Any, float, float]:
+    """
+    Run a function in a worker, timing how long it waited and ran.
+
+    :param function: function to run.
+    :param submitted: perf counter when the call was queued.
+    :param args: function arguments.
+    :return: result, wait and latency in seconds.
+    """
+    started = time.perf_counter()
+    result = function(*args)
+
+    return result, started - submitted, time.perf_counter() - started
+
+
+def release_slot() -> None:
+    """Count a finished or cancelled hash out of the in flight ones."""
+    global _in_flight  # noqa: WPS420
+
+    _in_flight -= 1
 
-def hash_password(password: str) -> str:
+
+async def run_in_pool(operation: str, function: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a hashing function in the pool, rejecting it when the queue is full.
+
+    :param operation: "hash" or "check", the stats it is counted in.
+    :param function: function to run.
+    :param args: function arguments.
+    :return: function result.
+    :raises HTTPException: 503 if ``PASSWORD_HASH_QUEUE`` calls already wait.
     """
-    Hash password.
+    global _in_flight  # noqa: WPS420
+
+    if _in_flight >= settings.password_hash_workers + settings.password_hash_queue:
+        hashing_stats.rejected += 1
+        raise Response.service_unavailable(message="Server busy, retry shortly")
+
+    _in_flight += 1
+    hashing_stats.max_in_flight = max(hashing_stats.max_in_flight, _in_flight)
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        future = get_hash_pool().submit(timed, function, time.perf_counter(), *args)
+    except BaseException:
+        _in_flight -= 1
+        raise
+
+    # a cancelled caller leaves the hash running, it stays in flight until done
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(release_slot))
+    result, wait, latency = await asyncio.wrap_future(future)
+    hashing_stats.record(operation, wait, latency)
+
+    return result
+
+
+def hash_password_sync(password: str, rounds: int) -> str:
+    """
+    Hash password, blocking.
 
     :param password: password.
+    :param rounds: bcrypt cost factor.
     :return: hashed password.
     """
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
 
 
-def check_password(password: str, hashed_password: str) -> bool:
+def check_password_sync(password: str, hashed_password: str) -> bool:
     """
-    Check password.
+    Check password, blocking.
 
     :param password: password.
     :param hashed_password: hashed password.
     :return: True if password is correct, False otherwise.
     """
     return bcrypt.checkpw(password.encode(), hashed_password.encode())
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash password in the hashing pool with the configured cost factor.
+
+    :param password: password.
+    :return: hashed password.
+    """
+    return await run_in_pool("hash", hash_password_sync, password, settings.password_hash_rounds)
+
+
+async def check_password(password: str, hashed_password: str) -> bool:
+    """
+    Check password in the hashing pool.
+
+    :param password: password.
+    :param hashed_password: hashed password.
+    :return: True if password is correct, False otherwise.
+    """
+    return await run_in_pool("check", check_password_sync, password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Tell whether a hash was made with another cost factor than the configured one.
+
+    :param hashed_password: bcrypt hash, "$2b$<rounds>$<salt and hash>".
+    :return: True if the password should be hashed again.
+    """
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+
+    return rounds != settings.password_hash_rounds
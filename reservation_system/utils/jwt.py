@@ -1,11 +1,11 @@
 from datetime import datetime, timedelta
 
-from fastapi import HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer
 from jose import JWTError, jwt
 
 from ..repositories.user import UserRepository
-from ..schemas.token import JWTData
+from ..schemas.token import JWTData, Principal
 from ..settings import settings
 from ..utils.response import Response
 
@@ -53,6 +53,17 @@ user_repo = UserRepository()
 
 
 class TokenBearer(HTTPBearer):
+    """
+    Authenticates requests by their bearer token.
+
+    The user behind the token is read from the principal cache, refreshed
+    from the database every ``AUTH_PRINCIPAL_TTL`` seconds and whenever
+    the user changes. Tokens carrying a version older than the user's are
+    refused. With ``AUTH_STATELESS_TOKENS`` such tokens are trusted without
+    any lookup. The principal is attached to the request as
+    ``request.state.user`` for :func:`current_user`.
+    """
+
     def __init__(self):
         super().__init__(auto_error=False)
 
@@ -63,24 +74,64 @@ class TokenBearer(HTTPBearer):
             raise Response.unauthorized(message="Invalid token")
 
         jwt = self.verify_jwt(credentials.credentials)
+        principal = await self.get_principal(jwt)
+        self.authorize(principal)
+        request.state.user = principal
 
-        if not await user_repo.get_by_id(jwt.id):
-            raise Response.unauthorized(message="User does not exist")
-
-        return jwt
+        return jwt.model_copy(update={"is_admin": principal.is_admin})
 
     def verify_jwt(self, token: str):
         return JWTData(**decode_token(token))
 
+    async def get_principal(self, jwt: JWTData) -> Principal:
+        """
+        Get the user a token was issued to.
+
+        :param jwt: verified token claims.
+        :return: principal.
+        :raises HTTPException: if the user does not exist or the token was revoked.
+        """
+        if settings.auth_stateless_tokens and jwt.ver is not None:
+            return Principal(
+                id=jwt.id,
+                email=jwt.email,
+                is_admin=jwt.is_admin,
+                token_version=jwt.ver,
+            )
 
-class AdminTokenBearer(TokenBearer):
-    def verify_jwt(self, token: str):
-        jwt = super().verify_jwt(token)
+        principal = await user_repo.get_principal(jwt.id)
+
+        if not principal:
+            raise Response.unauthorized(message="User does not exist")
+
+        if jwt.ver is not None and jwt.ver != principal["token_version"]:
+            raise Response.unauthorized(message="Token revoked")
 
-        if not jwt.is_admin:
+        return Principal(**principal)
+
+    def authorize(self, principal: Principal) -> None:
+        """
+        Check the principal may use the route.
+
+        :param principal: authenticated user.
+        """
+
+
+class AdminTokenBearer(TokenBearer):
+    def authorize(self, principal: Principal) -> None:
+        if not principal.is_admin:
             raise Response.forbidden(message="Unauthorized")
-        return jwt
 
 
 AUTH = TokenBearer()  # authorization dependency
 ADMIN_AUTH = AdminTokenBearer()  # admin authorization dependency
+
+
+async def current_user(request: Request, _: JWTData = Depends(AUTH)) -> Principal:
+    """
+    Get the user authenticated by :data:`AUTH`, without loading it again.
+
+    :param request: request.
+    :return: principal.
+    """
+    return request.state.user
@@ -0,0 +1,185 @@
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def occupancy(
+    property_ids: np.ndarray,
+    rental_property_ids: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    period_start: float,
+    period_end: float,
+) -> dict[str, np.ndarray]:
+    """
+    Compute the occupancy of properties over a period from their rentals.
+
+    Rentals are clipped to the period and swept per property: their starts
+    and ends become +1 and -1 events, sorted by property and time, whose
+    cumulative sum is the number of rentals running after each event. A
+    property is occupied between two of its events while the sum is positive.
+    Overlapping or back to back rentals count as one stay.
+
+    :param property_ids: sorted property ids.
+    :param rental_property_ids: property id of each rental.
+    :param starts: start of each rental, in seconds.
+    :param ends: end of each rental, in seconds.
+    :param period_start: start of the period, in seconds.
+    :param period_end: end of the period, in seconds.
+    :return: arrays aligned with ``property_ids``, occupied and vacant
+        seconds, number of vacancies and of move-ins, stays starting within
+        the period.
+    """
+    count = len(property_ids)
+    length = period_end - period_start
+
+    index = np.searchsorted(property_ids, rental_property_ids)
+    index[index == count] = 0
+    known = property_ids[index] == rental_property_ids if count else np.zeros(len(index), dtype=bool)
+
+    # the first stay of a property rented across the period start began before it
+    carried_over = np.bincount(
+        index[known & (starts < period_start) & (ends > period_start)],
+        minlength=count,
+    ) > 0
+
+    clipped_starts = np.clip(starts, period_start, period_end)
+    clipped_ends = np.clip(ends, period_start, period_end)
+    running = known & (clipped_starts < clipped_ends)
+    index = index[running]
+
+    keys = np.concatenate((index, index))
+    times = np.concatenate((clipped_starts[running], clipped_ends[running]))
+    deltas = np.concatenate((np.ones(len(index), dtype=np.int64), -np.ones(len(index), dtype=np.int64)))
+
+    # starts before ends at the same time, so back to back rentals do not split a stay
+    order = np.lexsort((-deltas, times, keys))
+    keys, times, deltas = keys[order], times[order], deltas[order]
+
+    # every property's events sum to zero, so one cumulative sum serves them all
+    rentals_running = np.cumsum(deltas)
+    occupied_step = (rentals_running[:-1] > 0) & (keys[:-1] == keys[1:])
+    occupied = np.bincount(
+        keys[:-1][occupied_step],
+        weights=(times[1:] - times[:-1])[occupied_step],
+        minlength=count,
+    )
+
+    previous = np.concatenate(([0], rentals_running[:-1]))
+    stays = np.bincount(keys[(previous == 0) & (rentals_running > 0)], minlength=count)
+
+    first_start = np.full(count, period_end, dtype=float)
+    last_end = np.full(count, period_start, dtype=float)
+
+    if len(keys):
+        boundaries = np.flatnonzero(np.diff(keys)) + 1
+        first = np.concatenate(([0], boundaries))
+        last = np.concatenate((boundaries - 1, [len(keys) - 1]))
+        first_start[keys[first]] = times[first]
+        last_end[keys[last]] = times[last]
+
+    vacancies = np.where(
+        stays > 0,
+        stays - 1 + (first_start > period_start) + (last_end < period_end),
+        1 if length > 0 else 0,
+    )
+
+    return {
+        "occupied": occupied,
+        "vacant": length - occupied,
+        "vacancies": vacancies,
+        "move_ins": stays - carried_over,
+    }
+
+
+def summarize(stats: dict[str, np.ndarray], length: float, groups: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Turn occupancy totals into rates and averages, per property or per group.
+
+    :param stats: totals returned by :func:`occupancy`.
+    :param length: length of the period, in seconds.
+    :param groups: group index of each property, pass ``np.arange`` for
+        one group per property.
+    :return: arrays aligned with the groups, property count, occupancy
+        rate, occupied days, vacant days, average vacancy in days and
+        turnover, move-ins per property.
+    """
+    size = int(groups.max()) + 1 if len(groups) else 0
+    properties = np.bincount(groups, minlength=size)
+    occupied = np.bincount(groups, weights=stats["occupied"], minlength=size)
+    vacant = np.bincount(groups, weights=stats["vacant"], minlength=size)
+    vacancies = np.bincount(groups, weights=stats["vacancies"], minlength=size)
+    move_ins = np.bincount(groups, weights=stats["move_ins"], minlength=size)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "properties": properties,
+            "occupancy_rate": np.nan_to_num(occupied / (properties * length)),
+            "occupied_days": occupied / SECONDS_PER_DAY,
+            "vacant_days": vacant / SECONDS_PER_DAY,
+            "average_vacancy_days": np.nan_to_num(vacant / vacancies) / SECONDS_PER_DAY,
+            "turnover": np.nan_to_num(move_ins / properties),
+        }
+
+
+def occupancy_report(
+    properties: dict[str, list],
+    rentals: dict[str, list],
+    period_start: float,
+    period_end: float,
+) -> dict[str, list[dict]]:
+    """
+    Compute the occupancy report of properties and their cities.
+
+    :param properties: columns of the properties sorted by id, "ids",
+        "names", "cities" and "tenanted", whether they have a tenant now.
+    :param rentals: columns of the approved rentals, "property_ids",
+        "starts" and "ends" in seconds.
+    :param period_start: start of the period, in seconds.
+    :param period_end: end of the period, in seconds.
+    :return: statistics of every property and of every city.
+    """
+    property_ids = np.asarray(properties["ids"], dtype=np.int64)
+    tenanted = np.asarray(properties["tenanted"], dtype=bool)
+    stats = occupancy(
+        property_ids=property_ids,
+        rental_property_ids=np.asarray(rentals["property_ids"], dtype=np.int64),
+        starts=np.asarray(rentals["starts"], dtype=float),
+        ends=np.asarray(rentals["ends"], dtype=float),
+        period_start=period_start,
+        period_end=period_end,
+    )
+    length = period_end - period_start
+    by_property = summarize(stats, length, groups=np.arange(len(property_ids)))
+    cities, city_index = np.unique(np.asarray(properties["cities"], dtype=str), return_inverse=True)
+    by_city = summarize(stats, length, groups=city_index)
+    city_tenanted = np.bincount(city_index, weights=tenanted, minlength=len(cities))
+
+    return {
+        "properties": [
+            {
+                "property_id": int(property_id),
+                "name": properties["names"][index],
+                "city": properties["cities"][index],
+                "occupancy_rate": round(float(by_property["occupancy_rate"][index]), 4),
+                "occupied_days": round(float(by_property["occupied_days"][index]), 2),
+                "vacant_days": round(float(by_property["vacant_days"][index]), 2),
+                "vacancies": int(stats["vacancies"][index]),
+                "average_vacancy_days": round(float(by_property["average_vacancy_days"][index]), 2),
+                "turnover": int(stats["move_ins"][index]),
+                "tenanted": bool(tenanted[index]),
+            }
+            for index, property_id in enumerate(property_ids)
+        ],
+        "cities": [
+            {
+                "city": str(city),
+                "properties": int(by_city["properties"][index]),
+                "occupancy_rate": round(float(by_city["occupancy_rate"][index]), 4),
+                "average_vacancy_days": round(float(by_city["average_vacancy_days"][index]), 2),
+                "turnover": round(float(by_city["turnover"][index]), 4),
+                "tenanted": int(city_tenanted[index]),
+            }
+            for index, city in enumerate(cities)
+        ],
+    }
@@ -0,0 +1,51 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from .response import Response
+
+
+def encode_cursor(sort: str, value: Any, id: int) -> str:
+    """
+    Encode an opaque keyset cursor.
+
+    :param sort: column the listing is sorted by.
+    :param value: sort column value of the last row.
+    :param id: id of the last row.
+    :return: cursor token.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+
+    payload = json.dumps({"s": sort, "v": value, "id": id}, separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, date_fields: tuple = ()) -> tuple[Any, int]:
+    """
+    Decode a keyset cursor.
+
+    :param cursor: cursor token.
+    :param sort: column the listing is currently sorted by.
+    :param date_fields: sort columns holding datetimes.
+    :return: sort column value and id of the last row of the previous page.
+    :raises HTTPException: if the cursor is malformed or was issued for another sort.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, id = payload["v"], int(payload["id"])
+
+        if payload["s"] != sort:
+            raise ValueError(payload["s"])
+
+        if sort in date_fields:
+            value = datetime.fromisoformat(value)
+
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise Response.bad_request(message="Invalid cursor")
+
+    return value, id
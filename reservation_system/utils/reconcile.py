@@ -0,0 +1,140 @@
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Optional
+
+# payers quote PAY-<payment id> in the transfer reference
+PAYMENT_REFERENCE = re.compile(r"\bPAY-?(\d+)\b", re.IGNORECASE)
+
+# accepted statement headers of each column, compared case-insensitively
+STATEMENT_COLUMNS = {
+    "date": ("date", "transaction date", "posting date", "value date"),
+    "amount": ("amount", "credit", "credit amount"),
+    "reference": ("reference", "ref", "description", "details", "memo"),
+}
+
+REPORT_FIELDS = ["line", "date", "amount", "reference", "result", "payment_id", "error"]
+
+
+def to_cents(amount: object) -> int:
+    """
+    Convert an amount to whole cents.
+
+    :param amount: number or text, currency symbols and separators are ignored.
+    :return: amount in cents.
+    :raises ValueError: if the amount is not a number.
+    """
+    text = re.sub(r"[^\d.\-]", "", str(amount))
+
+    try:
+        return int((Decimal(text) * 100).to_integral_value())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {amount!r}")
+
+
+def parse_statement_row(
+    row: dict,
+    date_format: Optional[str] = None,
+) -> tuple[datetime, int, str]:
+    """
+    Read the date, amount and reference of a bank statement row.
+
+    :param row: CSV row keyed by header.
+    :param date_format: strptime format of the dates, ISO 8601 by default.
+    :return: date, amount in cents and reference.
+    :raises ValueError: if a column is missing or invalid.
+    """
+    columns = {key.strip().lower(): value for key, value in row.items() if key}
+    values = {}
+
+    for name, aliases in STATEMENT_COLUMNS.items():
+        values[name] = next((columns[alias] for alias in aliases if alias in columns), None)
+
+    if values["date"] is None or values["amount"] is None:
+        raise ValueError("Missing date or amount")
+
+    raw_date = values["date"].strip()
+    date = (
+        datetime.strptime(raw_date, date_format)
+        if date_format
+        else datetime.fromisoformat(raw_date)
+    )
+
+    if date.tzinfo:
+        # payments are created in naive UTC
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return date, to_cents(values["amount"]), values["reference"] or ""
+
+
+class PaymentIndex:
+    """
+    Pending payments indexed for statement matching.
+
+    Built once per reconciliation, each statement row is then matched with
+    a hash lookup by payment reference or by amount, the candidates of an
+    amount being sorted by date so the date window is a bisection. Payments
+    flagged "stale", whose rental no longer holds its dates, still match
+    but are reported as stale so they are not settled.
+    """
+
+    def __init__(self, payments: Iterable[dict], window: timedelta):
+        self.window = window
+        self.by_id: dict[int, dict] = {}
+        self.by_amount: dict[int, list[tuple[datetime, int]]] = {}
+
+        for payment in payments:
+            cents = to_cents(payment["amount"])
+            self.by_id[payment["id"]] = {**payment, "cents": cents}
+            self.by_amount.setdefault(cents, []).append((payment["created_at"], payment["id"]))
+
+        for candidates in self.by_amount.values():
+            candidates.sort()
+
+    def match(self, date: datetime, cents: int, reference: str) -> tuple[str, Optional[int]]:
+        """
+        Match a statement row, consuming the matched payment.
+
+        :param date: transaction date.
+        :param cents: transaction amount in cents.
+        :param reference: transaction reference.
+        :return: result and payment id, the result being "matched",
+            "stale", "amount_mismatch", "ambiguous" or "unmatched".
+        """
+        referenced = PAYMENT_REFERENCE.search(reference)
+
+        if referenced and int(referenced.group(1)) in self.by_id:
+            payment = self.by_id[int(referenced.group(1))]
+
+            if payment["cents"] != cents:
+                return "amount_mismatch", payment["id"]
+
+            return self.consume(payment["id"]), payment["id"]
+
+        candidates = self.by_amount.get(cents, [])
+        low = bisect_left(candidates, (date - self.window, -1))
+        high = bisect_right(candidates, (date + self.window, float("inf")))
+
+        if high - low == 1:
+            payment_id = candidates[low][1]
+
+            return self.consume(payment_id), payment_id
+
+        if high - low > 1:
+            return "ambiguous", None
+
+        return "unmatched", None
+
+    def consume(self, payment_id: int) -> str:
+        """
+        Remove a matched payment so it is not matched twice.
+
+        :param payment_id: payment id.
+        :return: result of the match, "matched" or "stale".
+        """
+        payment = self.by_id.pop(payment_id)
+        candidates = self.by_amount[payment["cents"]]
+        candidates.remove((payment["created_at"], payment_id))
+
+        return "stale" if payment.get("stale") else "matched"
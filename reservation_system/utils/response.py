@@ -1,7 +1,8 @@
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import HTTPException, status
 
+from ..schemas.response import PaginatedResponse, TotalsPaginatedResponse
 from ..schemas.response import Response as BaseResponse
 
 
@@ -26,6 +27,36 @@ class Response:
             **kwargs,
         )
 
+    @staticmethod
+    def paginated(
+        message: str,
+        data: Any = None,
+        next_cursor: Optional[str] = None,
+        totals: Optional[dict] = None,
+    ) -> PaginatedResponse:
+        """
+        Success response for a page of a cursor paginated listing.
+
+        :param message: message.
+        :param data: data.
+        :param next_cursor: cursor of the next page, None on the last page.
+        :param totals: summary of every row matching the filters.
+        :return: PaginatedResponse.
+        """
+        if totals is not None:
+            return TotalsPaginatedResponse(
+                message=message,
+                data=data,
+                next_cursor=next_cursor,
+                totals=totals,
+            )
+
+        return PaginatedResponse(
+            message=message,
+            data=data,
+            next_cursor=next_cursor,
+        )
+
     @staticmethod
     def unauthorized(message: str) -> HTTPException:
         """
@@ -90,3 +121,18 @@ class Response:
             status_code=status.HTTP_409_CONFLICT,
             detail=message,
         )
+
+    @staticmethod
+    def service_unavailable(message: str, retry_after: int = 1) -> HTTPException:
+        """
+        Service unavailable response.
+
+        :param message: message.
+        :param retry_after: seconds the client should wait before retrying.
+        :return: Error.
+        """
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=message,
+            headers={"Retry-After": str(retry_after)},
+        )
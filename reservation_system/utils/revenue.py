@@ -0,0 +1,157 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+# payments counted as revenue
+REVENUE_STATUS = "paid"
+
+# cache tag of the analytics listing properties, stale when one is added, renamed or removed
+PROPERTIES_TAG = "revenue:properties"
+
+
+def month_of(value: datetime) -> date:
+    """
+    Get the month a payment is counted in.
+
+    :param value: payment creation date.
+    :return: first day of its month.
+    """
+    return date(value.year, value.month, 1)
+
+
+def revenue_deltas(changes: Iterable[tuple[int, datetime, float, int]]) -> dict[tuple[int, date], list]:
+    """
+    Aggregate payment changes into rollup deltas.
+
+    :param changes: property id, payment creation date, amount and sign
+        (+1 when a payment becomes paid, -1 when it stops being paid).
+    :return: amount and payment count deltas keyed by property id and month.
+    """
+    deltas = defaultdict(lambda: [0.0, 0])
+
+    for property_id, created_at, amount, sign in changes:
+        delta = deltas[(property_id, month_of(created_at))]
+        delta[0] += sign * amount
+        delta[1] += sign
+
+    return {key: delta for key, delta in deltas.items() if delta[1] or delta[0]}
+
+
+def revenue_sign(old_status: str, new_status: str) -> int:
+    """
+    Get how a status change moves a payment in or out of revenue.
+
+    :param old_status: status before the change.
+    :param new_status: status after the change.
+    :return: +1, -1 or 0.
+    """
+    return (new_status == REVENUE_STATUS) - (old_status == REVENUE_STATUS)
+
+
+# interval between the buckets of each time series granularity
+GRANULARITY_STEPS = {
+    "day": "1 day",
+    "week": "7 days",
+    "month": "1 month",
+    "quarter": "3 months",
+}
+
+
+def bucket_count(start: date, end: date, granularity: str) -> int:
+    """
+    Count the buckets of a time series.
+
+    :param start: first day of the series.
+    :param end: last day of the series, inclusive.
+    :param granularity: "day", "week", "month" or "quarter".
+    :return: number of buckets.
+    """
+    if granularity == "day":
+        return (end - start).days + 1
+
+    if granularity == "week":
+        # weeks start on Monday as with date_trunc
+        return (end - start + timedelta(days=start.weekday())).days // 7 + 1
+
+    if granularity == "quarter":
+        return (end.year - start.year) * 4 + (end.month - 1) // 3 - (start.month - 1) // 3 + 1
+
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def revenue_series(rows: Iterable[dict]) -> dict:
+    """
+    Assemble the rows of a revenue time series query.
+
+    :param rows: bucket, property id, name, amount and payment count, one
+        row per bucket and property with revenue or per empty bucket,
+        ordered by bucket.
+    :return: bucket labels, total revenue per bucket and the zero-filled
+        revenue per bucket of each property with revenue.
+    """
+    buckets = []
+    totals = []
+    properties = {}
+
+    for row in rows:
+        if not buckets or buckets[-1] != row["bucket"]:
+            buckets.append(row["bucket"])
+            totals.append(0.0)
+
+        if row["property_id"] is None:
+            continue
+
+        series = properties.setdefault(
+            row["property_id"],
+            {"property_id": row["property_id"], "name": row["name"], "revenue": {}, "total": 0.0},
+        )
+        series["revenue"][len(buckets) - 1] = row["amount"]
+        series["total"] += row["amount"]
+        totals[-1] += row["amount"]
+
+    for series in properties.values():
+        series["revenue"] = [series["revenue"].get(index, 0.0) for index in range(len(buckets))]
+
+    return {
+        "buckets": buckets,
+        "total": totals,
+        "total_revenue": sum(totals),
+        "properties": sorted(properties.values(), key=lambda series: -series["total"]),
+    }
+
+
+def revenue_tag(month: date) -> str:
+    """
+    Get the cache tag of the analytics built from the payments of a month.
+
+    :param month: any day of the month.
+    :return: cache tag.
+    """
+    return f"revenue:{month.year:04d}-{month.month:02d}"
+
+
+def period_tags(start: date, end: date) -> list[str]:
+    """
+    Get the cache tags of every month of a period.
+
+    :param start: first day of the period.
+    :param end: last day of the period, inclusive.
+    :return: cache tags.
+    """
+    months = bucket_count(start, end, "month")
+
+    return [
+        revenue_tag(date(start.year + (start.month - 1 + offset) // 12, (start.month - 1 + offset) % 12 + 1, 1))
+        for offset in range(months)
+    ]
+
+
+def is_closed(end: date, today: date) -> bool:
+    """
+    Tell whether a period is over, its analytics then only change along with old payments.
+
+    :param end: last day of the period, inclusive.
+    :param today: current day.
+    :return: True if the period ended before today.
+    """
+    return end < today
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+
+def run_periodically(
+    func: Callable[[], Awaitable[object]],
+    interval: float,
+    name: str,
+) -> asyncio.Task:
+    """
+    Run a coroutine function every ``interval`` seconds in the background.
+
+    Failures are logged and the next run still happens. Cancel the returned
+    task to stop.
+
+    :param func: coroutine function to run.
+    :param interval: seconds between the end of a run and the next one.
+    :param name: name of the task, used in logs.
+    :return: background task.
+    """
+
+    async def loop() -> None:  # noqa: WPS430
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                await func()
+            except Exception:
+                logger.exception("Scheduled task {} failed", name)
+
+    return asyncio.create_task(loop(), name=name)
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, Optional
+
+from ..settings import settings
+from .uploads import upload_to_thumbsnap
+
+# longest side in pixels of each generated image variant
+VARIANTS = {"thumb": 320, "medium": 1024, "full": 2560}
+
+VARIANT_FORMAT = "jpg"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool resizing images.
+
+    :return: shared process pool.
+    """
+    global _pool  # noqa: WPS420
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.image_workers)  # noqa: WPS442
+
+    return _pool
+
+
+def shutdown_image_pool() -> None:
+    """Shut down the process pool resizing images, a new one is made on next use."""
+    global _pool  # noqa: WPS420
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None  # noqa: WPS442
+
+
+def build_variants(source: str, root: str) -> str:
+    """
+    Store an image under its content hash along with its resized variants.
+
+    Runs in a worker process. Variants already stored for the same content
+    are reused. The source file is removed.
+
+    :param source: path of the uploaded image.
+    :param root: storage root directory.
+    :return: sha256 hex digest of the image.
+    """
+    from PIL import Image, ImageOps  # noqa: WPS433
+
+    digest = hashlib.sha256()
+
+    with open(source, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    directory = Path(root) / digest.hexdigest()[:2] / digest.hexdigest()
+    paths = {name: directory / f"{name}.{VARIANT_FORMAT}" for name in VARIANTS}
+
+    try:
+        if all(path.exists() for path in paths.values()):
+            return digest.hexdigest()
+
+        directory.mkdir(parents=True, exist_ok=True)
+
+        with Image.open(source) as original:
+            original = ImageOps.exif_transpose(original).convert("RGB")
+
+            for name, size in VARIANTS.items():
+                variant = original.copy()
+                variant.thumbnail((size, size))
+                partial = paths[name].with_suffix(f".{uuid.uuid4().hex}.tmp")
+                variant.save(partial, format="JPEG", quality=85, optimize=True)
+                os.replace(partial, paths[name])
+
+    finally:
+        os.remove(source)
+
+    return digest.hexdigest()
+
+
+class ImageStorage(ABC):
+    """Base class of the property image storage backends."""
+
+    @abstractmethod
+    async def save(self, file: IO[bytes], filename: str, content_type: str) -> dict[str, str]:
+        """
+        Store an image.
+
+        :param file: image file.
+        :param filename: image file name.
+        :param content_type: image content type.
+        :return: url of each stored variant, always including "full".
+        """
+
+    @abstractmethod
+    async def delete(self, variants: dict[str, str]) -> None:
+        """
+        Delete a stored image.
+
+        :param variants: url of each stored variant.
+        """
+
+    async def exists(self, variants: dict[str, str]) -> bool:
+        """
+        Tell whether a stored image is still in place.
+
+        :param variants: url of each stored variant.
+        :return: True unless the image was deleted.
+        """
+        return True
+
+    def get_path(self, digest: str, variant: str) -> Optional[Path]:
+        """
+        Get the local path of a stored variant.
+
+        :param digest: image content hash.
+        :param variant: variant name.
+        :return: path, None if the backend does not serve files itself.
+        """
+        return None
+
+
+class ThumbsnapStorage(ImageStorage):
+    """Stores images on thumbsnap, which generates its own thumbnails."""
+
+    async def save(self, file: IO[bytes], filename: str, content_type: str) -> dict[str, str]:
+        url = await upload_to_thumbsnap(file, filename=filename, content_type=content_type)
+
+        return {"full": url}
+
+    async def delete(self, variants: dict[str, str]) -> None:
+        """Thumbsnap has no delete API, images are left in place."""
+
+
+class FileSystemStorage(ImageStorage):
+    """
+    Stores images on the local file system, addressed by content hash.
+
+    Identical uploads share the same files. Resizing runs in a process
+    pool so the event loop is never blocked.
+    """
+
+    def __init__(self, root: Path, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    async def save(self, file: IO[bytes], filename: str, content_type: str) -> dict[str, str]:
+        incoming = self.root / "incoming"
+        incoming.mkdir(parents=True, exist_ok=True)
+        source = incoming / uuid.uuid4().hex
+
+        def copy() -> None:  # noqa: WPS430
+            file.seek(0)
+
+            with open(source, "wb") as target:
+                shutil.copyfileobj(file, target)
+
+        await asyncio.to_thread(copy)
+
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(
+            get_image_pool(),
+            build_variants,
+            str(source),
+            str(self.root),
+        )
+
+        return {
+            name: f"{self.base_url}/{digest}/{name}.{VARIANT_FORMAT}"
+            for name in VARIANTS
+        }
+
+    async def delete(self, variants: dict[str, str]) -> None:
+        digest = variants["full"].rsplit("/", 2)[-2]
+        directory = self.root / digest[:2] / digest
+
+        await asyncio.to_thread(shutil.rmtree, directory, True)
+
+    async def exists(self, variants: dict[str, str]) -> bool:
+        digest = variants["full"].rsplit("/", 2)[-2]
+        paths = [self.get_path(digest, name) for name in VARIANTS]
+
+        return await asyncio.to_thread(lambda: all(path and path.exists() for path in paths))
+
+    def get_path(self, digest: str, variant: str) -> Optional[Path]:
+        if variant not in VARIANTS or len(digest) != 64 or not all(
+            char in "0123456789abcdef" for char in digest
+        ):
+            return None
+
+        return self.root / digest[:2] / digest / f"{variant}.{VARIANT_FORMAT}"
+
+
+def get_image_storage() -> ImageStorage:
+    """
+    Get the configured image storage.
+
+    :return: image storage backend.
+    """
+    if settings.image_storage == "filesystem":
+        return FileSystemStorage(
+            root=settings.image_storage_path,
+            base_url=settings.image_storage_url,
+        )
+
+    return ThumbsnapStorage()
+
+
+image_storage = get_image_storage()
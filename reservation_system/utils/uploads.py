@@ -0,0 +1,171 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from tempfile import SpooledTemporaryFile
+from typing import IO, Optional
+
+import httpx
+from fastapi import HTTPException, UploadFile, status
+
+from ..settings import settings
+
+CHUNK_SIZE = 64 * 1024
+
+# keep small images in memory, spill bigger ones to disk
+SPOOL_MAX_SIZE = 1024 * 1024
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the pooled HTTP client used for outgoing uploads.
+
+    :return: shared async client.
+    """
+    global _client  # noqa: WPS420
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(  # noqa: WPS442
+            timeout=httpx.Timeout(settings.image_upload_timeout, connect=5),
+            limits=httpx.Limits(max_connections=settings.image_upload_connections),
+        )
+
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the pooled HTTP client."""
+    if _client is not None:
+        await _client.aclose()
+
+
+async def spool_upload(image: UploadFile, max_bytes: int) -> IO[bytes]:
+    """
+    Copy an uploaded file into a spooled temporary file owned by the caller.
+
+    :param image: uploaded file.
+    :param max_bytes: maximum accepted size.
+    :return: spooled file rewound to the start.
+    :raises HTTPException: if the file is larger than ``max_bytes``.
+    """
+    spooled = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)  # noqa: WPS515
+    size = 0
+
+    while chunk := await image.read(CHUNK_SIZE):
+        size += len(chunk)
+
+        if size > max_bytes:
+            spooled.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Image is larger than {max_bytes} bytes",
+            )
+
+        spooled.write(chunk)
+
+    spooled.seek(0)
+
+    return spooled
+
+
+async def upload_to_thumbsnap(
+    file: IO[bytes],
+    filename: str,
+    content_type: str,
+) -> str:
+    """
+    Stream an image to thumbsnap, retrying transient failures with backoff.
+
+    :param file: image file, rewound before each attempt.
+    :param filename: image file name.
+    :param content_type: image content type.
+    :return: url of the uploaded image thumbnail.
+    :raises ValueError: if thumbsnap rejects the image or keeps failing.
+    """
+    client = get_http_client()
+    error = "Image upload failed"
+
+    for attempt in range(settings.image_upload_retries + 1):
+        if attempt:
+            await asyncio.sleep(settings.image_upload_backoff * 2 ** (attempt - 1))
+
+        file.seek(0)
+
+        try:
+            resp = await client.post(
+                settings.thumbsnap_url,
+                data={"key": settings.thumbsnap_secret},
+                files={"media": (filename, file, content_type)},
+            )
+
+        except httpx.TransportError as exc:
+            error = f"Image upload failed: {exc!r}"
+            continue
+
+        if resp.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            error = f"Image upload failed with status {resp.status_code}"
+            continue
+
+        if resp.status_code != status.HTTP_200_OK:
+            raise ValueError(f"Image upload rejected with status {resp.status_code}")
+
+        return resp.json()["data"]["thumb"]
+
+    raise ValueError(error)
+
+
+class UploadJobs:
+    """
+    In-process registry of background image upload jobs.
+
+    Only the most recent ``max_jobs`` jobs are remembered.
+    """
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict = OrderedDict()
+        self._tasks: set = set()
+
+    def create(self, property_id: int) -> dict:
+        """
+        Register a new pending job.
+
+        :param property_id: property the image belongs to.
+        :return: job.
+        """
+        job = {
+            "id": uuid.uuid4().hex,
+            "property_id": property_id,
+            "status": "pending",
+            "url": None,
+            "error": None,
+        }
+        self._jobs[job["id"]] = job
+
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Get a job.
+
+        :param job_id: job id.
+        :return: job, None if unknown or forgotten.
+        """
+        return self._jobs.get(job_id)
+
+    def run(self, coro) -> None:
+        """
+        Run a job coroutine in the background.
+
+        :param coro: coroutine updating its job.
+        """
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+upload_jobs = UploadJobs()
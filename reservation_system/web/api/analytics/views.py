@@ -1,5 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from ....controllers import AnalyticsController
+from ....schemas.query_params import OccupancyQuery, RevenueSeriesQuery
+from ....utils.jwt import ADMIN_AUTH
 
 router = APIRouter()
 analytics_controller = AnalyticsController()
@@ -7,3 +9,28 @@ analytics_controller = AnalyticsController()
 @router.get("/payments")
 async def get_analytics(year: int, month: int):
     return await analytics_controller.get_all_payments(year=year, month=month)
+
+
+@router.get("/revenue", dependencies=[Depends(ADMIN_AUTH)])
+async def get_revenue_series(query: RevenueSeriesQuery = Depends()):
+    return await analytics_controller.get_revenue_series(query=query)
+
+
+@router.get("/occupancy", dependencies=[Depends(ADMIN_AUTH)])
+async def get_occupancy(query: OccupancyQuery = Depends()):
+    return await analytics_controller.get_occupancy(query=query)
+
+
+@router.get("/cache/stats", dependencies=[Depends(ADMIN_AUTH)])
+async def get_cache_stats():
+    return await analytics_controller.get_cache_stats()
+
+
+@router.post("/revenue/rebuild", dependencies=[Depends(ADMIN_AUTH)])
+async def rebuild_revenue():
+    return await analytics_controller.rebuild_revenue()
+
+
+@router.get("/revenue/check", dependencies=[Depends(ADMIN_AUTH)])
+async def check_revenue():
+    return await analytics_controller.check_revenue()
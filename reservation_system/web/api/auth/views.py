@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 
 from ....controllers import AuthController
 from ....schemas import request, response, token
-from ....utils.jwt import AUTH
+from ....utils.jwt import ADMIN_AUTH, AUTH
 
 router = APIRouter()
 controller = AuthController()
@@ -31,3 +31,8 @@ async def forgot_password(data: request.ForgotPassowrd):
 @router.post("/reset-password")
 async def reset_password(data: request.PasswordReset):
     return await controller.reset_password(data=data)
+
+
+@router.get("/hashing/stats", dependencies=[Depends(ADMIN_AUTH)])
+async def get_hashing_stats():
+    return await controller.get_hashing_stats()
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header
+
+from ....controllers import ImagesController
+
+router = APIRouter()
+images_controller = ImagesController()
+
+
+@router.get("/{digest}/{name}")
+async def get_image(
+    digest: str,
+    name: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+):
+    return await images_controller.get_image(
+        digest=digest,
+        name=name,
+        range_header=range_header,
+        if_none_match=if_none_match,
+    )
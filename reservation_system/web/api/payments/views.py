@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, UploadFile
 
 from ....controllers import PaymentsController
+from ....schemas.query_params import PaymentQuery
+from ....schemas.request import PaymentBulkUpdate
 from ....utils.jwt import ADMIN_AUTH
 
 router = APIRouter(dependencies=[Depends(ADMIN_AUTH)])
@@ -8,8 +12,18 @@ controller = PaymentsController()
 
 
 @router.get("")
-async def get_all_payments():
-    return await controller.get_all_payments()
+async def get_all_payments(filters: PaymentQuery = Depends()):
+    return await controller.get_all_payments(filters=filters)
+
+
+@router.post("/bulk")
+async def bulk_update(data: PaymentBulkUpdate):
+    return await controller.bulk_update(data=data)
+
+
+@router.post("/reconcile")
+async def reconcile(file: UploadFile, date_format: Optional[str] = None):
+    return await controller.reconcile(file=file, date_format=date_format)
 
 
 @router.get("/{payment_id}")
@@ -2,56 +2,56 @@ from fastapi import APIRouter, Depends
 
 from ....controllers import ProfileController
 from ....schemas import request
-from ....schemas.token import JWTData
-from ....utils.jwt import AUTH
+from ....schemas.token import Principal
+from ....utils.jwt import current_user
 
 router = APIRouter()
 controller = ProfileController()
 
 
 @router.get("")
-async def get_profile(user: JWTData = Depends(AUTH)):
-    return await controller.get_profile(user_id=user.id)
+async def get_profile(user: Principal = Depends(current_user)):
+    return await controller.get_profile(user=user)
 
 
 @router.put("")
-async def update_profile(data: request.UpdateProfile, user: JWTData = Depends(AUTH)):
+async def update_profile(data: request.UpdateProfile, user: Principal = Depends(current_user)):
     return await controller.update_profile(user_id=user.id, data=data)
 
 
 @router.put("/change-password")
-async def change_password(data: request.ChangePassword, user: JWTData = Depends(AUTH)):
+async def change_password(data: request.ChangePassword, user: Principal = Depends(current_user)):
     return await controller.change_password(user_id=user.id, data=data)
 
 
 @router.get("/notifications")
-async def get_notifications(user: JWTData = Depends(AUTH)):
+async def get_notifications(user: Principal = Depends(current_user)):
     return await controller.get_notifications(user_id=user.id)
 
 
 @router.put("/notifications/{notification_id}")
 async def mark_notification_as_read(
     notification_id: int,
-    user: JWTData = Depends(AUTH),
+    user: Principal = Depends(current_user),
 ):
     return await controller.mark_read(notification_id=notification_id, user_id=user.id)
 
 
 @router.put("/notifications")
-async def mark_all_notifications_as_read(user: JWTData = Depends(AUTH)):
+async def mark_all_notifications_as_read(user: Principal = Depends(current_user)):
     return await controller.mark_all_read(user_id=user.id)
 
 
 @router.get("/rentals")
-async def get_rentals(user: JWTData = Depends(AUTH)):
+async def get_rentals(user: Principal = Depends(current_user)):
     return await controller.get_rentals(user_id=user.id)
 
 
 @router.get("/rentals/{rental_id}")
-async def get_rental(rental_id: int, user: JWTData = Depends(AUTH)):
+async def get_rental(rental_id: int, user: Principal = Depends(current_user)):
     return await controller.get_rental(rental_id=rental_id, user_id=user.id)
 
 
 @router.post("/rentals/cancel")
-async def cancel_rental(rental_id: int, user: JWTData = Depends(AUTH)):
+async def cancel_rental(rental_id: int, user: Principal = Depends(current_user)):
     return await controller.cancel_rental(rental_id=rental_id, user_id=user.id)
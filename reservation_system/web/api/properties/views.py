@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, UploadFile
+from typing import Optional
 
-from ....controllers import PropertiesController
-from ....schemas.query_params import PropertyQuery
+from fastapi import APIRouter, Depends, Header, Query, UploadFile, status
+
+from ....controllers import PropertiesController, RentalsController
+from ....schemas.query_params import AvailabilityQuery, PropertyQuery, PropertyView
 from ....schemas.request import (
     RentalCreate,
     PropertyCreate,
@@ -9,20 +11,78 @@ from ....schemas.request import (
     ReviewCreate,
     ReviewUpdate,
 )
+from ....utils.bulk import BulkFormat
+from ....utils.etag import conditional_response
 from ....utils.jwt import ADMIN_AUTH, AUTH
 
 router = APIRouter()
 controller = PropertiesController()
+rentals_controller = RentalsController()
+
+# Cache-Control of the conditional GET routes, clients revalidate with the ETag
+LISTING_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+PROPERTY_CACHE_CONTROL = "public, max-age=30, must-revalidate"
 
 
 @router.get("")
-async def get_properties(filters: PropertyQuery = Depends()):
-    return await controller.get_properties(filters=filters)
+async def get_properties(
+    filters: PropertyQuery = Depends(),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    etag, body = await controller.get_properties(
+        filters=filters,
+        if_none_match=if_none_match,
+    )
+
+    return conditional_response(etag, body, cache_control=LISTING_CACHE_CONTROL)
+
+
+@router.get("/facets")
+async def get_facets(
+    filters: PropertyQuery = Depends(),
+    price_buckets: Optional[list[int]] = Query(default=None),
+):
+    return await controller.get_facets(filters=filters, price_buckets=price_buckets)
+
+
+@router.post("/ratings/rebuild", dependencies=[Depends(ADMIN_AUTH)])
+async def rebuild_ratings():
+    return await controller.rebuild_ratings()
+
+
+@router.get("/ratings/check", dependencies=[Depends(ADMIN_AUTH)])
+async def check_ratings():
+    return await controller.check_ratings()
+
+
+@router.get("/cache/stats", dependencies=[Depends(ADMIN_AUTH)])
+async def get_cache_stats():
+    return await controller.get_cache_stats()
+
+
+@router.post("/import", dependencies=[Depends(ADMIN_AUTH)])
+async def import_properties(file: UploadFile, format: Optional[BulkFormat] = None):
+    return await controller.import_properties(file=file, format=format)
+
+
+@router.get("/export", dependencies=[Depends(ADMIN_AUTH)])
+async def export_properties(format: BulkFormat = "ndjson"):
+    return await controller.export_properties(format=format)
 
 
 @router.get("/{property_id}")
-async def get_property(property_id: int):
-    return await controller.get_property(property_id=property_id)
+async def get_property(
+    property_id: int,
+    view: PropertyView = "full",
+    if_none_match: Optional[str] = Header(default=None),
+):
+    etag, body = await controller.get_property(
+        property_id=property_id,
+        view=view,
+        if_none_match=if_none_match,
+    )
+
+    return conditional_response(etag, body, cache_control=PROPERTY_CACHE_CONTROL)
 
 
 @router.post("", dependencies=[Depends(ADMIN_AUTH)])
@@ -30,11 +90,20 @@ async def create_property(data: PropertyCreate):
     return await controller.create_property(data_in=data)
 
 
-@router.post("/{property_id}/images", dependencies=[Depends(ADMIN_AUTH)])
+@router.post(
+    "/{property_id}/images",
+    dependencies=[Depends(ADMIN_AUTH)],
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def upload_image(property_id: int, image: UploadFile):
     return await controller.upload_image(property_id=property_id, image=image)
 
 
+@router.get("/images/jobs/{job_id}", dependencies=[Depends(ADMIN_AUTH)])
+async def get_image_job(job_id: str):
+    return await controller.get_image_job(job_id=job_id)
+
+
 @router.delete("/{property_id}/images/{image_id}", dependencies=[Depends(ADMIN_AUTH)])
 async def delete_image(property_id: int, image_id: int):
     return await controller.remove_image(property_id=property_id, image_id=image_id)
@@ -79,11 +148,25 @@ async def update_review(
     )
 
 
+@router.delete("/{property_id}/reviews/{review_id}")
+async def delete_review(property_id: int, review_id: int, user=Depends(AUTH)):
+    return await controller.delete_review(
+        property_id=property_id,
+        review_id=review_id,
+        user_id=user.id,
+    )
+
+
 @router.get("/{property_id}/rentals")
 async def get_rentals(property_id: int):
     return await controller.get_rentals(property_id=property_id)
 
 
+@router.get("/{property_id}/availability")
+async def get_availability(property_id: int, query: AvailabilityQuery = Depends()):
+    return await controller.get_availability(property_id=property_id, query=query)
+
+
 @router.post("/{property_id}/rentals")
 async def create_rental(property_id: int, data: RentalCreate, user=Depends(AUTH)):
     return await controller.book_property(
@@ -93,6 +176,16 @@ async def create_rental(property_id: int, data: RentalCreate, user=Depends(AUTH)
     )
 
 
+@router.post("/rentals/sweep", dependencies=[Depends(ADMIN_AUTH)])
+async def run_rental_sweep():
+    return await rentals_controller.run_sweep()
+
+
+@router.get("/rentals/sweep/stats", dependencies=[Depends(ADMIN_AUTH)])
+async def get_rental_sweep_stats():
+    return await rentals_controller.get_sweep_stats()
+
+
 @router.post("/rentals/{rental_id}/accept", dependencies=[Depends(ADMIN_AUTH)])
 async def accept_rental(rental_id: int):
     return await controller.accept_rental(
@@ -1,5 +1,5 @@
 from fastapi.routing import APIRouter
-from reservation_system.web.api import auth, profile, properties, tenants, payments, analytics
+from reservation_system.web.api import auth, profile, properties, tenants, payments, analytics, images
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["AUTH"])
@@ -7,4 +7,5 @@ api_router.include_router(profile.router, prefix="/profile", tags=["PROFILE"])
 api_router.include_router(tenants.router, prefix="/tenants", tags=["TENANTS"])
 api_router.include_router(properties.router, prefix="/properties", tags=["PROPERTY"])
 api_router.include_router(payments.router, prefix="/payments", tags=["PAYMENTS"])
-api_router.include_router(analytics.router, prefix="/analytics", tags=["ANALYTICS"])
\ No newline at end of file
+api_router.include_router(analytics.router, prefix="/analytics", tags=["ANALYTICS"])
+api_router.include_router(images.router, prefix="/images", tags=["IMAGES"])
@@ -4,6 +4,8 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from reservation_system.logging import configure_logging
 from reservation_system.web.api.router import api_router
+from reservation_system.web.idempotency import IdempotencyMiddleware
+from reservation_system.web.upload_limit import UploadLimitMiddleware
 from reservation_system.web.lifetime import (
     register_shutdown_event,
     register_startup_event,
@@ -33,6 +35,8 @@ def get_app() -> FastAPI:
 
     # Main router for the API.
     app.include_router(router=api_router, prefix="/api")
+    app.add_middleware(IdempotencyMiddleware)
+    app.add_middleware(UploadLimitMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -0,0 +1,217 @@
+import hashlib
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from reservation_system.settings import settings
+from reservation_system.utils.cache import CacheBackend, get_cache
+
+IDEMPOTENT_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+# marker stored while the first request with a key is being handled
+PROCESSING = "processing"
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response of mutations retried with an Idempotency-Key.
+
+    Keys are scoped to the method, path and Authorization header, so one
+    client can not replay another's responses. Retries with a different
+    body or query string are rejected with 422 and retries arriving while
+    the first request is still handled get 409. Server errors are not stored so the
+    request can be retried. Requests or responses larger than
+    ``IDEMPOTENCY_MAX_BODY`` are not stored either.
+    """
+
+    def __init__(self, app: ASGIApp, store: Optional[CacheBackend] = None):
+        self.app = app
+        self.store = store or get_cache(
+            namespace="idempotency",
+            ttl=settings.idempotency_ttl,
+            max_entries=settings.idempotency_max_keys,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+
+        if not idempotency_key or not is_bounded(headers):
+            await self.app(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        key = self.store.key(
+            scope["method"],
+            scope["path"],
+            idempotency_key,
+            hashlib.sha1(headers.get("authorization", "").encode()).hexdigest(),
+        )
+        # a key reused with other query parameters is another request
+        fingerprint = hashlib.sha1(scope.get("query_string", b"") + b"\n" + body).hexdigest()
+
+        if not await self.store.add(key, {"state": PROCESSING, "fingerprint": fingerprint}):
+            await self.replay(await self.store.get(key), fingerprint, scope, receive, send)
+            return
+
+        response = {"status": 500, "headers": [], "body": [], "size": 0}
+
+        async def send_and_record(message: Message) -> None:  # noqa: WPS430
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+
+            elif message["type"] == "http.response.body" and response["body"] is not None:
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+
+                # too large to store, stop recording it
+                if response["size"] > settings.idempotency_max_body:
+                    response["body"] = None
+                else:
+                    response["body"].append(chunk)
+
+            await send(message)
+
+        recorded = False
+
+        try:
+            await self.app(scope, replay_body(body, receive), send_and_record)
+
+            if response["status"] < 500 and response["body"] is not None:
+                await self.store.set(
+                    key,
+                    {
+                        "state": "done",
+                        "fingerprint": fingerprint,
+                        "status": response["status"],
+                        "headers": [
+                            [name.decode("latin-1"), value.decode("latin-1")]
+                            for name, value in response["headers"]
+                        ],
+                        "body": b"".join(response["body"]).decode("latin-1"),
+                    },
+                )
+                recorded = True
+
+        finally:
+            # failed, cancelled or not replayable, the request can be retried
+            if not recorded:
+                await self.store.delete(key)
+
+    async def replay(
+        self,
+        entry: Optional[dict],
+        fingerprint: str,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """
+        Answer a request whose key was already used.
+
+        :param entry: stored entry of the key.
+        :param fingerprint: hash of the request body.
+        :param scope: ASGI scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if entry is None:
+            # expired or evicted since the lookup
+            response = JSONResponse({"detail": "Idempotency-Key expired, retry"}, status_code=409)
+
+        elif entry["fingerprint"] != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was used with a different request"},
+                status_code=422,
+            )
+
+        elif entry["state"] == PROCESSING:
+            response = JSONResponse(
+                {"detail": "A request with this Idempotency-Key is in progress"},
+                status_code=409,
+            )
+
+        else:
+            await send({
+                "type": "http.response.start",
+                "status": entry["status"],
+                "headers": [
+                    *[
+                        (name.encode("latin-1"), value.encode("latin-1"))
+                        for name, value in entry["headers"]
+                    ],
+                    (b"idempotent-replayed", b"true"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": entry["body"].encode("latin-1")})
+            return
+
+        await response(scope, receive, send)
+
+
+def is_bounded(headers: Headers) -> bool:
+    """
+    Tell whether a request body is small enough to be read up front.
+
+    Multipart uploads and streamed bodies without a length pass through
+    without idempotency handling.
+
+    :param headers: request headers.
+    :return: True if the body is at most ``IDEMPOTENCY_MAX_BODY`` bytes.
+    """
+    if headers.get("content-type", "").startswith("multipart/"):
+        return False
+
+    length = headers.get("content-length")
+
+    if length is None:
+        return "chunked" not in headers.get("transfer-encoding", "")
+
+    return length.isdigit() and int(length) <= settings.idempotency_max_body
+
+
+async def read_body(receive: Receive) -> bytes:
+    """
+    Read a whole request body.
+
+    :param receive: ASGI receive channel.
+    :return: request body.
+    """
+    chunks = []
+
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def replay_body(body: bytes, receive: Receive) -> Receive:
+    """
+    Build a receive channel answering an already read body.
+
+    :param body: request body.
+    :param receive: original ASGI receive channel, used once the body is sent.
+    :return: ASGI receive channel.
+    """
+    sent = False
+
+    async def replay() -> Message:  # noqa: WPS430
+        nonlocal sent
+
+        if sent:
+            return await receive()
+
+        sent = True
+
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
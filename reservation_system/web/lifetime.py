@@ -2,6 +2,13 @@ from typing import Awaitable, Callable
 
 from fastapi import FastAPI
 
+from reservation_system.controllers import RentalsController
+from reservation_system.settings import settings
+from reservation_system.utils.hashing import shutdown_hash_pool
+from reservation_system.utils.scheduler import run_periodically
+from reservation_system.utils.storage import shutdown_image_pool
+from reservation_system.utils.uploads import close_http_client
+
 
 def register_startup_event(
     app: FastAPI,
@@ -21,6 +28,15 @@ def register_startup_event(
         app.middleware_stack = None
         app.middleware_stack = app.build_middleware_stack()
 
+        app.state.rental_sweeper = None
+
+        if settings.rental_sweep_interval:
+            app.state.rental_sweeper = run_periodically(
+                RentalsController().sweep,
+                interval=settings.rental_sweep_interval,
+                name="rental-sweeper",
+            )
+
     return _startup
 
 
@@ -36,6 +52,11 @@ def register_shutdown_event(
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:  # noqa: WPS430
-        pass  # noqa: WPS420
+        if app.state.rental_sweeper:
+            app.state.rental_sweeper.cancel()
+
+        await close_http_client()
+        shutdown_image_pool()
+        shutdown_hash_pool()
 
     return _shutdown
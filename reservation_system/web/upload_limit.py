@@ -0,0 +1,79 @@
+import re
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from reservation_system.settings import settings
+
+# routes receiving one image as multipart form data
+UPLOAD_PATHS = re.compile(r"^/api/properties/[^/]+/images/?$")
+
+# room left for the multipart boundary and part headers around the image
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Rejects image uploads larger than ``IMAGE_MAX_BYTES`` before they are spooled.
+
+    A declared Content-Length over the limit is answered with 413 without
+    reading the body. Other bodies are counted as they arrive and cut off
+    with 413 as soon as they go over, instead of being spooled to their end
+    by the form parser. The size of the image itself is checked again when
+    it is copied, see :func:`~reservation_system.utils.uploads.spool_upload`.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not UPLOAD_PATHS.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = settings.image_max_bytes + MULTIPART_OVERHEAD
+        length = Headers(scope=scope).get("content-length")
+
+        if length is not None and length.isdigit() and int(length) > max_bytes:
+            response = JSONResponse({"detail": too_large()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, limit_body(receive, max_bytes), send)
+
+
+def too_large() -> str:
+    """
+    Describe an oversized upload.
+
+    :return: error detail.
+    """
+    return f"Image is larger than {settings.image_max_bytes} bytes"
+
+
+def limit_body(receive: Receive, max_bytes: int) -> Receive:
+    """
+    Build a receive channel failing once a body goes over a size.
+
+    :param receive: original ASGI receive channel.
+    :param max_bytes: maximum accepted body size.
+    :return: ASGI receive channel.
+    :raises HTTPException: once more than ``max_bytes`` were received.
+    """
+    size = 0
+
+    async def limited() -> Message:  # noqa: WPS430
+        nonlocal size
+
+        message = await receive()
+        size += len(message.get("body", b""))
+
+        if size > max_bytes:
+            # raised while the route parses the form, answered with 413
+            raise HTTPException(status_code=413, detail=too_large())
+
+        return message
+
+    return limited